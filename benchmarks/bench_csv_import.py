@@ -0,0 +1,189 @@
+# tabs only
+"""
+Micro-benchmark: loading and converting a large CSV export.
+
+	python -m benchmarks.bench_csv_import [--rows N] [--repeat N]
+
+The input is a synthetic single-playlist export with the columns TuneMyMusic
+and Exportify write, including blank titles, bare and URI-style Spotify IDs
+and partial release dates, plus a few columns the importer ignores. Reading
+compares the old try-six-strategies reader with the sniffed single parse
+(time and tracemalloc peak); conversion compares the row-wise
+tracks_from_rows below with the vectorized tracks_from_csv; streaming
+compares load_csv + tracks_from_csv with consuming iter_csv_tracks one track
+at a time.
+"""
+import argparse, pathlib, random, sys, tempfile, time, tracemalloc
+
+import pandas as pd
+
+from csvmusic.core.csv_import import _read_csv_robust, iter_csv_tracks, load_csv, tracks_from_csv
+
+
+def _spotify_track_id(value: object) -> str | None:
+	text = str(value or "").strip()
+	if not text or text.casefold() == "nan":
+		return None
+	if text.casefold().startswith("spotify:track:"):
+		return text.rsplit(":", 1)[-1] or None
+	return text
+
+
+def _release_year(value: object) -> int | None:
+	text = str(value or "").strip()
+	if not text or text.casefold() == "nan":
+		return None
+	try:
+		year = int(text[:4])
+	except (TypeError, ValueError):
+		return None
+	return year if 1000 <= year <= 9999 else None
+
+
+def tracks_from_rows(df: pd.DataFrame, playlist: str | None = None) -> list[dict]:
+	"""The old row-at-a-time tracks_from_csv; the reference for the equivalence test and this benchmark."""
+	work = df
+	if playlist:
+		work = work[work["Playlist name"] == playlist]
+	# A row is a track if it has a non-empty Track name.
+	work = work[work.apply(lambda row: len(str(row.get("Track name", "")).strip()) > 0, axis=1)]
+
+	out = []
+	for position, (_, r) in enumerate(work.iterrows(), start=1):
+		isrc = str(r.get("ISRC", "")).strip()
+		spid = _spotify_track_id(r.get("Spotify - id", ""))
+		# duration if present
+		if "Duration (ms)" in work.columns:
+			try:
+				dur_ms = int(r.get("Duration (ms)", 0)) if pd.notna(r.get("Duration (ms)")) else 0
+			except Exception:
+				dur_ms = 0
+		else:
+			dur_ms = 0
+
+		track_no = int(r.get("Track number", 0) or 0) if "Track number" in work.columns else 0
+		disc_no = int(r.get("Disc number", 0) or 0) if "Disc number" in work.columns else 0
+		out.append({
+			"title": str(r.get("Track name", "")).strip(),
+			"artists": str(r.get("Artist name", "")).strip(),
+			"album": str(r.get("Album", "")).strip(),
+			"playlist": str(r.get("Playlist name", "")).strip(),
+			"isrc": isrc if isrc and isrc.lower() != "nan" else None,
+			"sp_id": spid,
+			"duration_ms": dur_ms,
+			"year": _release_year(r.get("Release date", "")),
+			"cover_url": None,     # CSV doesn't include cover
+			"track_no": track_no or position,
+			"disc_no": disc_no or 1,
+		})
+	return out
+
+
+def synthetic_library(rows: int, *, seed: int = 7) -> pd.DataFrame:
+	rng = random.Random(seed)
+	records = []
+	for index in range(rows):
+		records.append({
+			"Track name": "" if index % 97 == 0 else f"Song {index} (feat. Guest {index % 13})",
+			"Artist name": f"Artist {index % 911}",
+			"Album": f"Album {index % 3001}" if index % 11 else "",
+			"Playlist name": "Library",
+			"Type": "Track",
+			"ISRC": f"US{rng.randrange(10**9):09d}" if index % 5 else "",
+			"Spotify - id": rng.choice(["", f"spotify:track:{index:022d}", f"{index:022d}"]),
+			"Release date": rng.choice(["", "1972", "1999-04-01", "2021-11", "n/a"]),
+			"Duration (ms)": rng.randrange(60_000, 600_000) if index % 7 else "",
+			"Track number": rng.randrange(0, 20),
+			"Disc number": rng.choice([0, 1, 2]),
+			"Added at": f"2024-01-{index % 28 + 1:02d}T12:00:00Z",
+			"Popularity": rng.randrange(100),
+			"Genres": "pop,dance pop,post-teen pop",
+		})
+	return pd.DataFrame(records)
+
+
+def write_synthetic_csv(path: pathlib.Path, rows: int, *, sep: str = ",") -> pathlib.Path:
+	synthetic_library(rows).to_csv(path, index=False, sep=sep)
+	return path
+
+
+def legacy_read(path: pathlib.Path) -> pd.DataFrame:
+	"""The reader before sniffing: up to six full parses, first one that does not raise wins."""
+	errs = []
+	for kwargs in (
+		{"encoding": None, "sep": ","},
+		{"encoding": "utf-8-sig", "sep": ","},
+		{"encoding": None, "sep": ";"},
+		{"encoding": "utf-8-sig", "sep": ";"},
+		{"encoding": "utf-8", "sep": ",", "engine": "python"},
+		{"encoding": "utf-8-sig", "sep": ",", "engine": "python"},
+	):
+		try:
+			return pd.read_csv(path, **kwargs)
+		except Exception as e:
+			errs.append(f"{kwargs}: {e}")
+	raise ValueError("\n".join(errs))
+
+
+def _measure(fn):
+	tracemalloc.start()
+	started = time.perf_counter()
+	try:
+		result = fn()
+	finally:
+		elapsed = time.perf_counter() - started
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+	return result, elapsed, peak
+
+
+def _time(fn, repeat: int) -> float:
+	best = float("inf")
+	for _ in range(repeat):
+		started = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - started)
+	return best
+
+
+def main(argv) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+	parser.add_argument("--rows", type=int, default=50_000)
+	parser.add_argument("--repeat", type=int, default=3)
+	args = parser.parse_args(argv[1:])
+	with tempfile.TemporaryDirectory() as tmp:
+		path = write_synthetic_csv(pathlib.Path(tmp) / "library.csv", args.rows)
+		semicolon = write_synthetic_csv(pathlib.Path(tmp) / "library-semicolon.csv", args.rows, sep=";")
+		size_mb = path.stat().st_size / 1e6
+		print(f"file: {size_mb:.1f} MB, {args.rows} rows")
+		for label, reader in (("legacy reader", legacy_read), ("sniffed reader", _read_csv_robust)):
+			frame, elapsed, peak = _measure(lambda: reader(path))
+			wrong, _, _ = _measure(lambda: reader(semicolon))
+			print(
+				f"{label:15s} {elapsed * 1e3:8.1f} ms  peak {peak / 1e6:7.1f} MB  columns {frame.shape[1]:2d}"
+				f"  semicolon file -> {wrong.shape[1]} column(s)"
+			)
+		_, whole_s, whole_peak = _measure(lambda: len(tracks_from_csv(load_csv(path))))
+
+		def first_track():
+			started = time.perf_counter()
+			stream = iter_csv_tracks(path)
+			next(stream)
+			first_s = time.perf_counter() - started
+			return first_s, 1 + sum(1 for _ in stream)
+
+		(first_s, _), stream_s, stream_peak = _measure(first_track)
+		print(f"load_csv + tracks_from_csv {whole_s * 1e3:8.1f} ms  peak {whole_peak / 1e6:7.1f} MB")
+		print(f"iter_csv_tracks            {stream_s * 1e3:8.1f} ms  peak {stream_peak / 1e6:7.1f} MB  first track after {first_s * 1e3:.1f} ms")
+		df = load_csv(path)
+	same = tracks_from_rows(df) == tracks_from_csv(df)
+	old_s = _time(lambda: tracks_from_rows(df), args.repeat)
+	new_s = _time(lambda: tracks_from_csv(df), args.repeat)
+	print(f"tracks_from_rows:  {old_s * 1e3:8.1f} ms  {old_s * 1e6 / args.rows:6.2f} us/row")
+	print(f"tracks_from_csv:   {new_s * 1e3:8.1f} ms  {new_s * 1e6 / args.rows:6.2f} us/row")
+	print(f"speedup: {old_s / max(new_s, 1e-9):.1f}x  identical output: {same}")
+	return 0 if same else 1
+
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
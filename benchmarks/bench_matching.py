@@ -0,0 +1,172 @@
+# tabs only
+"""
+Offline matching benchmark: replay recorded YouTube Music search responses.
+
+	python -m benchmarks.bench_matching [--mode find_best|batch] [--min-precision P]
+	python -m benchmarks.bench_matching --record   # refresh fixtures from the live API
+
+Reports tracks/sec, search calls per track, time spent scoring, and precision
+against the labeled ground-truth CSV (an empty expected id means "should skip").
+"""
+import argparse, contextlib, csv, gzip, json, pathlib, sys, time
+from typing import Dict, Iterator, List, Tuple
+
+from csvmusic.core import ytmusic_match
+from csvmusic.core.csv_import import load_csv, tracks_from_csv
+from csvmusic.core.ytmusic_match import CandidateScorer, _norm_text, batch_match, find_best
+from csvmusic.core.ytmusic_pool import YTMusicPool, set_default_ytmusic_pool
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+RESPONSES = FIXTURES / "search_responses.json.gz"
+GROUND_TRUTH = FIXTURES / "match_ground_truth.csv"
+EXPECTED_COLUMN = "Expected video id"
+
+
+def fixture_key(search_filter: str, query: str) -> str:
+	return f"{search_filter}\t{_norm_text(query)}"
+
+
+class RecordedYTMusic:
+	"""Stub YTMusic answering search() from recorded responses; unknown queries return []."""
+
+	def __init__(self, responses: Dict[str, List[Dict]]):
+		self.responses = responses
+		self.calls = 0
+		self.misses = 0
+
+	def search(self, query, filter=None, limit=20, **_kwargs):
+		self.calls += 1
+		found = self.responses.get(fixture_key(filter, query))
+		if found is None:
+			self.misses += 1
+			return []
+		return [dict(r) for r in found[:limit]]
+
+
+class RecordingYTMusic:
+	"""Wrap a live client and keep every raw search response for the fixture file."""
+
+	def __init__(self, client):
+		self.client = client
+		self.responses: Dict[str, List[Dict]] = {}
+
+	def search(self, query, filter=None, limit=20, **kwargs):
+		res = self.client.search(query, filter=filter, limit=limit, **kwargs) or []
+		self.responses[fixture_key(filter, query)] = res
+		return res
+
+
+def load_responses(path: pathlib.Path = RESPONSES) -> Dict[str, List[Dict]]:
+	with gzip.open(path, "rt", encoding="utf-8") as fh:
+		return json.load(fh)["responses"]
+
+
+def save_responses(responses: Dict[str, List[Dict]], path: pathlib.Path = RESPONSES) -> None:
+	with gzip.open(path, "wt", encoding="utf-8") as fh:
+		json.dump({"format": 1, "responses": responses}, fh, ensure_ascii=False, sort_keys=True)
+
+
+def load_ground_truth(path: pathlib.Path = GROUND_TRUTH) -> Tuple[List[Dict], List[str]]:
+	tracks = tracks_from_csv(load_csv(path))
+	with open(path, newline="", encoding="utf-8") as fh:
+		expected = [(row.get(EXPECTED_COLUMN) or "").strip() for row in csv.DictReader(fh)]
+	if len(expected) != len(tracks):
+		raise ValueError(f"{path.name}: {len(expected)} labels for {len(tracks)} tracks")
+	return tracks, expected
+
+
+@contextlib.contextmanager
+def _offline(client) -> Iterator[Dict[str, float]]:
+	"""Route every search to client, drop pacing sleeps, and time the scorer."""
+	timing = {"scoring_s": 0.0}
+	original_score_many = CandidateScorer.score_many
+
+	def timed_score_many(self, cands):
+		started = time.perf_counter()
+		try:
+			return original_score_many(self, cands)
+		finally:
+			timing["scoring_s"] += time.perf_counter() - started
+
+	saved = {name: getattr(ytmusic_match, name) for name in ("RATE_LIMIT_S", "SEARCH_RETRY_SLEEP_S")}
+	previous_pool = set_default_ytmusic_pool(YTMusicPool(lambda: client))
+	ytmusic_match.SEARCH_CACHE.clear()
+	CandidateScorer.score_many = timed_score_many
+	for name in saved:
+		# Replays have no server to back off from.
+		setattr(ytmusic_match, name, 0.0)
+	try:
+		yield timing
+	finally:
+		CandidateScorer.score_many = original_score_many
+		for name, value in saved.items():
+			setattr(ytmusic_match, name, value)
+		set_default_ytmusic_pool(previous_pool)
+		ytmusic_match.SEARCH_CACHE.clear()
+
+
+def run_benchmark(client, tracks: List[Dict], expected: List[str], *, mode: str = "find_best") -> Dict[str, float]:
+	with _offline(client) as timing:
+		started = time.perf_counter()
+		if mode == "batch":
+			matches = [r["match"] for r in batch_match(tracks)]
+		else:
+			matches = []
+			for track in tracks:
+				try:
+					match, _conf, _options = find_best(client, track)
+				except Exception:
+					match = None
+				matches.append(match)
+		elapsed = time.perf_counter() - started
+
+	matched = [(m["videoId"], want) for m, want in zip(matches, expected) if m]
+	correct = sum(1 for got, want in matched if got == want)
+	labeled = sum(1 for want in expected if want)
+	correct_skips = sum(1 for m, want in zip(matches, expected) if not m and not want)
+	count = max(1, len(tracks))
+	return {
+		"tracks": len(tracks),
+		"elapsed_s": elapsed,
+		"tracks_per_s": len(tracks) / max(elapsed, 1e-9),
+		"calls_per_track": getattr(client, "calls", 0) / count,
+		"scoring_ms_per_track": timing["scoring_s"] * 1000 / count,
+		"precision": correct / len(matched) if matched else 0.0,
+		"recall": correct / labeled if labeled else 0.0,
+		"correct_skips": correct_skips,
+		"unrecorded_queries": getattr(client, "misses", 0),
+	}
+
+
+def main(argv) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+	parser.add_argument("--mode", choices=("find_best", "batch"), default="find_best")
+	parser.add_argument("--responses", type=pathlib.Path, default=RESPONSES)
+	parser.add_argument("--truth", type=pathlib.Path, default=GROUND_TRUTH)
+	parser.add_argument("--min-precision", type=float, default=0.0)
+	parser.add_argument("--record", action="store_true", help="run against YouTube Music and rewrite --responses")
+	args = parser.parse_args(argv[1:])
+	tracks, expected = load_ground_truth(args.truth)
+
+	if args.record:
+		from ytmusicapi import YTMusic
+		recorder = RecordingYTMusic(YTMusic())
+		# Record the full plan so replays stay valid if the early-exit threshold moves.
+		with _offline(recorder):
+			for track in tracks:
+				find_best(recorder, track, early_exit_score=None)
+		save_responses(recorder.responses, args.responses)
+		print(f"recorded {len(recorder.responses)} responses to {args.responses}")
+		return 0
+
+	report = run_benchmark(RecordedYTMusic(load_responses(args.responses)), tracks, expected, mode=args.mode)
+	print(f"tracks: {report['tracks']}  mode: {args.mode}")
+	print(f"throughput: {report['tracks_per_s']:.1f} tracks/s  ({report['elapsed_s'] * 1000:.1f} ms total)")
+	print(f"search calls: {report['calls_per_track']:.2f} per track  (unrecorded: {report['unrecorded_queries']})")
+	print(f"scoring: {report['scoring_ms_per_track']:.3f} ms per track")
+	print(f"precision: {report['precision']:.3f}  recall: {report['recall']:.3f}  correct skips: {report['correct_skips']}")
+	return 1 if report["precision"] < args.min_precision else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
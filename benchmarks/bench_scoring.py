@@ -0,0 +1,63 @@
+# tabs only
+"""
+Micro-benchmark: a fresh CandidateScorer per candidate against the batch score_candidates.
+
+	python -m benchmarks.bench_scoring [--repeat N]
+
+Each corpus entry is one track with a 24 songs + 24 videos alternatives list.
+"""
+import argparse, gzip, json, pathlib, sys, time
+
+from csvmusic.core.ytmusic_match import CandidateScorer, score_candidates
+
+CORPUS = pathlib.Path(__file__).parent / "fixtures" / "scoring_corpus.json.gz"
+
+
+def load_corpus(path: pathlib.Path = CORPUS):
+	with gzip.open(path, "rt", encoding="utf-8") as fh:
+		return json.load(fh)
+
+
+def _time(fn, repeat: int) -> float:
+	best = float("inf")
+	for _ in range(repeat):
+		started = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - started)
+	return best
+
+
+def main(argv) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+	parser.add_argument("--repeat", type=int, default=20)
+	args = parser.parse_args(argv[1:])
+	corpus = load_corpus()
+	lists = len(corpus)
+	cands = sum(len(entry["candidates"]) for entry in corpus)
+
+	mismatches = 0
+	for entry in corpus:
+		expected = [CandidateScorer(entry["track"]).score(cand) for cand in entry["candidates"]]
+		if score_candidates(entry["track"], entry["candidates"]) != expected:
+			mismatches += 1
+
+	def per_candidate():
+		for entry in corpus:
+			for cand in entry["candidates"]:
+				CandidateScorer(entry["track"]).score(cand)
+
+	def batched():
+		for entry in corpus:
+			score_candidates(entry["track"], entry["candidates"])
+
+	old_s = _time(per_candidate, args.repeat)
+	new_s = _time(batched, args.repeat)
+	print(f"corpus: {lists} lists, {cands} candidates")
+	print(f"per candidate:    {old_s * 1e6 / lists:8.1f} us/list  {old_s * 1e6 / cands:6.2f} us/candidate")
+	print(f"score_candidates: {new_s * 1e6 / lists:8.1f} us/list  {new_s * 1e6 / cands:6.2f} us/candidate")
+	print(f"speedup: {old_s / max(new_s, 1e-9):.2f}x  mismatched lists: {mismatches}")
+	return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
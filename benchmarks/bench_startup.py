@@ -0,0 +1,101 @@
+# tabs only
+"""
+Startup benchmark: import time of the modules app.main loads and time to first paint.
+
+	python -m benchmarks.bench_startup [--repeat N]
+
+Import totals come from `python -X importtime`. "eager pandas" imports pandas
+first, as csv_import did at module load before it deferred the import; "lazy"
+is the current tree. Time to first paint runs app.main on the offscreen Qt
+platform and stops at the first paint event of the main window. "blocking"
+imports pandas and yt_dlp and runs the tool probes before the window is built,
+as app.main used to; "deferred" is the current tree.
+"""
+import argparse, os, subprocess, sys, time
+
+STARTUP_MODULES = ("csvmusic.app", "csvmusic.ui.main_window")
+VARIANTS = (
+	("eager pandas", ("pandas",) + STARTUP_MODULES),
+	("lazy", STARTUP_MODULES),
+)
+
+
+def import_times(modules) -> dict:
+	"""Cumulative microseconds per top-level import, plus whether pandas was loaded."""
+	script = "import sys\n" + "".join(f"import {name}\n" for name in modules) + "print('pandas' in sys.modules)"
+	env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+	result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, env=env, check=True)
+	cumulative = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "|" not in line:
+			continue
+		_, cum, name = (part.strip() for part in line[len("import time:"):].split("|"))
+		if name in modules and cum.isdigit():
+			cumulative[name] = int(cum)
+	return {"modules": cumulative, "pandas": result.stdout.strip() == "True"}
+
+
+FIRST_PAINT_SCRIPT = """
+import os, sys
+from PySide6.QtCore import QEvent, QObject
+from PySide6.QtWidgets import QApplication, QMainWindow
+import csvmusic.app as app
+
+class _FirstPaint(QObject):
+	def eventFilter(self, obj, event):
+		if event.type() == QEvent.Paint and obj.isWidgetType() and isinstance(obj.window(), QMainWindow):
+			print("painted", flush=True)
+			os._exit(0)
+		return False
+
+_FILTER = _FirstPaint()
+
+class _App(QApplication):
+	def __init__(self, argv):
+		super().__init__(argv)
+		self.installEventFilter(_FILTER)
+
+app.QApplication = _App
+if {blocking}:
+	import pandas, yt_dlp
+	from csvmusic.core.startup import run_startup_probes
+	run_startup_probes()
+app.main()
+"""
+
+
+def first_paint_seconds(blocking: bool) -> float:
+	"""Wall time from process launch to the main window's first paint event."""
+	env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+	started = time.perf_counter()
+	proc = subprocess.Popen([sys.executable, "-c", FIRST_PAINT_SCRIPT.format(blocking=blocking)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+	line = proc.stdout.readline()
+	elapsed = time.perf_counter() - started
+	proc.wait()
+	if line.strip() != "painted":
+		raise RuntimeError("main window never painted")
+	return elapsed
+
+
+def main(argv) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args(argv[1:])
+	best = {}
+	for label, modules in VARIANTS:
+		runs = [import_times(modules) for _ in range(args.repeat)]
+		fastest = min(runs, key=lambda run: sum(run["modules"].values()))
+		best[label] = sum(fastest["modules"].values())
+		detail = "  ".join(f"{name} {us / 1e3:.1f} ms" for name, us in fastest["modules"].items())
+		print(f"{label:12s} total {best[label] / 1e3:8.1f} ms  pandas loaded: {fastest['pandas']}  ({detail})")
+	print(f"saved: {(best['eager pandas'] - best['lazy']) / 1e3:.1f} ms per launch")
+	paint = {}
+	for label, blocking in (("blocking", True), ("deferred", False)):
+		paint[label] = min(first_paint_seconds(blocking) for _ in range(args.repeat))
+		print(f"first paint, {label:8s} {paint[label] * 1e3:8.1f} ms")
+	print(f"window shows {(paint['blocking'] - paint['deferred']) * 1e3:.1f} ms sooner")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -0,0 +1,87 @@
+# tabs only
+"""
+Micro-benchmark: the old two-pass MP3 tagging (EasyID3 save + ID3/APIC save) against write_tags.
+
+	python -m benchmarks.bench_tagging [--tracks N] [--audio-kb K]
+
+Each track is tagged once, then retagged with a slightly larger cover, the way
+a "retag playlist" run after a cover refresh does. A rewrite is a save that
+changed the file size, i.e. one that had to move the whole audio stream.
+"""
+import argparse, pathlib, sys, tempfile, time
+
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3, APIC, ID3NoHeaderError
+
+from csvmusic.core.tagging import write_tags
+
+
+def legacy_tag(path: pathlib.Path, meta: dict, cover: bytes, counter: dict) -> None:
+	try:
+		audio = EasyID3(path)
+	except ID3NoHeaderError:
+		audio = EasyID3()
+		_counted_save(counter, path, lambda: audio.save(path))
+		audio = EasyID3(path)
+	audio["title"] = meta["title"]
+	audio["artist"] = meta["artists"]
+	audio["album"] = meta["album"]
+	audio["tracknumber"] = str(meta["track_no"])
+	_counted_save(counter, path, audio.save)
+	id3 = ID3(path)
+	id3.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover))
+	_counted_save(counter, path, lambda: id3.save(v2_version=3))
+
+
+def unified_tag(path: pathlib.Path, meta: dict, cover: bytes, counter: dict) -> None:
+	_counted_save(counter, path, lambda: write_tags(path, meta, cover))
+
+
+def _counted_save(counter: dict, path: pathlib.Path, save) -> None:
+	before = path.stat().st_size
+	save()
+	counter["saves"] += 1
+	counter["rewrites"] += int(path.stat().st_size != before)
+
+
+def _run(tag, root: pathlib.Path, tracks: int, audio: bytes) -> dict:
+	counter = {"saves": 0, "rewrites": 0, "retag_rewrites": 0}
+	paths = []
+	for index in range(tracks):
+		path = root / f"{index:04d}.mp3"
+		path.write_bytes(audio)
+		paths.append(path)
+	started = time.perf_counter()
+	for index, path in enumerate(paths):
+		tag(path, {"title": f"Song {index}", "artists": "Artist", "album": "Album", "track_no": index + 1}, b"\xff" * 40_000, counter)
+	first_rewrites = counter["rewrites"]
+	for index, path in enumerate(paths):
+		tag(path, {"title": f"Song {index} (Remastered)", "artists": "Artist", "album": "Album", "track_no": index + 1}, b"\xff" * 48_000, counter)
+	counter["retag_rewrites"] = counter["rewrites"] - first_rewrites
+	counter["seconds"] = time.perf_counter() - started
+	return counter
+
+
+def main(argv) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+	parser.add_argument("--tracks", type=int, default=200)
+	parser.add_argument("--audio-kb", type=int, default=4096)
+	args = parser.parse_args(argv[1:])
+	audio = b"\xff\xfb" + b"\x00" * (args.audio_kb * 1024)
+	results = {}
+	for name, tag in (("legacy", legacy_tag), ("write_tags", unified_tag)):
+		with tempfile.TemporaryDirectory() as tmp:
+			results[name] = _run(tag, pathlib.Path(tmp), args.tracks, audio)
+	print(f"tracks: {args.tracks}, {args.audio_kb} KiB of audio each, tagged then retagged")
+	for name, r in results.items():
+		print(
+			f"{name:10s} saves/track {r['saves'] / args.tracks:4.1f}  rewrites/track {r['rewrites'] / args.tracks:4.1f}"
+			f"  retag rewrites/track {r['retag_rewrites'] / args.tracks:4.1f}  {r['seconds'] * 1e3 / args.tracks:7.2f} ms/track"
+		)
+	saved = results["legacy"]["rewrites"] - results["write_tags"]["rewrites"]
+	print(f"file rewrites saved per track: {saved / args.tracks:.1f}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv))
@@ -3,7 +3,7 @@ if __package__ in (None, ""):
 	import sys, pathlib
 	sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
 
-import builtins, sys, time, subprocess, datetime, pathlib
+import builtins, sys, time, datetime, pathlib
 
 # --- Hard block tkinter imports everywhere (some libs import it implicitly) ---
 _orig_import = builtins.__import__
@@ -30,31 +30,15 @@ from PySide6.QtWidgets import QApplication, QSplashScreen
 from PySide6.QtGui import QPixmap, QIcon
 from PySide6.QtCore import Qt
 from csvmusic.core.paths import (
-	ffmpeg_path,
 	splash_image_path,
 	app_icon_path,
 	resource_base,
 )
 from csvmusic.core.log import log
-from csvmusic.core.subprocess_env import subprocess_kwargs
 from csvmusic.version import APP_VERSION
 
 _WINDOWS = sys.platform.startswith("win")
 
-def probe_ffmpeg() -> None:
-	path = ffmpeg_path()
-	log(f"ffmpeg resolved to: {path}")
-	try:
-		subprocess.run(
-			[path, "-version"],
-			capture_output=True,
-			text=True,
-			timeout=2,
-			**subprocess_kwargs()
-		)
-	except Exception:
-		pass
-
 def show_qt_splash(app: QApplication) -> QSplashScreen | None:
 	img_candidates: list[pathlib.Path] = []
 	primary = splash_image_path()
@@ -103,12 +87,10 @@ def main() -> int:
 		log("Application icon missing; using default.")
 	qt_splash = show_qt_splash(app)
 
-	try:
-		probe_ffmpeg()
-	except Exception:
-		pass
-
+	# Tool probing and the update check start from MainWindow once it has painted.
 	from csvmusic.ui.main_window import MainWindow
+	from csvmusic.core.ytmusic_match import enable_search_disk_cache
+	enable_search_disk_cache()
 	w = MainWindow()
 	if icon_path:
 		w.setWindowIcon(QIcon(str(icon_path)))
@@ -0,0 +1,356 @@
+# tabs only
+import hashlib, os, pathlib, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from csvmusic.core.log import log
+from csvmusic.core.settings import cache_dir
+
+COVER_CACHE_DIR = "covers"
+THUMBNAIL_URL = "https://i.ytimg.com/vi/{vid}/{quality}.jpg"
+THUMBNAIL_QUALITIES = ("maxresdefault", "sddefault", "hqdefault", "mqdefault", "default")
+COVER_TIMEOUT_S = 12
+COVER_CACHE_MAX_FILES = 5000
+PROCESSED_MEMORY_BYTES = 32 * 1024 * 1024
+# YouTube answers some missing qualities with a tiny grey placeholder instead of a 404.
+_MIN_THUMBNAIL_BYTES = 1024
+_MEMORY_ENTRIES = 64
+# A miss may be a timeout or a 5xx as much as a missing image, so it is only remembered briefly.
+_MISS_TTL_S = 120.0
+
+
+class CoverArtService:
+	"""
+	Cover art for downloaded tracks. Importer-supplied cover_url wins; otherwise
+	the YouTube thumbnail ladder is probed with parallel HEAD requests and only
+	the best available quality is downloaded. Everything goes through one
+	keep-alive session, and results are cached on disk by videoId / URL so
+	retries, fallback candidates and re-runs do not hit the network again.
+	"""
+
+	def __init__(self, cache_path: pathlib.Path | str | None, *, session: requests.Session | None = None, thumbnail_url: str = THUMBNAIL_URL, max_files: int = COVER_CACHE_MAX_FILES, processed: "ProcessedCoverCache | None" = None):
+		self.cache_path = pathlib.Path(cache_path) if cache_path is not None else None
+		self.processed = processed
+		self.thumbnail_url = thumbnail_url
+		self.max_files = max(1, int(max_files))
+		self.session = session or _pooled_session(len(THUMBNAIL_QUALITIES))
+		self._probe_pool = ThreadPoolExecutor(max_workers=len(THUMBNAIL_QUALITIES), thread_name_prefix="csvmusic-cover")
+		self._lock = threading.Lock()
+		self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+		self._missed: "OrderedDict[str, float]" = OrderedDict()
+		self._inflight: Dict[str, threading.Event] = {}
+		self.hits = 0
+		self.misses = 0
+		self._puts = 0
+
+	def cover_for(self, track: Dict | None, video_id: str | None) -> Optional[bytes]:
+		url = (track or {}).get("cover_url")
+		if url:
+			cover = self.url_bytes(url)
+			if cover:
+				return cover
+		if not video_id:
+			return None
+		return self.thumbnail(video_id)
+
+	def thumbnail(self, video_id: str) -> Optional[bytes]:
+		return self._cached(f"yt-{_safe_key(video_id)}", lambda: self._fetch_thumbnail(video_id))
+
+	def url_bytes(self, url: str) -> Optional[bytes]:
+		return self._cached(f"url-{hashlib.sha1(url.encode('utf-8')).hexdigest()}", lambda: self._get(url))
+
+	def _cached(self, key: str, fetch) -> Optional[bytes]:
+		# Single-flight per key: a retry racing the first fetch waits for it instead of refetching.
+		while True:
+			with self._lock:
+				if key in self._memory:
+					self._memory.move_to_end(key)
+					self.hits += 1
+					return self._memory[key]
+				if self._missed.get(key, 0.0) > time.monotonic():
+					self.hits += 1
+					return None
+				event = self._inflight.get(key)
+				if event is None:
+					event = self._inflight[key] = threading.Event()
+					break
+			event.wait()
+		data: Optional[bytes] = None
+		try:
+			data = self._read_disk(key)
+			if data is not None:
+				with self._lock:
+					self.hits += 1
+			else:
+				with self._lock:
+					self.misses += 1
+				data = fetch()
+				if data:
+					self._write_disk(key, data)
+		finally:
+			with self._lock:
+				if data:
+					self._memory[key] = data
+					self._missed.pop(key, None)
+					while len(self._memory) > _MEMORY_ENTRIES:
+						self._memory.popitem(last=False)
+				else:
+					# Never written to disk; retried once _MISS_TTL_S has passed.
+					self._missed[key] = time.monotonic() + _MISS_TTL_S
+					self._missed.move_to_end(key)
+					while len(self._missed) > _MEMORY_ENTRIES:
+						self._missed.popitem(last=False)
+				self._inflight.pop(key).set()
+		return data
+
+	def _fetch_thumbnail(self, video_id: str) -> Optional[bytes]:
+		urls = [self.thumbnail_url.format(vid=video_id, quality=quality) for quality in THUMBNAIL_QUALITIES]
+		probes = list(self._probe_pool.map(self._probe, urls))
+		# Available first, best quality first; inconclusive probes are still worth a GET.
+		ordered = [url for url, ok in zip(urls, probes) if ok] + [url for url, ok in zip(urls, probes) if ok is None]
+		for url in ordered:
+			data = self._get(url)
+			if data and len(data) > _MIN_THUMBNAIL_BYTES:
+				squared = self.processed.square(data, 600) if self.processed is not None else square_cover(data)
+				return squared or data
+		return None
+
+	def _probe(self, url: str) -> bool | None:
+		"""HEAD one thumbnail: True available, False missing, None when HEAD could not tell."""
+		try:
+			resp = self.session.head(url, timeout=COVER_TIMEOUT_S, allow_redirects=True)
+		except Exception:
+			return None
+		if resp.status_code == 404:
+			return False
+		if resp.status_code != 200:
+			return None
+		length = resp.headers.get("Content-Length")
+		return length is None or not length.isdigit() or int(length) > _MIN_THUMBNAIL_BYTES
+
+	def _get(self, url: str) -> Optional[bytes]:
+		try:
+			resp = self.session.get(url, timeout=COVER_TIMEOUT_S)
+			if resp.status_code == 200 and resp.content:
+				return resp.content
+		except Exception as exc:
+			log(f"cover art fetch failed: url='{url}' error={exc}")
+		return None
+
+	def _disk_path(self, key: str) -> pathlib.Path | None:
+		if self.cache_path is None:
+			return None
+		return self.cache_path / f"{key}.img"
+
+	def _read_disk(self, key: str) -> Optional[bytes]:
+		path = self._disk_path(key)
+		if path is None:
+			return None
+		try:
+			return path.read_bytes() or None
+		except FileNotFoundError:
+			return None
+		except OSError as exc:
+			log(f"cover cache read failed: path='{path}' error={exc}")
+			return None
+
+	def _write_disk(self, key: str, data: bytes) -> None:
+		path = self._disk_path(key)
+		if path is None:
+			return
+		try:
+			path.parent.mkdir(parents=True, exist_ok=True)
+			tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+			tmp.write_bytes(data)
+			os.replace(tmp, path)
+		except OSError as exc:
+			log(f"cover cache write failed: path='{path}' error={exc}")
+			return
+		with self._lock:
+			self._puts += 1
+			prune = self._puts % 200 == 1
+		if prune:
+			self.prune()
+
+	def prune(self) -> None:
+		"""Drop the oldest cached covers beyond max_files."""
+		_prune_oldest(self.cache_path, ".img", self.max_files)
+
+	def close(self) -> None:
+		self._probe_pool.shutdown(wait=False)
+		self.session.close()
+
+
+class ProcessedCoverCache:
+	"""
+	Squared covers keyed by (sha256 of the source bytes, size). Hot entries stay
+	in memory up to max_memory_bytes and every result is spilled to disk, so a
+	shared album cover is decoded and re-encoded once per size, not per track.
+	An output is also registered under its own hash, which makes squaring an
+	already-squared cover a hit. Failures are remembered in memory only. The
+	spill directory keeps the newest max_files covers.
+	"""
+
+	def __init__(self, spill_path: pathlib.Path | str | None, *, process=None, max_memory_bytes: int = PROCESSED_MEMORY_BYTES, max_files: int = COVER_CACHE_MAX_FILES):
+		self.spill_path = pathlib.Path(spill_path) if spill_path is not None else None
+		self._process = process
+		self.max_memory_bytes = max(0, int(max_memory_bytes))
+		self.max_files = max(1, int(max_files))
+		self._puts = 0
+		self._lock = threading.Lock()
+		self._memory: "OrderedDict[tuple[str, int], Optional[bytes]]" = OrderedDict()
+		self._memory_bytes = 0
+		self._inflight: Dict[tuple[str, int], threading.Event] = {}
+		self.hits = 0
+		self.processed = 0
+
+	def square(self, cover_bytes: bytes, size: int) -> Optional[bytes]:
+		if not cover_bytes:
+			return None
+		key = (hashlib.sha256(cover_bytes).hexdigest(), int(size))
+		while True:
+			with self._lock:
+				if key in self._memory:
+					self._memory.move_to_end(key)
+					self.hits += 1
+					return self._memory[key]
+				event = self._inflight.get(key)
+				if event is None:
+					event = self._inflight[key] = threading.Event()
+					break
+			event.wait()
+		data: Optional[bytes] = None
+		try:
+			data = self._read_spill(key)
+			if data is not None:
+				with self._lock:
+					self.hits += 1
+			else:
+				data = self._square(cover_bytes, key[1])
+				with self._lock:
+					self.processed += 1
+				if data:
+					self._write_spill(key, data)
+		finally:
+			with self._lock:
+				self._remember(key, data)
+				if data:
+					self._remember((hashlib.sha256(data).hexdigest(), key[1]), data)
+				self._inflight.pop(key).set()
+		return data
+
+	def _square(self, cover_bytes: bytes, size: int) -> Optional[bytes]:
+		process = self._process
+		if process is None:
+			from csvmusic.core.downloader import _square_cover_art_bytes as process
+		return process(cover_bytes, size=size)
+
+	def _remember(self, key: tuple[str, int], data: Optional[bytes]) -> None:
+		previous = self._memory.pop(key, None)
+		self._memory_bytes -= len(previous or b"")
+		self._memory[key] = data
+		self._memory_bytes += len(data or b"")
+		while self._memory and self._memory_bytes > self.max_memory_bytes:
+			_, dropped = self._memory.popitem(last=False)
+			self._memory_bytes -= len(dropped or b"")
+
+	def _spill_file(self, key: tuple[str, int]) -> pathlib.Path | None:
+		if self.spill_path is None:
+			return None
+		return self.spill_path / f"sq-{key[0]}-{key[1]}.jpg"
+
+	def _read_spill(self, key: tuple[str, int]) -> Optional[bytes]:
+		path = self._spill_file(key)
+		if path is None:
+			return None
+		try:
+			return path.read_bytes() or None
+		except OSError:
+			return None
+
+	def _write_spill(self, key: tuple[str, int], data: bytes) -> None:
+		path = self._spill_file(key)
+		if path is None:
+			return
+		try:
+			path.parent.mkdir(parents=True, exist_ok=True)
+			tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+			tmp.write_bytes(data)
+			os.replace(tmp, path)
+		except OSError as exc:
+			log(f"processed cover spill failed: path='{path}' error={exc}")
+			return
+		with self._lock:
+			self._puts += 1
+			prune = self._puts % 200 == 1
+		if prune:
+			self.prune()
+
+	def prune(self) -> None:
+		"""Drop the oldest spilled covers beyond max_files."""
+		_prune_oldest(self.spill_path, ".jpg", self.max_files)
+
+
+def _pooled_session(pool_size: int) -> requests.Session:
+	session = requests.Session()
+	adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, pool_size * 2))
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	return session
+
+
+def _prune_oldest(directory: pathlib.Path | None, suffix: str, max_files: int) -> None:
+	if directory is None:
+		return
+	try:
+		entries = [entry for entry in os.scandir(directory) if entry.name.endswith(suffix)]
+	except OSError:
+		return
+	excess = len(entries) - max_files
+	if excess <= 0:
+		return
+	entries.sort(key=lambda entry: entry.stat().st_mtime)
+	for entry in entries[:excess]:
+		try:
+			os.unlink(entry.path)
+		except OSError:
+			pass
+
+
+def _safe_key(text: str) -> str:
+	return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in text)
+
+
+_DEFAULT_SERVICE: CoverArtService | None = None
+_DEFAULT_PROCESSED: ProcessedCoverCache | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cover_art_service() -> CoverArtService:
+	global _DEFAULT_SERVICE
+	with _DEFAULT_LOCK:
+		if _DEFAULT_SERVICE is None:
+			_DEFAULT_SERVICE = CoverArtService(cache_dir() / COVER_CACHE_DIR)
+		return _DEFAULT_SERVICE
+
+
+def track_cover_bytes(track: Dict | None, video_id: str | None) -> Optional[bytes]:
+	"""Best cover for a downloaded track: importer artwork, else the video's thumbnail."""
+	return default_cover_art_service().cover_for(track, video_id)
+
+
+def default_processed_covers() -> ProcessedCoverCache:
+	global _DEFAULT_PROCESSED
+	with _DEFAULT_LOCK:
+		if _DEFAULT_PROCESSED is None:
+			_DEFAULT_PROCESSED = ProcessedCoverCache(cache_dir() / COVER_CACHE_DIR / "processed")
+		return _DEFAULT_PROCESSED
+
+
+def square_cover(cover_bytes: bytes, size: int = 600) -> Optional[bytes]:
+	"""Square-cropped JPEG of cover_bytes at size, processed at most once per image and size."""
+	return default_processed_covers().square(cover_bytes, size)
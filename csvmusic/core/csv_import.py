@@ -1,7 +1,11 @@
 # tabs only
-import pathlib
-from typing import Union, List, Dict, Optional
-import pandas as pd
+import codecs, csv, pathlib
+from typing import TYPE_CHECKING, Iterator, Union, List, Dict, Optional
+
+# pandas is imported by the functions that parse a CSV, so starting the app or
+# downloading from a URL never pays for it.
+if TYPE_CHECKING:
+	import pandas as pd
 
 # Canonical column names we expect (case-insensitive matching supported)
 _CANON = {
@@ -28,51 +32,93 @@ _CANON = {
 # Minimum set required to build track entries. External IDs and ISRC are useful
 # hints when present, but downloads only need title/artist/playlist metadata.
 _REQUIRED = ["Track name", "Artist name", "Playlist name"]
+# Rows parsed per chunk by iter_csv_tracks.
+CSV_CHUNK_ROWS = 5000
 _OPTIONAL_TEXT = ["Album", "ISRC", "Spotify - id", "Release date"]
 
-def _read_csv_robust(path: pathlib.Path) -> pd.DataFrame:
+_SNIFF_BYTES = 64 * 1024
+_DELIMITERS = ",;\t|"
+# Columns that stay numeric; everything else is read as text.
+_NUMERIC = {"Duration (ms)", "Track number", "Disc number"}
+
+def _norm_header(s: str) -> str:
+	return "".join(ch for ch in s.strip().lower() if ch.isalnum() or ch.isspace()).replace("  ", " ")
+
+_CANON_BY_NORM = {_norm_header(k): v for k, v in _CANON.items()}
+
+def _sniff_csv(path: pathlib.Path) -> tuple[str, str, List[str]]:
 	"""
-	Try a few reasonable ways to read the CSV (handles BOM, comma/semicolon, fallback engine).
+	Read the first few KB once and return (encoding, delimiter, header names).
+	The delimiter is the one whose header split names the most known columns,
+	so a semicolon file is never mistaken for a one-column comma file.
 	"""
+	with path.open("rb") as fh:
+		raw = fh.read(_SNIFF_BYTES)
+	if raw.startswith(codecs.BOM_UTF8):
+		encoding = "utf-8-sig"
+	elif raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+		encoding = "utf-16"
+	else:
+		encoding = "utf-8"
+	try:
+		# Incremental decode: the sample may end in the middle of a character.
+		sample = codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+	except UnicodeDecodeError:
+		encoding = "cp1252"
+		try:
+			sample = raw.decode(encoding)
+		except UnicodeDecodeError:
+			encoding = "latin-1"
+			sample = raw.decode(encoding)
+	lines = sample.splitlines()
+	header_line = lines[0] if lines else ""
+	try:
+		fallback = csv.Sniffer().sniff("\n".join(lines[:20]), delimiters=_DELIMITERS).delimiter
+	except csv.Error:
+		fallback = ","
+	best = (fallback, next(csv.reader([header_line], delimiter=fallback), []))
+	best_known = sum(1 for name in best[1] if _norm_header(name) in _CANON_BY_NORM)
+	for delimiter in _DELIMITERS:
+		header = next(csv.reader([header_line], delimiter=delimiter), [])
+		known = sum(1 for name in header if _norm_header(name) in _CANON_BY_NORM)
+		if known > best_known:
+			best, best_known = (delimiter, header), known
+	return encoding, best[0], best[1]
+
+def _read_kwargs(path: pathlib.Path) -> Dict:
+	encoding, sep, header = _sniff_csv(path)
+	dtype = {name: str for name in header if _CANON_BY_NORM.get(_norm_header(name)) not in _NUMERIC}
+	return {"encoding": encoding, "sep": sep, "usecols": lambda name: _norm_header(str(name)) in _CANON_BY_NORM, "dtype": dtype}
+
+def _read_csv_robust(path: pathlib.Path) -> "pd.DataFrame":
+	"""
+	Sniff encoding and delimiter from the head of the file, then parse it once
+	with the C engine, keeping only columns we know. The python engine is the
+	fallback for files the C parser rejects.
+	"""
+	import pandas as pd
+	kwargs = _read_kwargs(path)
 	errs = []
-	for kwargs in (
-		{"encoding": None, "sep": ","},
-		{"encoding": "utf-8-sig", "sep": ","},
-		{"encoding": None, "sep": ";"},
-		{"encoding": "utf-8-sig", "sep": ";"},
-		{"encoding": "utf-8", "sep": ",", "engine": "python"},
-		{"encoding": "utf-8-sig", "sep": ",", "engine": "python"},
-	):
+	for engine in ("c", "python"):
 		try:
-			return pd.read_csv(path, **kwargs)
+			return pd.read_csv(path, engine=engine, **kwargs)
 		except Exception as e:
-			errs.append(f"{kwargs}: {e}")
-	raise ValueError("Failed to read CSV with multiple strategies:\n" + "\n".join(errs))
+			errs.append(f"{engine} engine: {e}")
+	raise ValueError(f"Failed to read CSV (encoding={kwargs['encoding']}, delimiter={kwargs['sep']!r}):\n" + "\n".join(errs))
 
-def _normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
+def _normalize_headers(df: "pd.DataFrame") -> "pd.DataFrame":
 	"""
-	Return a copy of df with standardized column names per _CANON.
+	Return df with standardized column names per _CANON (a renamed view, not a data copy).
 	Matches case-insensitively and tolerates minor spacing/punctuation differences.
 	"""
-	def norm(s: str) -> str:
-		return "".join(ch for ch in s.strip().lower() if ch.isalnum() or ch.isspace()).replace("  ", " ")
-	# Build reverse lookup from normalized header → canonical
-	reverse = {}
-	for k, v in _CANON.items():
-		reverse[norm(k)] = v
-
 	renames = {}
 	for col in df.columns:
-		key = norm(str(col))
-		if key in reverse:
-			renames[col] = reverse[key]
-	# apply
-	out = df.copy()
-	if renames:
-		out = out.rename(columns=renames)
-	return out
+		key = _norm_header(str(col))
+		if key in _CANON_BY_NORM:
+			renames[col] = _CANON_BY_NORM[key]
+	return df.rename(columns=renames) if renames else df
 
-def load_csv(path: Union[str, pathlib.Path]) -> pd.DataFrame:
+def load_csv(path: Union[str, pathlib.Path]) -> "pd.DataFrame":
 	"""
 	Load the CSV and normalize headers.
 	Raises FileNotFoundError or ValueError on problems.
@@ -80,14 +126,30 @@ def load_csv(path: Union[str, pathlib.Path]) -> pd.DataFrame:
 	p = pathlib.Path(path)
 	if not p.exists():
 		raise FileNotFoundError(str(p))
-	df = _read_csv_robust(p)
+	df = _prepare_frame(_read_csv_robust(p), p.stem)
+
+	_require_single_playlist(list_playlists(df))
+	return df
+
+
+def _require_single_playlist(playlists: List[str]) -> None:
+	if len(playlists) > 1:
+		raise ValueError(
+			f"CSV contains multiple playlists ({len(playlists)} found). "
+			"Export one playlist at a time from TuneMyMusic and try again."
+		)
+
+
+def _prepare_frame(df: "pd.DataFrame", default_playlist: str) -> "pd.DataFrame":
+	"""Canonical headers, playlist fallback and column types; shared by load_csv and iter_csv_tracks."""
+	import pandas as pd
 	df = _normalize_headers(df)
 	if "Playlist name" not in df.columns:
-		df["Playlist name"] = p.stem
+		df["Playlist name"] = default_playlist
 	else:
 		df["Playlist name"] = df["Playlist name"].fillna("").astype(str)
 		playlist_names = df["Playlist name"].str.strip()
-		df.loc[playlist_names == "", "Playlist name"] = p.stem
+		df.loc[playlist_names == "", "Playlist name"] = default_playlist
 
 	# Check required columns (we intentionally do NOT require "Type")
 	missing = [c for c in _REQUIRED if c not in df.columns]
@@ -110,37 +172,60 @@ def load_csv(path: Union[str, pathlib.Path]) -> pd.DataFrame:
 	for column in ("Track number", "Disc number"):
 		if column in df.columns:
 			df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype(int)
-
-	playlists = list_playlists(df)
-	if len(playlists) > 1:
-		raise ValueError(
-			f"CSV contains multiple playlists ({len(playlists)} found). "
-			"Export one playlist at a time from TuneMyMusic and try again."
-		)
-
 	return df
 
 
-def _spotify_track_id(value: object) -> str | None:
-	text = str(value or "").strip()
-	if not text or text.casefold() == "nan":
-		return None
-	if text.casefold().startswith("spotify:track:"):
-		return text.rsplit(":", 1)[-1] or None
-	return text
+def iter_csv_tracks(path: Union[str, pathlib.Path], playlist: Optional[str] = None, *, chunksize: int = CSV_CHUNK_ROWS) -> Iterator[Dict]:
+	"""
+	Same tracks as tracks_from_csv(load_csv(path), playlist), parsed chunksize
+	rows at a time and yielded as they are converted, so only one chunk is in
+	memory. A multi-playlist export raises ValueError when the chunk naming the
+	second playlist is reached; earlier tracks have been yielded by then.
+	"""
+	p = pathlib.Path(path)
+	if not p.exists():
+		raise FileNotFoundError(str(p))
+	seen: List[str] = []
+	position = 1
+	for chunk in _read_chunks(p, chunksize):
+		df = _prepare_frame(chunk, p.stem)
+		seen.extend(name for name in list_playlists(df) if name not in seen)
+		_require_single_playlist(seen)
+		tracks = _tracks_from_frame(df, playlist, position)
+		position += len(tracks)
+		yield from tracks
 
 
-def _release_year(value: object) -> int | None:
-	text = str(value or "").strip()
-	if not text or text.casefold() == "nan":
-		return None
-	try:
-		year = int(text[:4])
-	except (TypeError, ValueError):
-		return None
-	return year if 1000 <= year <= 9999 else None
+def _read_chunks(path: pathlib.Path, chunksize: int) -> Iterator["pd.DataFrame"]:
+	"""
+	Chunked counterpart of _read_csv_robust. When the C parser fails part way
+	through, the python engine reopens the file and resumes after the rows
+	already handed out.
+	"""
+	import pandas as pd
+	kwargs = _read_kwargs(path)
+	errs = []
+	sent = 0
+	for engine in ("c", "python"):
+		skip = sent
+		try:
+			with pd.read_csv(path, engine=engine, chunksize=chunksize, **kwargs) as reader:
+				for chunk in reader:
+					if skip:
+						dropped = min(skip, len(chunk))
+						skip -= dropped
+						chunk = chunk.iloc[dropped:]
+						if chunk.empty:
+							continue
+					sent += len(chunk)
+					yield chunk
+			return
+		except Exception as e:
+			errs.append(f"{engine} engine: {e}")
+	raise ValueError(f"Failed to read CSV (encoding={kwargs['encoding']}, delimiter={kwargs['sep']!r}):\n" + "\n".join(errs))
 
-def list_playlists(df: pd.DataFrame) -> List[str]:
+
+def list_playlists(df: "pd.DataFrame") -> List[str]:
 	"""
 	Return sorted unique playlist names (non-empty only).
 	"""
@@ -149,55 +234,73 @@ def list_playlists(df: pd.DataFrame) -> List[str]:
 	pls = df["Playlist name"].dropna().astype(str).map(str.strip)
 	return sorted([p for p in pls.unique().tolist() if p != ""])
 
-def _is_valid_track_row(row: pd.Series) -> bool:
-	"""
-	Heuristic: treat as a track if there's a non-empty Track name.
-	We do not rely on source-specific IDs or 'Type' because exports vary.
-	"""
-	title = str(row.get("Track name", "")).strip()
-	return len(title) > 0
+def _text_column(work: "pd.DataFrame", column: str) -> "pd.Series":
+	import pandas as pd
+	# Same text as str(value).strip() per cell: missing columns are "", missing cells "nan".
+	if column not in work.columns:
+		return pd.Series("", index=work.index, dtype=object)
+	return work[column].astype(str).fillna("nan").str.strip()
 
-def tracks_from_csv(df: pd.DataFrame, playlist: Optional[str] = None) -> List[Dict]:
+def _int_column(work: "pd.DataFrame", column: str) -> "pd.Series":
+	import pandas as pd
+	if column not in work.columns:
+		return pd.Series(0, index=work.index, dtype="int64")
+	numbers = pd.to_numeric(work[column], errors="coerce")
+	# NaN and values int64 cannot hold fail the comparison and become 0.
+	return numbers.where(numbers.abs() < 2 ** 62, 0).astype("int64")
+
+def _optional_text(values: "pd.Series", keep: "pd.Series") -> "pd.Series":
+	return values.astype(object).where(keep, None)
+
+def tracks_from_csv(df: "pd.DataFrame", playlist: Optional[str] = None) -> List[Dict]:
 	"""
 	Convert CSV rows to internal track dicts.
 	- Optional playlist filter (exact match).
 	- Ignores rows that don't look like tracks.
 	- Duration is 0 if not provided; downstream matchers can still score by title/artist.
+	Columns are converted with vectorized pandas ops and zipped into records in one pass.
 	"""
+	return _tracks_from_frame(df, playlist, 1)
+
+def _tracks_from_frame(df: "pd.DataFrame", playlist: Optional[str], first_position: int) -> List[Dict]:
+	import pandas as pd
 	work = df
 	if playlist:
 		work = work[work["Playlist name"] == playlist]
 
 	# Keep only plausible tracks
-	mask = work.apply(_is_valid_track_row, axis=1)
-	work = work[mask]
-
-	out: List[Dict] = []
-	for position, (_, r) in enumerate(work.iterrows(), start=1):
-		isrc = str(r.get("ISRC", "")).strip()
-		spid = _spotify_track_id(r.get("Spotify - id", ""))
-		# duration if present
-		if "Duration (ms)" in work.columns:
-			try:
-				dur_ms = int(r.get("Duration (ms)", 0)) if pd.notna(r.get("Duration (ms)")) else 0
-			except Exception:
-				dur_ms = 0
-		else:
-			dur_ms = 0
-
-		track_no = int(r.get("Track number", 0) or 0) if "Track number" in work.columns else 0
-		disc_no = int(r.get("Disc number", 0) or 0) if "Disc number" in work.columns else 0
-		out.append({
-			"title": str(r.get("Track name", "")).strip(),
-			"artists": str(r.get("Artist name", "")).strip(),
-			"album": str(r.get("Album", "")).strip(),
-			"playlist": str(r.get("Playlist name", "")).strip(),
-			"isrc": isrc if isrc and isrc.lower() != "nan" else None,
-			"sp_id": spid,
-			"duration_ms": dur_ms,
-			"year": _release_year(r.get("Release date", "")),
-			"cover_url": None,     # CSV doesn't include cover
-			"track_no": track_no or position,
-			"disc_no": disc_no or 1,
-		})
-	return out
+	title = _text_column(work, "Track name")
+	keep = title.str.len() > 0
+	work = work[keep]
+	if work.empty:
+		return []
+	title = title[keep]
+
+	isrc = _text_column(work, "ISRC")
+	spid = _text_column(work, "Spotify - id")
+	spid_folded = spid.str.casefold()
+	spid_prefixed = spid_folded.str.startswith("spotify:track:")
+	spid = spid.where(~spid_prefixed, spid.str.rsplit(":", n=1).str[-1])
+	release = _text_column(work, "Release date").str[:4]
+	year_ok = release.str.fullmatch(r"[1-9][0-9]{3}").fillna(False).astype(bool)
+	positions = pd.Series(range(first_position, first_position + len(work)), index=work.index, dtype="int64")
+	track_no = _int_column(work, "Track number")
+	disc_no = _int_column(work, "Disc number")
+
+	columns = {
+		"title": title,
+		"artists": _text_column(work, "Artist name"),
+		"album": _text_column(work, "Album"),
+		"playlist": _text_column(work, "Playlist name"),
+		"isrc": _optional_text(isrc, (isrc != "") & (isrc.str.lower() != "nan")),
+		"sp_id": _optional_text(spid, (spid != "") & (spid_folded != "nan")),
+		"duration_ms": _int_column(work, "Duration (ms)"),
+		"year": _optional_text(release.where(year_ok, "0").astype(int), year_ok),
+		"cover_url": [None] * len(work),     # CSV doesn't include cover
+		"track_no": track_no.where(track_no != 0, positions),
+		"disc_no": disc_no.where(disc_no != 0, 1),
+	}
+	# tolist() hands back native str/int/None, so zipping columns is one pass with no per-cell boxing.
+	keys = list(columns)
+	values = [column if isinstance(column, list) else column.tolist() for column in columns.values()]
+	return [dict(zip(keys, row)) for row in zip(*values)]
@@ -0,0 +1,161 @@
+# tabs only
+import os, pathlib, threading, time, unicodedata
+from typing import Dict, List, Optional, Set
+
+# A directory changed this soon after a scan may have changed within the same
+# mtime tick, so its next lookup rescans instead of trusting the mtime.
+_RACY_WINDOW_S = 2.0
+
+
+def name_key(name: str) -> str:
+	"""
+	Normalization- and case-insensitive form of a file name. NFC, NFD, NFKC
+	and NFKD spellings share one key, and so do names that differ only in
+	case, as on Windows and macOS volumes and in duplicate_output_rows.
+	"""
+	return unicodedata.normalize("NFKC", name).casefold()
+
+
+class DirectoryIndex:
+	"""
+	File names in one directory, read with a single os.scandir pass and keyed
+	by name_key so lookups ignore Unicode normalization and case. The
+	directory mtime is checked on every lookup; when something outside the
+	index (yt-dlp, another thread) changed the folder, it is rescanned, reusing
+	the keys of names it already knows. add()/discard() keep it current for
+	files the app writes or removes itself.
+	"""
+
+	def __init__(self, path: pathlib.Path | str):
+		self.path = pathlib.Path(path)
+		self._lock = threading.Lock()
+		self._names: Dict[str, str] = {}
+		self._by_key: Dict[str, Set[str]] = {}
+		self._mtime_ns: Optional[int] = None
+		self._scanned_at = 0.0
+		self.scans = 0
+
+	def _dir_mtime_ns(self) -> Optional[int]:
+		try:
+			return os.stat(self.path).st_mtime_ns
+		except OSError:
+			return None
+
+	def _refresh_locked(self) -> None:
+		mtime_ns = self._dir_mtime_ns()
+		racy = mtime_ns is not None and mtime_ns / 1e9 >= self._scanned_at - _RACY_WINDOW_S
+		if self.scans and mtime_ns == self._mtime_ns and not racy:
+			return
+		scanned_at = time.time()
+		names: Dict[str, str] = {}
+		if mtime_ns is not None:
+			try:
+				with os.scandir(self.path) as entries:
+					for entry in entries:
+						try:
+							if not entry.is_file():
+								continue
+						except OSError:
+							continue
+						names[entry.name] = self._names.get(entry.name) or name_key(entry.name)
+			except OSError:
+				names = {}
+		by_key: Dict[str, Set[str]] = {}
+		for name, key in names.items():
+			by_key.setdefault(key, set()).add(name)
+		self._names, self._by_key = names, by_key
+		self._mtime_ns = mtime_ns
+		self._scanned_at = scanned_at
+		self.scans += 1
+
+	def contains(self, name: str) -> bool:
+		with self._lock:
+			self._refresh_locked()
+			return name in self._names or name_key(name) in self._by_key
+
+	def find(self, name: str) -> Optional[pathlib.Path]:
+		"""On-disk path for name under any normalization, or None."""
+		with self._lock:
+			self._refresh_locked()
+			if name in self._names:
+				return self.path / name
+			found = self._by_key.get(name_key(name))
+			return self.path / sorted(found)[0] if found else None
+
+	def matching(self, base: str) -> List[pathlib.Path]:
+		"""Files named base.<anything>, newest first."""
+		prefix = name_key(base) + "."
+		with self._lock:
+			self._refresh_locked()
+			names = [name for key, group in self._by_key.items() if key.startswith(prefix) for name in group]
+		paths = []
+		for name in names:
+			path = self.path / name
+			try:
+				paths.append((path.stat().st_mtime, path))
+			except OSError:
+				continue
+		paths.sort(key=lambda item: item[0], reverse=True)
+		return [path for _, path in paths]
+
+	def add(self, name: str) -> None:
+		with self._lock:
+			if name in self._names:
+				return
+			key = self._names[name] = name_key(name)
+			self._by_key.setdefault(key, set()).add(name)
+
+	def discard(self, name: str) -> None:
+		with self._lock:
+			key = self._names.pop(name, None)
+			if key is None:
+				return
+			group = self._by_key.get(key)
+			if group is not None:
+				group.discard(name)
+				if not group:
+					del self._by_key[key]
+
+	def __len__(self) -> int:
+		with self._lock:
+			self._refresh_locked()
+			return len(self._names)
+
+
+_INDEXES: Dict[str, DirectoryIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def directory_index(path: pathlib.Path | str) -> DirectoryIndex:
+	"""Shared index for path, so planning, cleanup and download discovery scan a folder once."""
+	key = os.path.normcase(os.path.abspath(path))
+	with _INDEXES_LOCK:
+		index = _INDEXES.get(key)
+		if index is None:
+			index = _INDEXES[key] = DirectoryIndex(path)
+		return index
+
+
+def _loaded_index(path: pathlib.Path) -> Optional[DirectoryIndex]:
+	with _INDEXES_LOCK:
+		return _INDEXES.get(os.path.normcase(os.path.abspath(path.parent)))
+
+
+def note_written(path: pathlib.Path | str) -> None:
+	path = pathlib.Path(path)
+	index = _loaded_index(path)
+	if index is not None:
+		index.add(path.name)
+
+
+def note_removed(path: pathlib.Path | str) -> None:
+	path = pathlib.Path(path)
+	index = _loaded_index(path)
+	if index is not None:
+		index.discard(path.name)
+
+
+def file_exists(path: pathlib.Path | str) -> bool:
+	"""path.exists() for a file, answered from the shared index of its folder."""
+	path = pathlib.Path(path)
+	return directory_index(path.parent).contains(path.name)
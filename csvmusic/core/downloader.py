@@ -1,17 +1,17 @@
 # tabs only
-import os, pathlib, subprocess, requests, io, contextlib, json, base64, hashlib
+import atexit, math, os, pathlib, subprocess, requests, json, hashlib, threading, time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, Optional, List
 import re, unicodedata
-from mutagen.easyid3 import EasyID3
-from mutagen.id3 import ID3, APIC
-from mutagen.mp4 import MP4, MP4Cover
-from mutagen.oggopus import OggOpus
-from mutagen.flac import Picture
 from csvmusic.core.paths import ffmpeg_path, ytdlp_path, INTERNAL_YTDLP
+from csvmusic.core.cover_art import default_cover_art_service, square_cover
+from csvmusic.core.dir_index import directory_index, note_removed, note_written
 from csvmusic.core.log import log
+from csvmusic.core.loudness_cache import default_loudness_cache
 from csvmusic.core.js_runtime import ytdlp_js_runtime_args
 from csvmusic.core.subprocess_env import subprocess_kwargs
+from csvmusic.core.tagging import write_replaygain_tags, write_tags
 
 YTM_URL = "https://music.youtube.com/watch?v={vid}"
 YT_URL = "https://www.youtube.com/watch?v={vid}"
@@ -79,7 +79,15 @@ YOUTUBE_MITIGATION_AGGRESSIVE = YouTubeMitigationProfile(
 
 _TARGET_LOUDNESS_I = -16.0
 _TARGET_TRUE_PEAK_DB = -2.5
+# "static": measure, then bake a fixed gain into the encode (two decodes on a cache miss).
+# "replaygain": encode once with a passthrough meter and write ReplayGain tags instead.
+NORMALIZE_MODE_STATIC = "static"
+NORMALIZE_MODE_REPLAYGAIN = "replaygain"
+_REPLAYGAIN_REFERENCE_I = -18.0
+_EBUR128_FILTER = "ebur128=peak=true:framelog=verbose"
 _MAX_SAFE_NAME_LENGTH = 140
+# Stem suffix for raw yt-dlp output awaiting its encode.
+_DOWNLOAD_SUFFIX = ".tmp"
 
 def _run(cmd: list[str]) -> int:
 	proc = _run_capture(cmd)
@@ -98,27 +106,216 @@ def _run_capture(cmd: list[str]) -> subprocess.CompletedProcess[str]:
 		**subprocess_kwargs()
 	)
 
-def _run_ytdlp_module(args: list[str]) -> tuple[int, str, str]:
-	stdout_buf = io.StringIO()
-	stderr_buf = io.StringIO()
+def _run_stream_pipeline(ytdlp_cmd: list[str], ffmpeg_cmd: list[str]) -> tuple[int, str, int, str]:
+	"""
+	Run yt-dlp writing to stdout piped into ffmpeg reading stdin, so encoding
+	overlaps the transfer. Returns (yt-dlp rc, yt-dlp stderr, ffmpeg rc, ffmpeg stderr).
+	"""
+	ytdlp = subprocess.Popen(ytdlp_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **subprocess_kwargs())
 	try:
-		from yt_dlp import main as yt_dlp_main
-	except Exception as exc:
-		return 1, "", f"failed to import yt_dlp module: {exc}"
-	with contextlib.redirect_stdout(stdout_buf), contextlib.redirect_stderr(stderr_buf):
+		ffmpeg = subprocess.Popen(ffmpeg_cmd, stdin=ytdlp.stdout, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **subprocess_kwargs())
+	except Exception:
+		ytdlp.kill()
+		ytdlp.communicate()
+		raise
+	# Only ffmpeg holds the read end now, so yt-dlp sees a broken pipe if ffmpeg exits early.
+	ytdlp.stdout.close()
+	ytdlp_err: list[bytes] = []
+	reader = threading.Thread(target=lambda: ytdlp_err.append(ytdlp.stderr.read()), daemon=True)
+	reader.start()
+	_, ffmpeg_err = ffmpeg.communicate()
+	ytdlp_rc = ytdlp.wait()
+	reader.join()
+	ytdlp.stderr.close()
+	return (
+		ytdlp_rc, b"".join(ytdlp_err).decode("utf-8", errors="replace"),
+		ffmpeg.returncode, (ffmpeg_err or b"").decode("utf-8", errors="replace"),
+	)
+
+
+class _CaptureLogger:
+	"""yt-dlp logger that keeps one call's output apart from every other thread's."""
+
+	def __init__(self):
+		self.out: list[str] = []
+		self.err: list[str] = []
+
+	def debug(self, msg: str) -> None:
+		self.out.append(msg)
+
+	info = debug
+
+	def warning(self, msg: str) -> None:
+		self.err.append(f"WARNING: {msg}")
+
+	def error(self, msg: str) -> None:
+		self.err.append(msg)
+
+
+class _RoutedLogger:
+	"""The logger a YoutubeDL is built with; each call points target at its own _CaptureLogger."""
+
+	def __init__(self):
+		self.target: _CaptureLogger | None = None
+
+	def debug(self, msg: str) -> None:
+		if self.target is not None:
+			self.target.debug(msg)
+
+	info = debug
+
+	def warning(self, msg: str) -> None:
+		if self.target is not None:
+			self.target.warning(msg)
+
+	def error(self, msg: str) -> None:
+		if self.target is not None:
+			self.target.error(msg)
+
+
+def _engine_key(args: list[str], urls: list[str]) -> tuple[str, ...]:
+	"""Command line minus URLs: equal keys mean an interchangeable YoutubeDL."""
+	return tuple(tok for tok in args if tok not in urls)
+
+
+class YtdlpEngine:
+	"""
+	Long-lived in-process yt-dlp. Keeps the most recently used YoutubeDL
+	objects, keyed by their full command line (the output template included,
+	since yt-dlp only reads it when the object is built), so a retry with the
+	same arguments reuses extractor state, the player JS cache and loaded
+	cookies, and calls extract_info directly instead of re-running the CLI
+	entry point. Each object serves one call at a time; output is captured per
+	call through the logger it was built with rather than by redirecting
+	process-wide stdout/stderr.
+	"""
+
+	def __init__(self, *, ydl_factory=None, max_idle: int = 4):
+		self._ydl_factory = ydl_factory
+		self.max_idle = max(1, int(max_idle))
+		self._idle: "OrderedDict[tuple[str, ...], list]" = OrderedDict()
+		self._idle_count = 0
+		self._lock = threading.Lock()
+		self.calls = 0
+		self.created = 0
+		self.total_s = 0.0
+
+	def _build(self, ydl_opts: Dict):
+		factory = self._ydl_factory
+		if factory is None:
+			from yt_dlp import YoutubeDL as factory
+		with self._lock:
+			self.created += 1
+		return factory(dict(ydl_opts, logger=_RoutedLogger()))
+
+	def _checkout(self, key: tuple[str, ...], ydl_opts: Dict):
+		with self._lock:
+			idle = self._idle.get(key)
+			if idle:
+				self._idle_count -= 1
+				ydl = idle.pop()
+				if not idle:
+					del self._idle[key]
+				return ydl, True
+		return self._build(ydl_opts), False
+
+	def _checkin(self, key: tuple[str, ...], ydl) -> None:
+		evicted = []
+		with self._lock:
+			self._idle.setdefault(key, []).append(ydl)
+			self._idle.move_to_end(key)
+			self._idle_count += 1
+			while self._idle_count > self.max_idle:
+				oldest_key, oldest = next(iter(self._idle.items()))
+				evicted.append(oldest.pop(0))
+				self._idle_count -= 1
+				if not oldest:
+					del self._idle[oldest_key]
+		for old in evicted:
+			_close_ydl(old)
+
+	def run(self, args: list[str]) -> tuple[int, str, str]:
 		try:
-			rc = yt_dlp_main(args)
-		except SystemExit as exc:
-			code = exc.code
-			if isinstance(code, int):
-				rc = code
-			elif code is None:
-				rc = 0
-			else:
-				rc = 1
+			import yt_dlp
+		except Exception as exc:
+			return 1, "", f"failed to import yt_dlp module: {exc}"
+		try:
+			parsed = yt_dlp.parse_options(args)
+		except (SystemExit, Exception) as exc:
+			return 2, "", f"ERROR: yt-dlp rejected arguments: {exc}"
+		ydl_opts = dict(parsed.ydl_opts)
+		# Raise instead of folding download errors into a CLI exit code.
+		ydl_opts["ignoreerrors"] = False
+		ydl_opts["noprogress"] = True
+		ydl_opts["warn_when_outdated"] = False
+		key = _engine_key(args, parsed.urls)
+		ydl, reused = self._checkout(key, ydl_opts)
+		capture = _CaptureLogger()
+		router = ydl.params["logger"]
+		router.target = capture
+		started = time.monotonic()
+		rc = 0
+		healthy = True
+		try:
+			for url in parsed.urls:
+				ydl.extract_info(url, download=True)
+		except yt_dlp.utils.DownloadError as exc:
+			rc = 1
+			if not capture.err:
+				capture.err.append(str(exc))
 		except Exception as exc:
-			return 1, stdout_buf.getvalue(), f"{stderr_buf.getvalue()}\n{exc}".strip()
-	return int(rc or 0), stdout_buf.getvalue(), stderr_buf.getvalue()
+			rc = 1
+			healthy = False
+			capture.err.append(f"{type(exc).__name__}: {exc}")
+		finally:
+			router.target = None
+		elapsed = time.monotonic() - started
+		with self._lock:
+			self.calls += 1
+			self.total_s += elapsed
+		if healthy:
+			self._checkin(key, ydl)
+		else:
+			_close_ydl(ydl)
+		log(f"yt-dlp engine: rc={rc} reused={reused} elapsed_s={elapsed:.2f} urls={' '.join(parsed.urls)}")
+		return rc, "\n".join(capture.out), "\n".join(capture.err)
+
+	def stats(self) -> Dict[str, float]:
+		with self._lock:
+			return {"calls": self.calls, "created": self.created, "total_s": self.total_s}
+
+	def close(self) -> None:
+		with self._lock:
+			idle, self._idle = self._idle, OrderedDict()
+			self._idle_count = 0
+		for ydls in idle.values():
+			for ydl in ydls:
+				_close_ydl(ydl)
+
+
+def _close_ydl(ydl) -> None:
+	try:
+		# Writes back --cookies files the way the CLI does on exit.
+		ydl.close()
+	except Exception as exc:
+		log(f"yt-dlp engine: close failed: {exc}")
+
+
+_YTDLP_ENGINE: YtdlpEngine | None = None
+_YTDLP_ENGINE_LOCK = threading.Lock()
+
+
+def ytdlp_engine() -> YtdlpEngine:
+	global _YTDLP_ENGINE
+	with _YTDLP_ENGINE_LOCK:
+		if _YTDLP_ENGINE is None:
+			_YTDLP_ENGINE = YtdlpEngine()
+			atexit.register(_YTDLP_ENGINE.close)
+		return _YTDLP_ENGINE
+
+
+def _run_ytdlp_module(args: list[str]) -> tuple[int, str, str]:
+	return ytdlp_engine().run(args)
 
 def _summarize_tool_output(stderr: str, stdout: str, *, using_cookies: bool = False) -> str:
 	def _clean_lines(text: str) -> list[str]:
@@ -296,10 +493,13 @@ def _run_ytdlp_detail(cmd: list[str]) -> tuple[int, str]:
 	if cmd and cmd[0] == INTERNAL_YTDLP:
 		rc, stdout, stderr = _run_ytdlp_module(cmd[1:])
 	else:
+		started = time.monotonic()
 		proc = _run_capture(cmd)
 		rc = proc.returncode
 		stdout = proc.stdout or ""
 		stderr = proc.stderr or ""
+		# Same shape as the engine's line, so process startup cost shows up side by side.
+		log(f"yt-dlp process: rc={rc} elapsed_s={time.monotonic() - started:.2f} urls={cmd[-1]}")
 	if rc == 0:
 		return 0, ""
 	uses_cookies = _cmd_uses_cookies(cmd)
@@ -356,25 +556,15 @@ def _safe(name: str) -> str:
 	# Backward-compatible helper kept for internal use
 	return sanitize_name(name)
 
-def _filename_starts_with_base(filename: str, base: str) -> bool:
-	for form in ("NFC", "NFD", "NFKC", "NFKD"):
-		name_norm = unicodedata.normalize(form, filename)
-		base_norm = unicodedata.normalize(form, base)
-		if name_norm.startswith(base_norm + "."):
-			return True
-	return False
-
 def _list_downloads(dir: pathlib.Path, base: str) -> list[pathlib.Path]:
 	# Find files that start with our sanitized base, allowing Unicode normalization differences.
-	return sorted(
-		[p for p in dir.iterdir() if p.is_file() and _filename_starts_with_base(p.name, base)],
-		key=lambda x: x.stat().st_mtime, reverse=True
-	)
+	return directory_index(dir).matching(base)
 
 def _cleanup_outputs(dir: pathlib.Path, base: str) -> None:
 	for p in _list_downloads(dir, base):
 		try:
 			p.unlink()
+			note_removed(p)
 		except Exception:
 			pass
 
@@ -386,6 +576,8 @@ def _replace_file(src: pathlib.Path, dst: pathlib.Path) -> None:
 		except Exception:
 			pass
 	src.replace(dst)
+	note_removed(src)
+	note_written(dst)
 
 
 def _audio_processing_enabled(audio_processing: Dict | None) -> bool:
@@ -399,6 +591,25 @@ def _audio_processing_enabled(audio_processing: Dict | None) -> bool:
 	)
 
 
+def _normalize_mode(audio_processing: Dict | None) -> str | None:
+	if not audio_processing or not audio_processing.get("normalize"):
+		return None
+	if audio_processing.get("normalize_mode") == NORMALIZE_MODE_REPLAYGAIN:
+		return NORMALIZE_MODE_REPLAYGAIN
+	return NORMALIZE_MODE_STATIC
+
+
+def _needs_reencode(audio_processing: Dict | None) -> bool:
+	"""False when output samples would match the source (no processing, or ReplayGain tags only)."""
+	if not _audio_processing_enabled(audio_processing):
+		return False
+	return _normalize_mode(audio_processing) != NORMALIZE_MODE_REPLAYGAIN or bool(_tone_filter_chain(audio_processing)) or _volume_gain(audio_processing) != 0
+
+
+def _volume_gain(audio_processing: Dict | None) -> int:
+	return int(audio_processing.get("volume_gain", 0) or 0) if audio_processing else 0
+
+
 def _tone_filter_chain(audio_processing: Dict | None) -> list[str]:
 	filters: list[str] = []
 	bass_gain = int(audio_processing.get("bass_gain", 0) or 0) if audio_processing else 0
@@ -420,37 +631,88 @@ def _extract_loudnorm_json(stderr: str) -> Dict | None:
 		return None
 
 
-def _measure_static_normalize_gain(src: pathlib.Path, ffmpeg_bin: str, audio_processing: Dict | None) -> float:
-	pre_filters = _tone_filter_chain(audio_processing)
-	filter_parts = list(pre_filters)
+def _extract_ebur128_summary(stderr: str) -> Dict[str, float] | None:
+	"""Integrated loudness and true peak from the summary ebur128 prints when the graph closes."""
+	text = stderr or ""
+	at = text.rfind("Summary:")
+	if at < 0:
+		return None
+	summary = text[at:]
+	loudness = re.search(r"\bI:\s+(-?[\d.]+) LUFS", summary)
+	peak = re.search(r"True peak:\s+Peak:\s+(-?[\d.]+) dBFS", summary)
+	if not loudness or not peak:
+		return None
+	return {"input_i": float(loudness.group(1)), "input_tp": float(peak.group(1))}
+
+
+def _loudness_key(video_id: str, audio_processing: Dict | None) -> str:
+	# Tone filters run before measurement, so they are part of what was measured.
+	return f"{video_id}|{','.join(_tone_filter_chain(audio_processing)) or 'flat'}"
+
+
+def _valid_loudness(stats: Dict | None) -> Dict[str, float] | None:
+	try:
+		input_i = float(stats.get("input_i"))
+		input_tp = float(stats.get("input_tp"))
+	except Exception:
+		return None
+	# Digital silence measures as -inf; there is nothing to level.
+	if not (math.isfinite(input_i) and math.isfinite(input_tp)):
+		return None
+	return {"input_i": input_i, "input_tp": input_tp}
+
+
+def _cached_loudness(video_id: str | None, audio_processing: Dict | None) -> Dict[str, float] | None:
+	if not video_id:
+		return None
+	return default_loudness_cache().get(_loudness_key(video_id, audio_processing))
+
+
+def _store_loudness(video_id: str | None, audio_processing: Dict | None, loudness: Dict[str, float]) -> None:
+	if video_id:
+		default_loudness_cache().put(_loudness_key(video_id, audio_processing), loudness["input_i"], loudness["input_tp"])
+
+
+def _measure_loudness(src: pathlib.Path | None, ffmpeg_bin: str, audio_processing: Dict | None, video_id: str | None = None, runner=None) -> Dict[str, float] | None:
+	cached = _cached_loudness(video_id, audio_processing)
+	if cached is not None or src is None:
+		return cached
+	filter_parts = _tone_filter_chain(audio_processing)
 	filter_parts.append(f"loudnorm=I={_TARGET_LOUDNESS_I}:TP={_TARGET_TRUE_PEAK_DB}:LRA=11:print_format=json")
-	proc = _run_capture([
+	proc = (runner or _run_capture)([
 		ffmpeg_bin, "-hide_banner", "-i", str(src), "-vn", "-sn",
 		"-af", ",".join(filter_parts),
 		"-f", "null", "-"
 	])
-	stats = _extract_loudnorm_json((proc.stderr or "") + "\n" + (proc.stdout or ""))
-	if not stats:
-		return 0.0
-	try:
-		input_i = float(stats.get("input_i"))
-		input_tp = float(stats.get("input_tp"))
-	except Exception:
+	loudness = _valid_loudness(_extract_loudnorm_json((proc.stderr or "") + "\n" + (proc.stdout or "")))
+	if loudness is not None:
+		_store_loudness(video_id, audio_processing, loudness)
+	return loudness
+
+
+def _measure_static_normalize_gain(src: pathlib.Path | None, ffmpeg_bin: str, audio_processing: Dict | None, video_id: str | None = None, runner=None) -> float:
+	loudness = _measure_loudness(src, ffmpeg_bin, audio_processing, video_id, runner)
+	if loudness is None:
 		return 0.0
-	target_i = _TARGET_LOUDNESS_I
-	target_tp = _TARGET_TRUE_PEAK_DB
-	gain = target_i - input_i
-	peak_limited_gain = target_tp - input_tp
+	gain = _TARGET_LOUDNESS_I - loudness["input_i"]
+	peak_limited_gain = _TARGET_TRUE_PEAK_DB - loudness["input_tp"]
 	return min(gain, peak_limited_gain)
 
 
-def _audio_filter_chain(audio_processing: Dict | None, src: pathlib.Path | None = None, ffmpeg_bin: str | None = None) -> str | None:
+def _audio_filter_chain(audio_processing: Dict | None, src: pathlib.Path | None = None, ffmpeg_bin: str | None = None, *, video_id: str | None = None, measure_inline: bool = False, runner=None) -> str | None:
 	if not _audio_processing_enabled(audio_processing):
 		return None
 	filters = _tone_filter_chain(audio_processing)
-	total_gain = float(int(audio_processing.get("volume_gain", 0) or 0)) if audio_processing else 0.0
-	if audio_processing and audio_processing.get("normalize") and src and ffmpeg_bin:
-		total_gain += _measure_static_normalize_gain(src, ffmpeg_bin, audio_processing)
+	total_gain = float(_volume_gain(audio_processing))
+	mode = _normalize_mode(audio_processing)
+	if mode == NORMALIZE_MODE_REPLAYGAIN:
+		if measure_inline:
+			# Passthrough meter: measured in the same decode as the encode.
+			filters.append(_EBUR128_FILTER)
+		if not _needs_reencode(audio_processing):
+			return ",".join(filters) if filters else None
+	elif mode == NORMALIZE_MODE_STATIC and ffmpeg_bin and (src or _cached_loudness(video_id, audio_processing)):
+		total_gain += _measure_static_normalize_gain(src, ffmpeg_bin, audio_processing, video_id, runner)
 	if abs(total_gain) > 0.01:
 		filters.append(f"volume={total_gain:.2f}dB")
 	limit_linear = 10 ** (_TARGET_TRUE_PEAK_DB / 20.0)
@@ -458,62 +720,136 @@ def _audio_filter_chain(audio_processing: Dict | None, src: pathlib.Path | None
 	return ",".join(filters) if filters else None
 
 
-def _append_audio_filter(args: list[str], audio_processing: Dict | None, src: pathlib.Path | None = None, ffmpeg_bin: str | None = None) -> None:
-	filter_chain = _audio_filter_chain(audio_processing, src=src, ffmpeg_bin=ffmpeg_bin)
+def _append_audio_filter(args: list[str], audio_processing: Dict | None, src: pathlib.Path | None = None, ffmpeg_bin: str | None = None, *, video_id: str | None = None, runner=None) -> bool:
+	"""Add the -af chain; returns True when the chain meters loudness for ReplayGain tags."""
+	measure_inline = _normalize_mode(audio_processing) == NORMALIZE_MODE_REPLAYGAIN and _cached_loudness(video_id, audio_processing) is None
+	filter_chain = _audio_filter_chain(audio_processing, src=src, ffmpeg_bin=ffmpeg_bin, video_id=video_id, measure_inline=measure_inline, runner=runner)
 	if filter_chain:
 		args += ["-af", filter_chain]
+	return measure_inline
 
 
-def _normalize_to_m4a(src: pathlib.Path, dst: pathlib.Path, ffmpeg_bin: str, video_id: str, audio_processing: Dict | None = None) -> pathlib.Path:
-	tmp_dst = dst.with_name(dst.stem + ".normalized.m4a")
-	if tmp_dst.exists():
+def _replaygain_values(loudness: Dict[str, float], audio_processing: Dict | None) -> tuple[float, float]:
+	"""(track gain dB, linear track peak) for output made from audio measured as loudness."""
+	volume_gain = _volume_gain(audio_processing)
+	out_i = loudness["input_i"] + volume_gain
+	out_tp = loudness["input_tp"] + volume_gain
+	if _needs_reencode(audio_processing):
+		out_tp = min(out_tp, _TARGET_TRUE_PEAK_DB)
+	return _REPLAYGAIN_REFERENCE_I - out_i, 10 ** (out_tp / 20.0)
+
+
+def _replaygain_result(proc: subprocess.CompletedProcess[str], audio_processing: Dict | None, video_id: str | None, measured_inline: bool, name: str) -> tuple[float, float] | None:
+	"""ReplayGain values for an encode that just finished, for tag_file to write; None when not in ReplayGain mode."""
+	if _normalize_mode(audio_processing) != NORMALIZE_MODE_REPLAYGAIN:
+		return None
+	if measured_inline:
+		loudness = _valid_loudness(_extract_ebur128_summary((proc.stderr or "") + "\n" + (proc.stdout or "")))
+		if loudness is not None:
+			_store_loudness(video_id, audio_processing, loudness)
+	else:
+		loudness = _cached_loudness(video_id, audio_processing)
+	if loudness is None:
+		log(f"replaygain: no loudness measurement video_id={video_id} file='{name}'")
+		return None
+	return _replaygain_values(loudness, audio_processing)
+
+
+@dataclass
+class PendingEncode:
+	"""
+	ffmpeg work left once a download is on disk. Commands are built lazily
+	(static leveling measures the source first) and tried in order; the first
+	that produces out wins and is moved to dst. run() takes the process runner
+	so a TranscodeScheduler can own the ffmpeg processes. With stage=True the
+	output stays at out so the caller can tag it before commit() moves it to
+	dst; discard() removes whatever the encode left behind. In ReplayGain
+	mode run() leaves the values in replaygain for tag_file to write.
+	"""
+	video_id: str
+	src: pathlib.Path | None
+	dst: pathlib.Path
+	out: pathlib.Path
+	commands: list
+	audio_processing: Dict | None = None
+	failure: str = "ffmpeg failed"
+	replaygain: tuple[float, float] | None = None
+
+	def run(self, runner=None, *, stage: bool = False) -> pathlib.Path:
+		if not self.commands:
+			return self.out if stage else self.commit(self.out)
+		runner = runner or _run_capture
+		detail = ""
+		rc = 0
 		try:
-			tmp_dst.unlink()
-		except Exception:
-			pass
+			for build in self.commands:
+				if self.out.exists():
+					try: self.out.unlink()
+					except Exception: pass
+				cmd, measured_inline = build(runner)
+				proc = runner(cmd)
+				rc = proc.returncode
+				detail = _summarize_tool_output(proc.stderr or "", proc.stdout or "")
+				if rc == 0 and self.out.exists():
+					if self.src is not None and self.src != self.dst:
+						try: self.src.unlink()
+						except Exception: pass
+						note_removed(self.src)
+					self.replaygain = _replaygain_result(proc, self.audio_processing, self.video_id, measured_inline, self.dst.name)
+					return self.out if stage else self.commit(self.out)
+		except BaseException:
+			# Cancelled or crashed mid-encode: never leave a partial output or the raw download behind.
+			self.discard()
+			raise
+		self.discard()
+		log(f"encode failed video_id={self.video_id} dst='{self.dst.name}' rc={rc}")
+		raise DownloadError(f"{self.failure}: {detail}")
 
-	if not _audio_processing_enabled(audio_processing):
-		proc = _run_capture([ffmpeg_bin, "-y", "-i", str(src), "-vn", "-sn", "-c:a", "copy", str(tmp_dst)])
-		rc = proc.returncode
-		if rc == 0 and tmp_dst.exists():
-			if src != dst:
-				try: src.unlink()
-				except Exception: pass
-			_replace_file(tmp_dst, dst)
-			return dst
-
-	args = [ffmpeg_bin, "-y", "-i", str(src), "-vn", "-sn"]
-	_append_audio_filter(args, audio_processing, src=src, ffmpeg_bin=ffmpeg_bin)
-	args += ["-c:a", "aac", "-b:a", "192k", str(tmp_dst)]
-	proc = _run_capture(args)
-	rc = proc.returncode
-	detail = _summarize_tool_output(proc.stderr or "", proc.stdout or "")
-	if rc == 0 and tmp_dst.exists():
-		if src != dst:
-			try: src.unlink()
-			except Exception: pass
-		_replace_file(tmp_dst, dst)
-		return dst
+	def commit(self, staged: pathlib.Path) -> pathlib.Path:
+		if staged != self.dst:
+			_replace_file(staged, self.dst)
+		note_written(self.dst)
+		return self.dst
+
+	def discard(self) -> None:
+		for path in (self.out, self.src):
+			if path is None or path == self.dst:
+				continue
+			try:
+				if path.exists():
+					path.unlink()
+					note_removed(path)
+			except Exception:
+				pass
+
+
+def _m4a_encode(src: pathlib.Path, dst: pathlib.Path, ffmpeg_bin: str, video_id: str, audio_processing: Dict | None = None) -> PendingEncode:
+	tmp_dst = dst.with_name(dst.stem + ".normalized.m4a")
+	commands = []
+
+	if not _needs_reencode(audio_processing):
+		def _copy(_runner):
+			args = [ffmpeg_bin, "-y", "-i", str(src), "-vn", "-sn", "-c:a", "copy", str(tmp_dst)]
+			# ReplayGain on a stream copy: meter the decoded audio as a second output of the same run.
+			measured_inline = _normalize_mode(audio_processing) == NORMALIZE_MODE_REPLAYGAIN and _cached_loudness(video_id, audio_processing) is None
+			if measured_inline:
+				args += ["-vn", "-sn", "-af", _EBUR128_FILTER, "-f", "null", "-"]
+			return args, measured_inline
+		commands.append(_copy)
+
+	def _encode(runner):
+		args = [ffmpeg_bin, "-y", "-i", str(src), "-vn", "-sn"]
+		measured_inline = _append_audio_filter(args, audio_processing, src=src, ffmpeg_bin=ffmpeg_bin, video_id=video_id, runner=runner)
+		args += ["-c:a", "aac", "-b:a", "192k", str(tmp_dst)]
+		return args, measured_inline
+	commands.append(_encode)
+
+	return PendingEncode(video_id=video_id, src=src, dst=dst, out=tmp_dst, commands=commands, audio_processing=audio_processing, failure="failed to produce .m4a")
 
-	try:
-		if tmp_dst.exists():
-			tmp_dst.unlink()
-	except Exception:
-		pass
-	log(f"download_m4a: ffmpeg normalization failed video_id={video_id} src='{src.name}' dst='{dst.name}' rc={rc}")
-	raise DownloadError(f"failed to produce .m4a: {detail}")
 
 def yt_thumbnail_bytes(video_id: str) -> Optional[bytes]:
 	# Best-effort cover from YouTube thumbnails
-	for quality in ("maxresdefault","sddefault","hqdefault","mqdefault","default"):
-		url = f"https://i.ytimg.com/vi/{video_id}/{quality}.jpg"
-		try:
-			r = requests.get(url, timeout=12)
-			if r.status_code == 200 and r.content and len(r.content) > 1024:
-				return _square_cover_art_bytes(r.content) or r.content
-		except Exception:
-			pass
-	return None
+	return default_cover_art_service().thumbnail(video_id)
 
 def _square_cover_art_bytes(cover_bytes: bytes, *, size: int = 600) -> Optional[bytes]:
 	"""
@@ -573,58 +909,96 @@ def _square_cover_art_bytes(cover_bytes: bytes, *, size: int = 600) -> Optional[
 		log(f"cover art square normalization skipped: {exc}")
 	return None
 
-def tag_file(path: pathlib.Path, meta: Dict, cover_bytes: Optional[bytes], *, cover_size: int = 600) -> None:
+def tag_file(path: pathlib.Path, meta: Dict, cover_bytes: Optional[bytes], *, cover_size: int = 600, replaygain: tuple[float, float] | None = None) -> None:
 	if cover_bytes and cover_size > 0:
-		cover_bytes = _square_cover_art_bytes(cover_bytes, size=cover_size) or cover_bytes
+		cover_bytes = square_cover(cover_bytes, cover_size) or cover_bytes
 	elif cover_size <= 0:
 		cover_bytes = None
-	if path.suffix.lower() == ".mp3":
-		# ID3 (MP3)
-		try:
-			_ = EasyID3(path)
-		except Exception:
-			EasyID3.register_text_key("date", "TDRC")
-			audio = EasyID3(); audio.save(path)
-		audio = EasyID3(path)
-		audio["title"] = meta.get("title","")
-		audio["artist"] = meta.get("artists","")
-		audio["album"] = meta.get("album","")
-		if meta.get("year"): audio["date"] = str(meta["year"])
-		if meta.get("track_no"): audio["tracknumber"] = str(meta["track_no"])
-		if meta.get("disc_no"): audio["discnumber"] = str(meta["disc_no"])
-		audio.save()
-		id3 = ID3(path)
-		if cover_bytes:
-			id3.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover_bytes))
-			id3.save(v2_version=3)
-	elif path.suffix.lower() in (".opus", ".ogg"):
-		opus = OggOpus(path)
-		opus["title"] = [meta.get("title", "")]
-		opus["artist"] = [meta.get("artists", "")]
-		opus["album"] = [meta.get("album", "")]
-		if meta.get("year"): opus["date"] = [str(meta["year"])]
-		if meta.get("track_no"): opus["tracknumber"] = [str(meta["track_no"])]
-		if meta.get("disc_no"): opus["discnumber"] = [str(meta["disc_no"])]
-		if cover_bytes:
-			picture = Picture()
-			picture.type = 3
-			picture.mime = "image/jpeg"
-			picture.desc = "Cover"
-			picture.data = cover_bytes
-			opus["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
-		opus.save()
-	else:
-		# MP4/M4A
-		mp4 = MP4(path)
-		mp4["\xa9nam"] = meta.get("title","")
-		mp4["\xa9ART"] = [meta.get("artists","")]
-		mp4["\xa9alb"] = [meta.get("album","")]
-		if meta.get("year"): mp4["\xa9day"] = [str(meta["year"])]
-		if meta.get("track_no"): mp4["trkn"] = [(int(meta["track_no"]), 0)]
-		if meta.get("disc_no"): mp4["disk"] = [(int(meta["disc_no"]), 0)]
-		if cover_bytes:
-			mp4["covr"] = [MP4Cover(cover_bytes, imageformat=MP4Cover.FORMAT_JPEG)]
-		mp4.save()
+	write_tags(path, meta, cover_bytes, replaygain=replaygain)
+
+
+@dataclass
+class _ClientStats:
+	attempts: int = 0
+	successes: int = 0
+	failure_streak: int = 0
+	ewma_s: float = 0.0
+
+
+class ClientSelector:
+	"""
+	Order YouTube player clients by how they have done this session, so a
+	client that is broken for everyone stops costing a failed attempt per
+	track. Clients that fail demote_after times in a row drop to the end;
+	every reprobe_every orderings one of them is tried first again.
+	"""
+
+	def __init__(self, clients: list[str | None], *, demote_after: int = 2, reprobe_every: int = 25):
+		self.clients = list(clients)
+		self.demote_after = max(1, int(demote_after))
+		self.reprobe_every = max(1, int(reprobe_every))
+		self._stats: Dict[str | None, _ClientStats] = {c: _ClientStats() for c in self.clients}
+		self._orders = 0
+		self._lock = threading.Lock()
+
+	def _demoted(self, client: str | None) -> bool:
+		return self._stats[client].failure_streak >= self.demote_after
+
+	def order(self) -> list[str | None]:
+		with self._lock:
+			self._orders += 1
+			def rank(item: tuple[int, str | None]):
+				index, client = item
+				st = self._stats[client]
+				# Laplace-smoothed success rate in coarse steps, so latency only breaks near-ties.
+				rate = round((st.successes + 1) / (st.attempts + 2), 1)
+				return (self._demoted(client), -rate, st.ewma_s if st.successes else 0.0, index)
+			ordered = [client for _, client in sorted(enumerate(self.clients), key=rank)]
+			demoted = [client for client in ordered if self._demoted(client)]
+			if demoted and self._orders % self.reprobe_every == 0:
+				probe = demoted[(self._orders // self.reprobe_every) % len(demoted)]
+				ordered.remove(probe)
+				ordered.insert(0, probe)
+			return ordered
+
+	def record(self, client: str | None, ok: bool, elapsed_s: float) -> None:
+		with self._lock:
+			st = self._stats.setdefault(client, _ClientStats())
+			st.attempts += 1
+			if ok:
+				st.successes += 1
+				st.failure_streak = 0
+				st.ewma_s = elapsed_s if st.successes == 1 else st.ewma_s * 0.7 + elapsed_s * 0.3
+			else:
+				st.failure_streak += 1
+
+	def stats(self) -> Dict[str, Dict]:
+		with self._lock:
+			return {str(client): vars(st).copy() for client, st in self._stats.items()}
+
+	def reset(self) -> None:
+		with self._lock:
+			self._stats = {c: _ClientStats() for c in self.clients}
+			self._orders = 0
+
+
+# Shared by every download function and worker in the process.
+CLIENT_SELECTOR = ClientSelector(YOUTUBE_CLIENTS)
+
+
+def _try_clients(urls: list[str], attempt, *, record: bool = True) -> tuple[bool, str]:
+	"""Run attempt(client, url) over urls x the session's client order until one returns rc 0."""
+	last_detail = "no yt-dlp attempts recorded"
+	for url in urls:
+		for client in CLIENT_SELECTOR.order():
+			started = time.monotonic()
+			rc, detail = attempt(client, url)
+			if record:
+				CLIENT_SELECTOR.record(client, rc == 0, time.monotonic() - started)
+			if rc == 0:
+				return True, ""
+			last_detail = detail
+	return False, last_detail
 
 
 def _extractor_args(client: str | None) -> list[str]:
@@ -634,17 +1008,35 @@ def _extractor_args(client: str | None) -> list[str]:
 
 
 def download_m4a(video_id: str, dst_dir: pathlib.Path, base_name: str, *, yt_dlp_bin: str | None = None, ffmpeg_bin: str | None = None, extra_yt_dlp_args: List[str] | None = None, audio_processing: Dict | None = None) -> pathlib.Path:
+	return _run_untagged(fetch_m4a(video_id, dst_dir, base_name, yt_dlp_bin=yt_dlp_bin, ffmpeg_bin=ffmpeg_bin, extra_yt_dlp_args=extra_yt_dlp_args, audio_processing=audio_processing))
+
+
+def _run_untagged(pending: PendingEncode) -> pathlib.Path:
+	"""Finish an encode for a caller with no tagging step; callers that tag pass pending.replaygain to tag_file instead."""
+	path = pending.run()
+	if pending.replaygain is not None:
+		try:
+			write_replaygain_tags(path, pending.replaygain)
+		except Exception as exc:
+			log(f"replaygain: tag write failed video_id={pending.video_id} file='{path.name}' error={exc}")
+	return path
+
+
+def fetch_m4a(video_id: str, dst_dir: pathlib.Path, base_name: str, *, yt_dlp_bin: str | None = None, ffmpeg_bin: str | None = None, extra_yt_dlp_args: List[str] | None = None, audio_processing: Dict | None = None) -> PendingEncode:
 	"""
 	YT Music only. Save using a sanitized stem so our search matches what yt-dlp writes.
 	- If output is already .m4a → done.
 	- Else try remux to .m4a (stream copy).
 	- Else transcode to AAC .m4a.
+	The remux/transcode is returned as a PendingEncode rather than run here.
 	"""
 	dst_dir.mkdir(parents=True, exist_ok=True)
 	safe_base = _safe(base_name)
 
-	# Force yt-dlp to use our sanitized basename
-	out_tpl = str(dst_dir / (safe_base + ".%(ext)s"))
+	# Force yt-dlp to use our sanitized basename; the download keeps a temp stem
+	# so nothing appears at the final .m4a path until the encode has finished.
+	download_base = safe_base + _DOWNLOAD_SUFFIX
+	out_tpl = str(dst_dir / (download_base + ".%(ext)s"))
 	_cleanup_outputs(dst_dir, safe_base)
 	# Resolve yt-dlp automatically if not provided
 	yt_bin = yt_dlp_bin or ytdlp_path()
@@ -669,54 +1061,45 @@ def download_m4a(video_id: str, dst_dir: pathlib.Path, base_name: str, *, yt_dlp
 		"--fragment-retries", "5",
 		"--socket-timeout", "30",
 	]
-	success = False
-	last_detail = "no yt-dlp attempts recorded"
-	for base_url in (YTM_URL.format(vid=video_id), YT_URL.format(vid=video_id)):
-		for client in YOUTUBE_CLIENTS:
-			extractor_args = _extractor_args(client)
-			cmd_primary = primary_base + extractor_args + js_runtime_args + cookies_args + ["-o", out_tpl, base_url]
-			rc, detail = _run_ytdlp_detail(cmd_primary)
-			if rc == 0:
-				success = True
-				log(f"download_m4a: primary succeeded video_id={video_id} client={client} url={base_url}")
-				break
-			last_detail = detail
-			log(f"download_m4a: primary failed video_id={video_id} client={client} url={base_url}")
-			cmd_fallback = fallback_base + extractor_args + js_runtime_args + cookies_args + ["-o", out_tpl, base_url]
-			rc, detail = _run_ytdlp_detail(cmd_fallback)
-			if rc == 0:
-				success = True
-				log(f"download_m4a: fallback succeeded video_id={video_id} client={client} url={base_url}")
-				break
-			last_detail = detail
+	def _attempt(client: str | None, base_url: str) -> tuple[int, str]:
+		extractor_args = _extractor_args(client)
+		cmd_primary = primary_base + extractor_args + js_runtime_args + cookies_args + ["-o", out_tpl, base_url]
+		rc, detail = _run_ytdlp_detail(cmd_primary)
+		if rc == 0:
+			log(f"download_m4a: primary succeeded video_id={video_id} client={client} url={base_url}")
+			return rc, detail
+		log(f"download_m4a: primary failed video_id={video_id} client={client} url={base_url}")
+		cmd_fallback = fallback_base + extractor_args + js_runtime_args + cookies_args + ["-o", out_tpl, base_url]
+		rc, detail = _run_ytdlp_detail(cmd_fallback)
+		if rc == 0:
+			log(f"download_m4a: fallback succeeded video_id={video_id} client={client} url={base_url}")
+		else:
 			log(f"download_m4a: fallback failed video_id={video_id} client={client} url={base_url}")
-		if success:
-			break
+		return rc, detail
+
+	def _attempt_search(client: str | None, search_url: str) -> tuple[int, str]:
+		cmd_search = primary_base + _extractor_args(client) + js_runtime_args + cookies_args + ["-o", out_tpl, search_url]
+		rc, detail = _run_ytdlp_detail(cmd_search)
+		state = "succeeded" if rc == 0 else "failed"
+		log(f"download_m4a: search fallback {state} query='{base_name}' client={client}")
+		return rc, detail
+
+	success, last_detail = _try_clients([YTM_URL.format(vid=video_id), YT_URL.format(vid=video_id)], _attempt)
 	if not success:
-		search_url = f"ytsearch1:{base_name}"
-		for client in YOUTUBE_CLIENTS:
-			extractor_args = _extractor_args(client)
-			cmd_search = primary_base + extractor_args + js_runtime_args + cookies_args + ["-o", out_tpl, search_url]
-			rc, detail = _run_ytdlp_detail(cmd_search)
-			if rc == 0:
-				success = True
-				log(f"download_m4a: search fallback succeeded query='{base_name}' client={client}")
-				break
-			last_detail = detail
-			log(f"download_m4a: search fallback failed query='{base_name}' client={client}")
+		success, last_detail = _try_clients([f"ytsearch1:{base_name}"], _attempt_search, record=False)
 	if not success:
 		log(f"download_m4a: all extractor clients failed video_id={video_id} base='{base_name}'")
 		raise DownloadError(f"yt-dlp failed for m4a: {last_detail}")
 
 	# What got written?
-	cands = _list_downloads(dst_dir, safe_base)
+	cands = _list_downloads(dst_dir, download_base)
 	if not cands:
 		raise DownloadError("downloaded file not found")
 
 	src = cands[0]
 	dst = dst_dir / (safe_base + ".m4a")
 	ffmpeg_bin = ffmpeg_bin or ffmpeg_path()
-	return _normalize_to_m4a(src, dst, ffmpeg_bin, video_id, audio_processing)
+	return _m4a_encode(src, dst, ffmpeg_bin, video_id, audio_processing)
 
 def download_opus(video_id: str, dst_dir: pathlib.Path, base_name: str, *, yt_dlp_bin: str | None = None, ffmpeg_bin: str | None = None, extra_yt_dlp_args: List[str] | None = None) -> pathlib.Path:
 	"""Download native Opus audio and remux it into an Ogg Opus container without re-encoding."""
@@ -736,19 +1119,14 @@ def download_opus(video_id: str, dst_dir: pathlib.Path, base_name: str, *, yt_dl
 		"--fragment-retries", "5",
 		"--socket-timeout", "30",
 	]
-	success = False
-	last_detail = "no yt-dlp attempts recorded"
-	for base_url in (YTM_URL.format(vid=video_id), YT_URL.format(vid=video_id)):
-		for client in YOUTUBE_CLIENTS:
-			cmd = cmd_base + _extractor_args(client) + js_runtime_args + cookies_args + ["-o", out_tpl, base_url]
-			rc, detail = _run_ytdlp_detail(cmd)
-			if rc == 0:
-				success = True
-				log(f"download_opus: yt-dlp succeeded video_id={video_id} client={client} url={base_url}")
-				break
-			last_detail = detail
-		if success:
-			break
+	def _attempt(client: str | None, base_url: str) -> tuple[int, str]:
+		cmd = cmd_base + _extractor_args(client) + js_runtime_args + cookies_args + ["-o", out_tpl, base_url]
+		rc, detail = _run_ytdlp_detail(cmd)
+		if rc == 0:
+			log(f"download_opus: yt-dlp succeeded video_id={video_id} client={client} url={base_url}")
+		return rc, detail
+
+	success, last_detail = _try_clients([YTM_URL.format(vid=video_id), YT_URL.format(vid=video_id)], _attempt)
 	if not success:
 		raise DownloadError(f"yt-dlp failed for opus: {last_detail}")
 	candidates = _list_downloads(dst_dir, safe_base)
@@ -769,15 +1147,47 @@ def download_opus(video_id: str, dst_dir: pathlib.Path, base_name: str, *, yt_dl
 		pass
 	return dst
 
-def download_mp3(video_id: str, dst_dir: pathlib.Path, base_name: str, cbr_320: bool = False, *, yt_dlp_bin: str | None = None, ffmpeg_bin: str | None = None, extra_yt_dlp_args: List[str] | None = None, audio_processing: Dict | None = None, mp3_quality: int = 0, cbr_bitrate_kbps: int | None = None) -> pathlib.Path:
+def _mp3_codec_args(cbr_320: bool, mp3_quality: int, cbr_bitrate_kbps: int | None) -> list[str]:
+	if cbr_bitrate_kbps is not None:
+		return ["-codec:a","libmp3lame","-b:a", f"{max(96, int(cbr_bitrate_kbps))}k"]
+	if cbr_320:
+		return ["-codec:a","libmp3lame","-b:a","320k"]
+	return ["-codec:a","libmp3lame","-q:a", str(max(0, min(10, int(mp3_quality))))]
+
+
+def _can_stream_encode(yt_bin: str, audio_processing: Dict | None, video_id: str) -> bool:
+	# The in-process engine has no stdout of its own to hand to ffmpeg.
+	if yt_bin == INTERNAL_YTDLP:
+		return False
+	# Static leveling needs the whole file measured before encoding starts.
+	return _normalize_mode(audio_processing) != NORMALIZE_MODE_STATIC or _cached_loudness(video_id, audio_processing) is not None
+
+
+def download_mp3(video_id: str, dst_dir: pathlib.Path, base_name: str, cbr_320: bool = False, *, yt_dlp_bin: str | None = None, ffmpeg_bin: str | None = None, extra_yt_dlp_args: List[str] | None = None, audio_processing: Dict | None = None, mp3_quality: int = 0, cbr_bitrate_kbps: int | None = None, stream_encode: bool = True) -> pathlib.Path:
+	return _run_untagged(fetch_mp3(
+		video_id, dst_dir, base_name, cbr_320, yt_dlp_bin=yt_dlp_bin, ffmpeg_bin=ffmpeg_bin, extra_yt_dlp_args=extra_yt_dlp_args,
+		audio_processing=audio_processing, mp3_quality=mp3_quality, cbr_bitrate_kbps=cbr_bitrate_kbps, stream_encode=stream_encode,
+	))
+
+
+def fetch_mp3(video_id: str, dst_dir: pathlib.Path, base_name: str, cbr_320: bool = False, *, yt_dlp_bin: str | None = None, ffmpeg_bin: str | None = None, extra_yt_dlp_args: List[str] | None = None, audio_processing: Dict | None = None, mp3_quality: int = 0, cbr_bitrate_kbps: int | None = None, stream_encode: bool = True) -> PendingEncode:
+	"""
+	Fetch bestaudio for an .mp3. With stream_encode (and an external yt-dlp)
+	the download is piped straight into ffmpeg and comes back already encoded;
+	if that pipe fails the track is fetched again to a .tmp file and the
+	encode is returned as a PendingEncode.
+	"""
 	dst_dir.mkdir(parents=True, exist_ok=True)
 	safe_base = _safe(base_name)
-	tmp = dst_dir / (safe_base + ".tmp")
+	tmp = dst_dir / (safe_base + _DOWNLOAD_SUFFIX)
 	if tmp.exists():
 		try: tmp.unlink()
 		except Exception: pass
 	_cleanup_outputs(dst_dir, safe_base)
 	yt_bin = yt_dlp_bin or ytdlp_path()
+	ffmpeg_bin = ffmpeg_bin or ffmpeg_path()
+	dst = dst_dir / (safe_base + ".mp3")
+	codec_args = _mp3_codec_args(cbr_320, mp3_quality, cbr_bitrate_kbps)
 	cookies_args: list[str] = list(extra_yt_dlp_args or [])
 	js_runtime_args = ytdlp_js_runtime_args(yt_bin)
 	cmd_base = [
@@ -789,33 +1199,50 @@ def download_mp3(video_id: str, dst_dir: pathlib.Path, base_name: str, cbr_320:
 		"--fragment-retries", "5",
 		"--socket-timeout", "30",
 	]
-	success = False
-	last_detail = "no yt-dlp attempts recorded"
-	for base_url in (YTM_URL.format(vid=video_id), YT_URL.format(vid=video_id)):
-		for client in YOUTUBE_CLIENTS:
-			extractor_args = _extractor_args(client)
-			cmd = cmd_base + extractor_args + js_runtime_args + cookies_args + ["-o", str(tmp), base_url]
-			rc, detail = _run_ytdlp_detail(cmd)
-			if rc == 0:
-				success = True
-				log(f"download_mp3: yt-dlp succeeded video_id={video_id} client={client} url={base_url}")
-				break
-			last_detail = detail
+	urls = [YTM_URL.format(vid=video_id), YT_URL.format(vid=video_id)]
+
+	if stream_encode and _can_stream_encode(yt_bin, audio_processing, video_id):
+		streamed = dst_dir / (safe_base + ".stream.mp3")
+		client = CLIENT_SELECTOR.order()[0]
+		ytdlp_cmd = cmd_base + ["--no-progress"] + _extractor_args(client) + js_runtime_args + cookies_args + ["-o", "-", urls[0]]
+		ffmpeg_cmd = [ffmpeg_bin, "-hide_banner", "-y", "-i", "pipe:0", "-vn", "-sn"]
+		measured_inline = _append_audio_filter(ffmpeg_cmd, audio_processing, ffmpeg_bin=ffmpeg_bin, video_id=video_id)
+		ffmpeg_cmd += codec_args + ["-f", "mp3", str(streamed)]
+		started = time.monotonic()
+		try:
+			ytdlp_rc, ytdlp_err, ffmpeg_rc, ffmpeg_err = _run_stream_pipeline(ytdlp_cmd, ffmpeg_cmd)
+		except OSError as exc:
+			ytdlp_rc, ytdlp_err, ffmpeg_rc, ffmpeg_err = -1, str(exc), -1, ""
+		ok = ytdlp_rc == 0 and ffmpeg_rc == 0 and streamed.exists() and streamed.stat().st_size > 0
+		CLIENT_SELECTOR.record(client, ok, time.monotonic() - started)
+		if ok:
+			log(f"download_mp3: streamed encode succeeded video_id={video_id} client={client} elapsed_s={time.monotonic() - started:.2f}")
+			replaygain = _replaygain_result(subprocess.CompletedProcess(ffmpeg_cmd, 0, "", ffmpeg_err), audio_processing, video_id, measured_inline, dst.name)
+			return PendingEncode(video_id=video_id, src=None, dst=dst, out=streamed, commands=[], replaygain=replaygain)
+		try: streamed.unlink()
+		except Exception: pass
+		detail = _summarize_tool_output(ytdlp_err if ytdlp_rc != 0 else ffmpeg_err, "")
+		log(f"download_mp3: streamed encode failed video_id={video_id} client={client} yt_dlp_rc={ytdlp_rc} ffmpeg_rc={ffmpeg_rc} detail={detail}; retrying via temp file")
+
+	def _attempt(client: str | None, base_url: str) -> tuple[int, str]:
+		cmd = cmd_base + _extractor_args(client) + js_runtime_args + cookies_args + ["-o", str(tmp), base_url]
+		rc, detail = _run_ytdlp_detail(cmd)
+		if rc == 0:
+			log(f"download_mp3: yt-dlp succeeded video_id={video_id} client={client} url={base_url}")
+		else:
 			log(f"download_mp3: yt-dlp attempt failed video_id={video_id} client={client} url={base_url}")
-		if success:
-			break
+		return rc, detail
+
+	def _attempt_search(client: str | None, search_url: str) -> tuple[int, str]:
+		cmd = cmd_base + _extractor_args(client) + js_runtime_args + cookies_args + ["-o", str(tmp), search_url]
+		rc, detail = _run_ytdlp_detail(cmd)
+		state = "succeeded" if rc == 0 else "failed"
+		log(f"download_mp3: search fallback {state} query='{base_name}' client={client}")
+		return rc, detail
+
+	success, last_detail = _try_clients(urls, _attempt)
 	if not success:
-		search_url = f"ytsearch1:{base_name}"
-		for client in YOUTUBE_CLIENTS:
-			extractor_args = _extractor_args(client)
-			cmd = cmd_base + extractor_args + js_runtime_args + cookies_args + ["-o", str(tmp), search_url]
-			rc, detail = _run_ytdlp_detail(cmd)
-			if rc == 0:
-				success = True
-				log(f"download_mp3: search fallback succeeded query='{base_name}' client={client}")
-				break
-			last_detail = detail
-			log(f"download_mp3: search fallback failed query='{base_name}' client={client}")
+		success, last_detail = _try_clients([f"ytsearch1:{base_name}"], _attempt_search, record=False)
 	if not success:
 		log(f"download_mp3: yt-dlp initial fetch failed video_id={video_id} base='{base_name}'")
 		raise DownloadError(f"yt-dlp failed for mp3 temp: {last_detail}")
@@ -825,32 +1252,19 @@ def download_mp3(video_id: str, dst_dir: pathlib.Path, base_name: str, cbr_320:
 	if tmp.exists():
 		src = tmp
 	else:
-		cands = _list_downloads(dst_dir, safe_base + ".tmp")
+		cands = _list_downloads(dst_dir, safe_base + _DOWNLOAD_SUFFIX)
 		if cands: src = cands[0]
 	if not src:
 		raise DownloadError("temp file not found")
 
-	dst = dst_dir / (safe_base + ".mp3")
-	ffmpeg_bin = ffmpeg_bin or ffmpeg_path()
-	args = [ffmpeg_bin, "-y", "-i", str(src)]
-	_append_audio_filter(args, audio_processing, src=src, ffmpeg_bin=ffmpeg_bin)
-	mp3_quality = max(0, min(10, int(mp3_quality)))
-	if cbr_bitrate_kbps is not None:
-		args += ["-codec:a","libmp3lame","-b:a", f"{max(96, int(cbr_bitrate_kbps))}k"]
-	elif cbr_320:
-		args += ["-codec:a","libmp3lame","-b:a","320k"]
-	else:
-		args += ["-codec:a","libmp3lame","-q:a", str(mp3_quality)]
-	args += [str(dst)]
-	proc = _run_capture(args)
-	rc = proc.returncode
-	detail = _summarize_tool_output(proc.stderr or "", proc.stdout or "")
-	try: src.unlink()
-	except Exception: pass
-	if rc != 0 or not dst.exists():
-		log(f"download_mp3: ffmpeg transcode failed video_id={video_id} dst='{dst.name}' rc={rc}")
-		raise DownloadError(f"ffmpeg mp3 transcode failed: {detail}")
-	return dst
+	encoded = dst_dir / (safe_base + ".encoding.mp3")
+
+	def _encode(runner):
+		args = [ffmpeg_bin, "-y", "-i", str(src)]
+		measured_inline = _append_audio_filter(args, audio_processing, src=src, ffmpeg_bin=ffmpeg_bin, video_id=video_id, runner=runner)
+		return args + codec_args + [str(encoded)], measured_inline
+
+	return PendingEncode(video_id=video_id, src=src, dst=dst, out=encoded, commands=[_encode], audio_processing=audio_processing, failure="ffmpeg mp3 transcode failed")
 
 def write_m3u(out_dir: pathlib.Path, playlist_name: str, tracks_done: List[Dict], ext: str, *, suffix: str = ".m3u8", encoding: str = "utf-8") -> pathlib.Path:
 	playlist_dir = out_dir / _safe(playlist_name)
@@ -861,7 +1275,11 @@ def write_m3u(out_dir: pathlib.Path, playlist_name: str, tracks_done: List[Dict]
 		f.write(f"#EXTPLAYLIST:{playlist_name}\n")
 		for t in tracks_done:
 			title = t["title"]; artists = t["artists"]; album = t["album"]
-			rel = pathlib.Path(f"{_safe(artists)} - {_safe(title)}.{ext}")
+			if t.get("library_path"):
+				# Shared library store: point at the canonical file rather than the playlist's link.
+				rel = pathlib.Path(os.path.relpath(t["library_path"], playlist_dir))
+			else:
+				rel = pathlib.Path(f"{_safe(artists)} - {_safe(title)}.{ext}")
 			dur = int(round((t.get("duration_ms") or 0)/1000))
 			f.write(f"#EXTINF:{dur},{artists} - {title}\n")
 			if t.get("isrc"): f.write(f"#EXTISRC:{t['isrc']}\n")
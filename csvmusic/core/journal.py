@@ -0,0 +1,165 @@
+# tabs only
+import json, pathlib, threading, time
+from typing import Dict, List, Optional, Set, Tuple
+
+from csvmusic.core.log import log
+from csvmusic.core.ytmusic_match import match_cache_keys
+
+JOURNAL_FILE = ".csvmusic-journal.jsonl"
+JOURNAL_VERSION = 1
+# Rewrite the log on open once superseded lines outnumber live entries by this much.
+_COMPACT_SLACK = 500
+
+
+class PipelineJournal:
+	"""
+	Append-only record of each track's progress through one playlist folder:
+	search result, downloaded file, and whether tags were written. Every line
+	is a partial update keyed by the track's identity keys; the latest wins.
+	I/O problems are logged and the run continues without resume data.
+	"""
+
+	def __init__(self, path: pathlib.Path):
+		self.path = pathlib.Path(path)
+		self._lock = threading.Lock()
+		self._entries: Dict[str, Dict] = {}
+		self._aliases: Dict[str, str] = {}
+		self._fh = None
+		lines = self._load()
+		if lines > len(self._entries) + _COMPACT_SLACK:
+			self._compact()
+
+	def _load(self) -> int:
+		lines = 0
+		try:
+			with self.path.open("r", encoding="utf-8") as fh:
+				for line in fh:
+					line = line.strip()
+					if not line:
+						continue
+					lines += 1
+					try:
+						record = json.loads(line)
+					except ValueError:
+						# A crash mid-write leaves at most one torn line at the end.
+						continue
+					if isinstance(record, dict) and record.get("keys"):
+						self._apply(record)
+		except FileNotFoundError:
+			pass
+		except OSError as exc:
+			log(f"journal load failed: path='{self.path}' error={exc}")
+		return lines
+
+	def _apply(self, record: Dict) -> None:
+		keys = [str(k) for k in record["keys"]]
+		primary = next((self._aliases[k] for k in keys if k in self._aliases), keys[0])
+		entry = self._entries.setdefault(primary, {"keys": []})
+		for key, value in record.items():
+			if key not in ("keys", "v"):
+				entry[key] = value
+		for key in keys:
+			if key not in entry["keys"]:
+				entry["keys"].append(key)
+			self._aliases[key] = primary
+
+	def _compact(self) -> None:
+		tmp = self.path.with_suffix(".tmp")
+		try:
+			with tmp.open("w", encoding="utf-8") as fh:
+				for entry in self._entries.values():
+					fh.write(json.dumps({"v": JOURNAL_VERSION, **entry}, ensure_ascii=False) + "\n")
+			tmp.replace(self.path)
+		except OSError as exc:
+			log(f"journal compact failed: path='{self.path}' error={exc}")
+
+	def _append(self, track: Dict, **fields) -> None:
+		keys = match_cache_keys(track)
+		if not keys:
+			return
+		record = {"v": JOURNAL_VERSION, "keys": keys, "ts": int(time.time()), **fields}
+		with self._lock:
+			self._apply(record)
+			try:
+				if self._fh is None:
+					self.path.parent.mkdir(parents=True, exist_ok=True)
+					self._fh = self.path.open("a", encoding="utf-8")
+				self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+				self._fh.flush()
+			except OSError as exc:
+				log(f"journal write failed: path='{self.path}' error={exc}")
+
+	def entry(self, track: Dict) -> Optional[Dict]:
+		with self._lock:
+			for key in match_cache_keys(track):
+				primary = self._aliases.get(key)
+				if primary is not None:
+					return dict(self._entries[primary])
+		return None
+
+	def record_match(self, track: Dict, match: Dict | None, confidence: float, options: List[Dict]) -> None:
+		self._append(track, stage="matched", match=match, confidence=confidence, options=options)
+
+	def record_download(self, track: Dict, video_id: str, file_path: pathlib.Path) -> None:
+		self._append(track, stage="downloaded", video_id=video_id, file_path=_path_text(file_path), tagged=False)
+
+	def record_tagged(self, track: Dict, video_id: str, file_path: pathlib.Path) -> None:
+		self._append(track, stage="tagged", video_id=video_id, file_path=_path_text(file_path), tagged=True)
+
+	def match_for(self, track: Dict) -> Optional[Tuple[Optional[Dict], float, List[Dict]]]:
+		"""Journaled search result as find_best returns it, or None if the track was never searched."""
+		entry = self.entry(track)
+		if not entry or "options" not in entry:
+			return None
+		return entry.get("match"), float(entry.get("confidence") or 0.0), list(entry.get("options") or [])
+
+	def download_for(self, track: Dict) -> Optional[Dict]:
+		"""{"video_id", "file_path", "tagged"} when the downloaded file is still on disk."""
+		entry = self.entry(track)
+		if not entry or not entry.get("file_path") or not entry.get("video_id"):
+			return None
+		if not pathlib.Path(entry["file_path"]).exists():
+			return None
+		return {"video_id": entry["video_id"], "file_path": pathlib.Path(entry["file_path"]), "tagged": bool(entry.get("tagged"))}
+
+	def untagged_paths(self) -> Set[str]:
+		"""Casefolded paths of files written but never tagged."""
+		with self._lock:
+			return {
+				str(entry["file_path"]).casefold()
+				for entry in self._entries.values()
+				if entry.get("file_path") and not entry.get("tagged")
+			}
+
+	def close(self) -> None:
+		with self._lock:
+			if self._fh is not None:
+				try:
+					self._fh.close()
+				except OSError:
+					pass
+				self._fh = None
+
+
+def _path_text(path: pathlib.Path) -> str:
+	return str(pathlib.Path(path).resolve())
+
+
+def journal_path_key(path: pathlib.Path) -> str:
+	"""Key comparable with untagged_paths()."""
+	return _path_text(path).casefold()
+
+
+def open_journal(folder: pathlib.Path) -> PipelineJournal:
+	return PipelineJournal(pathlib.Path(folder) / JOURNAL_FILE)
+
+
+def untagged_files(folder: pathlib.Path) -> Set[str]:
+	"""Untagged paths journaled in folder; empty when no run has written there."""
+	if not (pathlib.Path(folder) / JOURNAL_FILE).exists():
+		return set()
+	journal = open_journal(folder)
+	try:
+		return journal.untagged_paths()
+	finally:
+		journal.close()
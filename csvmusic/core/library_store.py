@@ -0,0 +1,179 @@
+# tabs only
+import filecmp, hashlib, json, os, pathlib, shutil, sys, threading
+from typing import Callable, Dict, Optional
+
+from csvmusic.core.dir_index import note_written
+from csvmusic.core.log import log
+
+LIBRARY_DIR = ".csvmusic-library"
+LINK_HARDLINK = "hardlink"
+LINK_REFLINK = "reflink"
+LINK_COPY = "copy"
+# Linux FICLONE ioctl: share extents copy-on-write (btrfs, XFS, bcachefs).
+_FICLONE = 0x40049409
+
+
+class LibraryStore:
+	"""
+	One canonical file per (videoId, format, quality, processing settings),
+	kept under LIBRARY_DIR in the output folder, so a song shared by several
+	playlists is downloaded and encoded once. Each playlist tags its own copy
+	(a reflink where the filesystem allows it, otherwise a plain copy); when the
+	tagged copy comes out identical to the canonical file it is swapped for a
+	hard link. A file with a hard link is never re-tagged in place.
+	"""
+
+	def __init__(self, root: pathlib.Path | str):
+		self.root = pathlib.Path(root)
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.stored = 0
+		self.links: Dict[str, int] = {LINK_HARDLINK: 0, LINK_REFLINK: 0, LINK_COPY: 0}
+
+	def canonical_path(self, video_id: str, fmt: str, *, quality: Dict | None = None, processing: Dict | None = None) -> pathlib.Path:
+		settings = {
+			"video_id": video_id,
+			"format": fmt,
+			"quality": {k: v for k, v in (quality or {}).items() if v},
+			"processing": {k: v for k, v in (processing or {}).items() if v},
+		}
+		digest = hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+		safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in video_id) or "_"
+		return self.root / safe_id[:2] / f"{safe_id}-{digest}.{fmt}"
+
+	def path_for(self, video_id: str, fmt: str, *, mp3_quality: int = 0, cbr_bitrate_kbps: int | None = None, audio_processing: Dict | None = None) -> pathlib.Path:
+		"""canonical_path for a download made with these settings; the GUI and CLI both key the store through here."""
+		quality = {"mp3_quality": mp3_quality, "cbr_bitrate_kbps": cbr_bitrate_kbps} if fmt == "mp3" else None
+		# Opus is a stream copy; the audio processing options only apply to m4a/mp3 encodes.
+		processing = audio_processing if fmt in ("m4a", "mp3") else None
+		return self.canonical_path(video_id, fmt, quality=quality, processing=processing)
+
+	def link_into(self, canonical: pathlib.Path, dest: pathlib.Path, tag: Callable[[pathlib.Path], None]) -> Optional[str]:
+		"""
+		Put a copy of the canonical file at dest, tagged by tag(path) before it
+		gets there; None when the store has no such file yet.
+		"""
+		dest.parent.mkdir(parents=True, exist_ok=True)
+		tmp = dest.with_name(dest.name + ".link")
+		with self._lock:
+			if not canonical.exists():
+				return None
+			_unlink(tmp)
+			method = _private_copy(canonical, tmp)
+		try:
+			tag(tmp)
+			if _share(canonical, tmp):
+				method = LINK_HARDLINK
+			os.replace(tmp, dest)
+		except BaseException:
+			_unlink(tmp)
+			raise
+		note_written(dest)
+		with self._lock:
+			self.links[method] += 1
+			self.hits += 1
+		log(f"library: linked {method} '{canonical.name}' -> '{dest}'")
+		return method
+
+	def adopt(self, src: pathlib.Path, canonical: pathlib.Path) -> str:
+		"""
+		Move a finished, tagged download into the store and leave a link to it
+		at src. When the store already has the song, src is kept unless it is
+		identical to the stored file.
+		"""
+		with self._lock:
+			canonical.parent.mkdir(parents=True, exist_ok=True)
+			if canonical.exists():
+				if not _share(canonical, src):
+					return LINK_COPY
+				self.links[LINK_HARDLINK] += 1
+				return LINK_HARDLINK
+			tmp = canonical.with_name(canonical.name + ".tmp")
+			shutil.move(str(src), str(tmp))
+			os.replace(tmp, canonical)
+			self.stored += 1
+			try:
+				return self._link(canonical, src)
+			except OSError:
+				# Never leave the playlist without its file.
+				shutil.copy2(canonical, src)
+				raise
+
+	def _link(self, canonical: pathlib.Path, dest: pathlib.Path) -> str:
+		dest.parent.mkdir(parents=True, exist_ok=True)
+		tmp = dest.with_name(dest.name + ".link")
+		_unlink(tmp)
+		method = _make_link(canonical, tmp)
+		os.replace(tmp, dest)
+		note_written(dest)
+		self.links[method] += 1
+		return method
+
+	def stats(self) -> Dict:
+		with self._lock:
+			return {"hits": self.hits, "stored": self.stored, **self.links}
+
+
+def unshare(path: pathlib.Path) -> None:
+	"""Give a hard-linked file its own inode, so tagging it leaves the other links alone."""
+	if os.stat(path).st_nlink < 2:
+		return
+	tmp = path.with_name(path.name + ".link")
+	_unlink(tmp)
+	_private_copy(path, tmp)
+	os.replace(tmp, path)
+
+
+def _share(canonical: pathlib.Path, path: pathlib.Path) -> bool:
+	"""Swap path for a hard link to canonical when the two files are byte-identical."""
+	if not filecmp.cmp(path, canonical, shallow=False):
+		return False
+	tmp = path.with_name(path.name + ".share")
+	_unlink(tmp)
+	if not _hard_link(canonical, tmp):
+		return False
+	os.replace(tmp, path)
+	return True
+
+
+def _make_link(src: pathlib.Path, dest: pathlib.Path) -> str:
+	if _hard_link(src, dest):
+		return LINK_HARDLINK
+	return _private_copy(src, dest)
+
+
+def _hard_link(src: pathlib.Path, dest: pathlib.Path) -> bool:
+	try:
+		os.link(src, dest)
+		return True
+	except OSError:
+		# Other volume, FAT/exFAT, link limit reached: callers fall back to a copy.
+		return False
+
+
+def _private_copy(src: pathlib.Path, dest: pathlib.Path) -> str:
+	if _reflink(src, dest):
+		return LINK_REFLINK
+	shutil.copy2(src, dest)
+	return LINK_COPY
+
+
+def _reflink(src: pathlib.Path, dest: pathlib.Path) -> bool:
+	if not sys.platform.startswith("linux"):
+		return False
+	import fcntl
+	try:
+		with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+			fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+		shutil.copystat(src, dest)
+		return True
+	except OSError:
+		_unlink(dest)
+		return False
+
+
+def _unlink(path: pathlib.Path) -> None:
+	try:
+		path.unlink()
+	except FileNotFoundError:
+		pass
@@ -0,0 +1,91 @@
+# tabs only
+import pathlib, sqlite3, threading, time
+from typing import Dict, Optional
+
+from csvmusic.core.log import log
+from csvmusic.core.settings import cache_dir
+
+LOUDNESS_CACHE_FILE = "loudness_cache.sqlite3"
+
+
+class LoudnessCache:
+	"""
+	SQLite store of measured source loudness (integrated LUFS and true peak),
+	keyed by video ID plus the pre-gain filter chain that was measured. A
+	video's audio does not change, so entries never expire. Storage errors are
+	logged and treated as misses.
+	"""
+
+	def __init__(self, path: pathlib.Path | str):
+		self.path = pathlib.Path(path)
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		self._conn: sqlite3.Connection | None = None
+		try:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS loudness ("
+				"key TEXT PRIMARY KEY, input_i REAL NOT NULL, input_tp REAL NOT NULL, measured_at REAL NOT NULL)"
+			)
+			conn.commit()
+			self._conn = conn
+		except Exception as exc:
+			log(f"loudness cache unavailable: path='{self.path}' error={exc}")
+
+	def get(self, key: str) -> Optional[Dict[str, float]]:
+		if self._conn is None or not key:
+			return None
+		with self._lock:
+			try:
+				row = self._conn.execute("SELECT input_i, input_tp FROM loudness WHERE key = ?", (key,)).fetchone()
+			except Exception as exc:
+				log(f"loudness cache read failed: {exc}")
+				row = None
+			if row is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+			return {"input_i": float(row[0]), "input_tp": float(row[1])}
+
+	def put(self, key: str, input_i: float, input_tp: float) -> None:
+		if self._conn is None or not key:
+			return
+		with self._lock:
+			try:
+				self._conn.execute(
+					"INSERT OR REPLACE INTO loudness (key, input_i, input_tp, measured_at) VALUES (?, ?, ?, ?)",
+					(key, float(input_i), float(input_tp), time.time()),
+				)
+				self._conn.commit()
+			except Exception as exc:
+				log(f"loudness cache write failed: {exc}")
+
+	def clear(self) -> None:
+		if self._conn is None:
+			return
+		with self._lock:
+			try:
+				self._conn.execute("DELETE FROM loudness")
+				self._conn.commit()
+			except Exception as exc:
+				log(f"loudness cache clear failed: {exc}")
+
+	def __len__(self) -> int:
+		if self._conn is None:
+			return 0
+		with self._lock:
+			return int(self._conn.execute("SELECT COUNT(*) FROM loudness").fetchone()[0])
+
+
+_DEFAULT_CACHE: LoudnessCache | None = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def default_loudness_cache() -> LoudnessCache:
+	global _DEFAULT_CACHE
+	with _DEFAULT_CACHE_LOCK:
+		if _DEFAULT_CACHE is None:
+			_DEFAULT_CACHE = LoudnessCache(cache_dir() / LOUDNESS_CACHE_FILE)
+		return _DEFAULT_CACHE
@@ -0,0 +1,167 @@
+# tabs only
+import atexit, json, pathlib, sqlite3, threading, time
+from typing import Dict, List, Optional
+
+from csvmusic.core.log import log
+from csvmusic.core.settings import cache_dir
+
+MATCH_CACHE_FILE = "match_cache.sqlite3"
+MATCH_CACHE_TTL_S = 30 * 24 * 3600
+MATCH_CACHE_MAX_ENTRIES = 50000
+_EVICT_EVERY_PUTS = 200
+# Hits queue their last_used refresh; this many are written per commit.
+_TOUCH_BATCH = 200
+
+
+class MatchCache:
+	"""
+	SQLite store of ranked search candidates, keyed by track identity strings.
+	Entries expire after ttl_s; once max_entries is exceeded the least recently
+	used keys are evicted. Storage errors are logged and treated as misses.
+	Hits never commit: their last_used refreshes are queued and written by
+	flush(), which runs every _TOUCH_BATCH refreshes, before eviction and on close().
+	"""
+
+	def __init__(self, path: pathlib.Path | str, *, ttl_s: float = MATCH_CACHE_TTL_S, max_entries: int = MATCH_CACHE_MAX_ENTRIES):
+		self.path = pathlib.Path(path)
+		self.ttl_s = float(ttl_s)
+		self.max_entries = max(1, int(max_entries))
+		self.hits = 0
+		self.misses = 0
+		self._puts = 0
+		self._touched: Dict[str, float] = {}
+		self._lock = threading.Lock()
+		self._conn: sqlite3.Connection | None = None
+		try:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS matches ("
+				"key TEXT PRIMARY KEY, options TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+			)
+			conn.execute("CREATE INDEX IF NOT EXISTS matches_last_used ON matches(last_used)")
+			conn.commit()
+			self._conn = conn
+		except Exception as exc:
+			log(f"match cache unavailable: path='{self.path}' error={exc}")
+
+	def get(self, keys: List[str]) -> Optional[List[Dict]]:
+		"""Return cached options for the first fresh key, or None."""
+		if self._conn is None or not keys:
+			return None
+		now = time.time()
+		with self._lock:
+			try:
+				for key in keys:
+					row = self._conn.execute("SELECT options, created_at FROM matches WHERE key = ?", (key,)).fetchone()
+					if row is None:
+						continue
+					if now - row[1] > self.ttl_s:
+						self._touched.pop(key, None)
+						self._conn.execute("DELETE FROM matches WHERE key = ?", (key,))
+						self._conn.commit()
+						continue
+					self._touched[key] = now
+					if len(self._touched) >= _TOUCH_BATCH:
+						self._flush_locked()
+						self._conn.commit()
+					self.hits += 1
+					return json.loads(row[0])
+			except Exception as exc:
+				log(f"match cache read failed: {exc}")
+			self.misses += 1
+			return None
+
+	def put(self, keys: List[str], options: List[Dict]) -> None:
+		if self._conn is None or not keys or not options:
+			return
+		now = time.time()
+		payload = json.dumps(options, ensure_ascii=False)
+		with self._lock:
+			try:
+				for key in keys:
+					self._touched.pop(key, None)
+				self._conn.executemany(
+					"INSERT OR REPLACE INTO matches (key, options, created_at, last_used) VALUES (?, ?, ?, ?)",
+					[(key, payload, now, now) for key in keys],
+				)
+				self._puts += 1
+				if self._puts % _EVICT_EVERY_PUTS == 1:
+					self._evict_locked(now)
+				self._conn.commit()
+			except Exception as exc:
+				log(f"match cache write failed: {exc}")
+
+	def _flush_locked(self) -> None:
+		if self._touched:
+			self._conn.executemany("UPDATE matches SET last_used = ? WHERE key = ?", [(used, key) for key, used in self._touched.items()])
+			self._touched.clear()
+
+	def flush(self) -> None:
+		"""Write queued last_used refreshes."""
+		if self._conn is None:
+			return
+		with self._lock:
+			try:
+				self._flush_locked()
+				self._conn.commit()
+			except Exception as exc:
+				log(f"match cache flush failed: {exc}")
+
+	def close(self) -> None:
+		self.flush()
+		with self._lock:
+			conn, self._conn = self._conn, None
+		if conn is not None:
+			conn.close()
+
+	def _evict_locked(self, now: float) -> None:
+		self._flush_locked()
+		self._conn.execute("DELETE FROM matches WHERE created_at < ?", (now - self.ttl_s,))
+		count = self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+		excess = count - self.max_entries
+		if excess > 0:
+			self._conn.execute(
+				"DELETE FROM matches WHERE key IN (SELECT key FROM matches ORDER BY last_used ASC LIMIT ?)",
+				(excess,),
+			)
+
+	def evict(self) -> None:
+		if self._conn is None:
+			return
+		with self._lock:
+			try:
+				self._evict_locked(time.time())
+				self._conn.commit()
+			except Exception as exc:
+				log(f"match cache eviction failed: {exc}")
+
+	def clear(self) -> None:
+		if self._conn is None:
+			return
+		with self._lock:
+			try:
+				self._touched.clear()
+				self._conn.execute("DELETE FROM matches")
+				self._conn.commit()
+			except Exception as exc:
+				log(f"match cache clear failed: {exc}")
+
+	def __len__(self) -> int:
+		if self._conn is None:
+			return 0
+		with self._lock:
+			return int(self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0])
+
+
+_DEFAULT_CACHE: MatchCache | None = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def default_match_cache() -> MatchCache:
+	global _DEFAULT_CACHE
+	with _DEFAULT_CACHE_LOCK:
+		if _DEFAULT_CACHE is None:
+			_DEFAULT_CACHE = MatchCache(cache_dir() / MATCH_CACHE_FILE)
+			atexit.register(_DEFAULT_CACHE.close)
+		return _DEFAULT_CACHE
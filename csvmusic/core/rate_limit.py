@@ -0,0 +1,33 @@
+# tabs only
+import threading, time
+from typing import Callable
+
+
+class TokenBucket:
+	"""Thread-safe token bucket shared by every caller of one remote service."""
+
+	def __init__(self, rate_per_s: float, burst: int = 1, *, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+		self.rate_per_s = max(0.001, float(rate_per_s))
+		self.burst = max(1, int(burst))
+		self._clock = clock
+		self._sleep = sleep
+		self._tokens = float(self.burst)
+		self._updated = clock()
+		self._lock = threading.Lock()
+
+	def reserve(self) -> float:
+		"""Take one token and return how long the caller must wait before using it."""
+		with self._lock:
+			now = self._clock()
+			self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate_per_s)
+			self._updated = now
+			self._tokens -= 1.0
+			if self._tokens >= 0:
+				return 0.0
+			return -self._tokens / self.rate_per_s
+
+	def acquire(self) -> float:
+		wait = self.reserve()
+		if wait > 0:
+			self._sleep(wait)
+		return wait
@@ -0,0 +1,136 @@
+# tabs only
+import json, pathlib, sqlite3, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional
+
+from csvmusic.core.log import log
+
+SEARCH_CACHE_FILE = "search_cache.sqlite3"
+SEARCH_CACHE_MAX_ENTRIES = 2048
+SEARCH_CACHE_DISK_TTL_S = 24 * 3600
+
+
+class SearchCache:
+	"""
+	Bounded LRU of parsed search results with an optional SQLite tier.
+	Concurrent requests for the same key share one in-flight fetch.
+	Empty results are not cached so callers can retry transient misses.
+	"""
+
+	def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, *, disk_path: pathlib.Path | str | None = None, disk_ttl_s: float = SEARCH_CACHE_DISK_TTL_S):
+		self.max_entries = max(1, int(max_entries))
+		self.disk_ttl_s = float(disk_ttl_s)
+		self.hits = 0
+		self.disk_hits = 0
+		self.misses = 0
+		self.coalesced = 0
+		self._entries: "OrderedDict[Hashable, List[Dict]]" = OrderedDict()
+		self._inflight: Dict[Hashable, Future] = {}
+		self._lock = threading.Lock()
+		self._disk: sqlite3.Connection | None = None
+		if disk_path is not None:
+			self.enable_disk(disk_path)
+
+	def enable_disk(self, path: pathlib.Path | str) -> None:
+		path = pathlib.Path(path)
+		try:
+			path.parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False)
+			conn.execute("CREATE TABLE IF NOT EXISTS searches (key TEXT PRIMARY KEY, results TEXT NOT NULL, created_at REAL NOT NULL)")
+			conn.execute("DELETE FROM searches WHERE created_at < ?", (time.time() - self.disk_ttl_s,))
+			conn.commit()
+		except Exception as exc:
+			log(f"search cache disk tier unavailable: path='{path}' error={exc}")
+			return
+		with self._lock:
+			self._disk = conn
+
+	def _disk_get(self, key: Hashable) -> Optional[List[Dict]]:
+		if self._disk is None:
+			return None
+		try:
+			with self._lock:
+				row = self._disk.execute("SELECT results, created_at FROM searches WHERE key = ?", (json.dumps(key),)).fetchone()
+			if row is None or time.time() - row[1] > self.disk_ttl_s:
+				return None
+			return json.loads(row[0])
+		except Exception as exc:
+			log(f"search cache disk read failed: {exc}")
+			return None
+
+	def _disk_put(self, key: Hashable, results: List[Dict]) -> None:
+		if self._disk is None:
+			return
+		try:
+			with self._lock:
+				self._disk.execute(
+					"INSERT OR REPLACE INTO searches (key, results, created_at) VALUES (?, ?, ?)",
+					(json.dumps(key), json.dumps(results, ensure_ascii=False), time.time()),
+				)
+				self._disk.commit()
+		except Exception as exc:
+			log(f"search cache disk write failed: {exc}")
+
+	def get_or_fetch(self, key: Hashable, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+		with self._lock:
+			cached = self._entries.get(key)
+			if cached is not None:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return [dict(item) for item in cached]
+			pending = self._inflight.get(key)
+			owner = pending is None
+			if owner:
+				pending = Future()
+				self._inflight[key] = pending
+			else:
+				self.coalesced += 1
+		if not owner:
+			return [dict(item) for item in pending.result()]
+		try:
+			results = self._disk_get(key)
+			if results is not None:
+				with self._lock:
+					self.disk_hits += 1
+			else:
+				with self._lock:
+					self.misses += 1
+				results = fetch()
+				if results:
+					self._disk_put(key, results)
+			if results:
+				with self._lock:
+					self._entries[key] = results
+					self._entries.move_to_end(key)
+					while len(self._entries) > self.max_entries:
+						self._entries.popitem(last=False)
+			pending.set_result(results)
+		except BaseException as exc:
+			pending.set_exception(exc)
+			raise
+		finally:
+			with self._lock:
+				self._inflight.pop(key, None)
+		return [dict(item) for item in results]
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				"hits": self.hits,
+				"disk_hits": self.disk_hits,
+				"misses": self.misses,
+				"coalesced": self.coalesced,
+				"entries": len(self._entries),
+			}
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self.hits = self.disk_hits = self.misses = self.coalesced = 0
+			if self._disk is not None:
+				try:
+					self._disk.execute("DELETE FROM searches")
+					self._disk.commit()
+				except Exception as exc:
+					log(f"search cache clear failed: {exc}")
@@ -30,6 +30,11 @@ def settings_path() -> pathlib.Path:
 	d.mkdir(parents=True, exist_ok=True)
 	return d / _SETTINGS_FILE
 
+def cache_dir() -> pathlib.Path:
+	d = _settings_dir() / "cache"
+	d.mkdir(parents=True, exist_ok=True)
+	return d
+
 def load_settings() -> dict:
 	p = settings_path()
 	if not p.exists():
@@ -0,0 +1,53 @@
+# tabs only
+import subprocess, time
+from typing import Callable, Dict, Sequence, Tuple
+
+from csvmusic.core.js_runtime import detect_js_runtimes, ytdlp_supports_js_runtimes
+from csvmusic.core.log import log
+from csvmusic.core.paths import ffmpeg_path, ytdlp_path
+from csvmusic.core.subprocess_env import subprocess_kwargs
+
+
+def probe_ffmpeg() -> None:
+	path = ffmpeg_path()
+	log(f"ffmpeg resolved to: {path}")
+	try:
+		subprocess.run(
+			[path, "-version"],
+			capture_output=True,
+			text=True,
+			timeout=2,
+			**subprocess_kwargs()
+		)
+	except Exception:
+		pass
+
+
+def probe_js_runtimes() -> None:
+	"""Fill the js_runtime caches so the first preflight and download do not pay for the version checks."""
+	try:
+		yt_bin = ytdlp_path()
+	except Exception:
+		yt_bin = None
+	supported = ytdlp_supports_js_runtimes(yt_bin)
+	found = ", ".join(f"{info.name} {info.version}" for info in detect_js_runtimes() if info.supported) or "none"
+	log(f"JS runtimes: {found}; yt-dlp --js-runtimes support: {supported}")
+
+
+STARTUP_PROBES: Tuple[Tuple[str, Callable[[], None]], ...] = (
+	("ffmpeg", probe_ffmpeg),
+	("js runtimes", probe_js_runtimes),
+)
+
+
+def run_startup_probes(probes: Sequence[Tuple[str, Callable[[], None]]] = STARTUP_PROBES) -> Dict[str, float]:
+	"""Run each probe in turn, logging failures instead of raising; returns seconds spent per probe."""
+	timings: Dict[str, float] = {}
+	for name, probe in probes:
+		started = time.perf_counter()
+		try:
+			probe()
+		except Exception as exc:
+			log(f"startup probe '{name}' failed: {exc}")
+		timings[name] = time.perf_counter() - started
+	return timings
@@ -0,0 +1,117 @@
+# tabs only
+import base64, pathlib
+from typing import Dict, Optional, Tuple
+
+from mutagen.flac import Picture
+from mutagen.id3 import ID3, APIC, TALB, TDRC, TIT2, TPE1, TPOS, TRCK, TXXX, ID3NoHeaderError
+from mutagen.mp4 import MP4, MP4Cover, MP4FreeForm
+from mutagen.oggopus import OggOpus
+
+# Room left in the tag block so later edits (a retag, ReplayGain values) are
+# written in place instead of shifting the whole audio stream.
+TAG_PADDING = 16 * 1024
+
+
+def tag_padding(info) -> int:
+	"""mutagen padding policy: keep existing slack if there is enough, else reserve TAG_PADDING."""
+	return info.padding if info.padding >= 1024 else TAG_PADDING
+
+
+def write_tags(path: pathlib.Path, meta: Dict, cover_bytes: Optional[bytes], *, replaygain: Optional[Tuple[float, float]] = None) -> None:
+	"""
+	Build the full tag set in memory and write it with a single save.
+	replaygain is (track gain dB, linear track peak) from the encode; Opus
+	output is never leveled, so only MP3 and MP4 carry it.
+	"""
+	suffix = path.suffix.lower()
+	if suffix == ".mp3":
+		_write_id3(path, meta, cover_bytes, replaygain)
+	elif suffix in (".opus", ".ogg"):
+		_write_opus(path, meta, cover_bytes)
+	else:
+		_write_mp4(path, meta, cover_bytes, replaygain)
+
+
+def write_replaygain_tags(path: pathlib.Path, replaygain: Tuple[float, float]) -> None:
+	"""Add ReplayGain values to a file that gets no other tags."""
+	suffix = path.suffix.lower()
+	if suffix == ".mp3":
+		tags = _load_id3(path)
+		_set_id3_replaygain(tags, replaygain)
+		tags.save(path, v2_version=3, padding=tag_padding)
+	elif suffix in (".m4a", ".mp4"):
+		mp4 = MP4(path)
+		_set_mp4_replaygain(mp4, replaygain)
+		mp4.save(padding=tag_padding)
+
+
+def _replaygain_text(replaygain: Tuple[float, float]) -> Tuple[str, str]:
+	gain_db, peak = replaygain
+	return f"{gain_db:+.2f} dB", f"{peak:.6f}"
+
+
+def _load_id3(path: pathlib.Path) -> ID3:
+	try:
+		return ID3(path)
+	except ID3NoHeaderError:
+		return ID3()
+
+
+def _set_id3_replaygain(tags: ID3, replaygain: Tuple[float, float]) -> None:
+	gain_text, peak_text = _replaygain_text(replaygain)
+	tags.setall("TXXX:REPLAYGAIN_TRACK_GAIN", [TXXX(encoding=3, desc="REPLAYGAIN_TRACK_GAIN", text=[gain_text])])
+	tags.setall("TXXX:REPLAYGAIN_TRACK_PEAK", [TXXX(encoding=3, desc="REPLAYGAIN_TRACK_PEAK", text=[peak_text])])
+
+
+def _set_mp4_replaygain(mp4: MP4, replaygain: Tuple[float, float]) -> None:
+	gain_text, peak_text = _replaygain_text(replaygain)
+	mp4["----:com.apple.iTunes:replaygain_track_gain"] = [MP4FreeForm(gain_text.encode("utf-8"))]
+	mp4["----:com.apple.iTunes:replaygain_track_peak"] = [MP4FreeForm(peak_text.encode("utf-8"))]
+
+
+def _write_id3(path: pathlib.Path, meta: Dict, cover_bytes: Optional[bytes], replaygain: Optional[Tuple[float, float]] = None) -> None:
+	tags = _load_id3(path)
+	tags.setall("TIT2", [TIT2(encoding=3, text=[meta.get("title", "")])])
+	tags.setall("TPE1", [TPE1(encoding=3, text=[meta.get("artists", "")])])
+	tags.setall("TALB", [TALB(encoding=3, text=[meta.get("album", "")])])
+	if meta.get("year"): tags.setall("TDRC", [TDRC(encoding=3, text=[str(meta["year"])])])
+	if meta.get("track_no"): tags.setall("TRCK", [TRCK(encoding=3, text=[str(meta["track_no"])])])
+	if meta.get("disc_no"): tags.setall("TPOS", [TPOS(encoding=3, text=[str(meta["disc_no"])])])
+	if cover_bytes:
+		tags.setall("APIC", [APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover_bytes)])
+	if replaygain is not None:
+		_set_id3_replaygain(tags, replaygain)
+	tags.save(path, v2_version=3, padding=tag_padding)
+
+
+def _write_opus(path: pathlib.Path, meta: Dict, cover_bytes: Optional[bytes]) -> None:
+	opus = OggOpus(path)
+	opus["title"] = [meta.get("title", "")]
+	opus["artist"] = [meta.get("artists", "")]
+	opus["album"] = [meta.get("album", "")]
+	if meta.get("year"): opus["date"] = [str(meta["year"])]
+	if meta.get("track_no"): opus["tracknumber"] = [str(meta["track_no"])]
+	if meta.get("disc_no"): opus["discnumber"] = [str(meta["disc_no"])]
+	if cover_bytes:
+		picture = Picture()
+		picture.type = 3
+		picture.mime = "image/jpeg"
+		picture.desc = "Cover"
+		picture.data = cover_bytes
+		opus["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
+	opus.save(padding=tag_padding)
+
+
+def _write_mp4(path: pathlib.Path, meta: Dict, cover_bytes: Optional[bytes], replaygain: Optional[Tuple[float, float]] = None) -> None:
+	mp4 = MP4(path)
+	mp4["\xa9nam"] = meta.get("title", "")
+	mp4["\xa9ART"] = [meta.get("artists", "")]
+	mp4["\xa9alb"] = [meta.get("album", "")]
+	if meta.get("year"): mp4["\xa9day"] = [str(meta["year"])]
+	if meta.get("track_no"): mp4["trkn"] = [(int(meta["track_no"]), 0)]
+	if meta.get("disc_no"): mp4["disk"] = [(int(meta["disc_no"]), 0)]
+	if cover_bytes:
+		mp4["covr"] = [MP4Cover(cover_bytes, imageformat=MP4Cover.FORMAT_JPEG)]
+	if replaygain is not None:
+		_set_mp4_replaygain(mp4, replaygain)
+	mp4.save(padding=tag_padding)
@@ -2,7 +2,12 @@
 import pathlib
 from dataclasses import dataclass
 
-from csvmusic.core.downloader import sanitize_name
+from csvmusic.core.cover_art import track_cover_bytes
+from csvmusic.core.dir_index import file_exists
+from csvmusic.core.downloader import sanitize_name, tag_file
+from csvmusic.core.journal import PipelineJournal, journal_path_key, open_journal, untagged_files
+from csvmusic.core.library_store import unshare
+from csvmusic.core.log import log
 
 
 def expected_track_path(track: dict, out_root: pathlib.Path, fmt: str) -> pathlib.Path:
@@ -41,16 +46,67 @@ class TrackOutputPlan:
 		return len(self.existing_rows) + len(self.queued_rows)
 
 
+def _interrupted_before_tagging(path: pathlib.Path, untagged_by_folder: dict[pathlib.Path, set[str]]) -> bool:
+	"""True when a stopped run wrote this file but never tagged it."""
+	folder = path.parent
+	if folder not in untagged_by_folder:
+		untagged_by_folder[folder] = untagged_files(folder)
+	untagged = untagged_by_folder[folder]
+	return bool(untagged) and journal_path_key(path) in untagged
+
+
 def plan_track_outputs(tracks: list[dict], out_root: pathlib.Path, fmt: str) -> TrackOutputPlan:
 	"""Classify rows as unique existing files, queued files, or shared-file duplicates."""
 	duplicates = duplicate_output_rows(tracks, out_root, fmt)
 	existing: list[int] = []
 	queued: list[int] = []
+	untagged_by_folder: dict[pathlib.Path, set[str]] = {}
 	for row, track in enumerate(tracks):
 		if row in duplicates:
 			continue
-		if expected_track_path(track, out_root, fmt).exists():
+		path = expected_track_path(track, out_root, fmt)
+		if file_exists(path) and not _interrupted_before_tagging(path, untagged_by_folder):
 			existing.append(row)
 		else:
 			queued.append(row)
 	return TrackOutputPlan(duplicates, tuple(existing), tuple(queued))
+
+
+@dataclass
+class RetagReport:
+	tagged: int = 0
+	missing: int = 0
+	failed: int = 0
+
+
+def retag_playlist(tracks: list[dict], out_root: pathlib.Path, fmt: str, *, cover_for=track_cover_bytes, cover_size: int = 600) -> RetagReport:
+	"""Rewrite tags on files already in the output folder; each file is saved once and nothing is downloaded."""
+	report = RetagReport()
+	journals: dict[pathlib.Path, PipelineJournal] = {}
+	try:
+		for track in tracks:
+			path = expected_track_path(track, out_root, fmt)
+			if not file_exists(path):
+				report.missing += 1
+				continue
+			journal = journals.get(path.parent)
+			if journal is None:
+				journal = journals[path.parent] = open_journal(path.parent)
+			entry = journal.entry(track) or {}
+			video_id = entry.get("video_id")
+			try:
+				cover = cover_for(track, video_id) if cover_size > 0 else None
+				# A library song may be hard-linked into other playlists; retag a private copy so theirs are untouched.
+				unshare(path)
+				tag_file(path, track, cover, cover_size=cover_size)
+			except Exception as exc:
+				log(f"retag failed: path='{path}' error={exc}")
+				report.failed += 1
+				continue
+			if video_id:
+				journal.record_tagged(track, video_id, path)
+			report.tagged += 1
+	finally:
+		for journal in journals.values():
+			journal.close()
+	return report
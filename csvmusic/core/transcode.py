@@ -0,0 +1,177 @@
+# tabs only
+import os, subprocess, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, TypeVar
+
+from csvmusic.core.log import log
+from csvmusic.core.subprocess_env import subprocess_kwargs
+
+T = TypeVar("T")
+
+
+class TranscodeCancelled(Exception):
+	pass
+
+
+@dataclass
+class TranscodeMetrics:
+	label: str
+	queued_s: float = 0.0
+	wall_s: float = 0.0
+	# Child CPU seconds; None where the OS does not report per-process usage.
+	cpu_s: float | None = 0.0
+	processes: int = 0
+	ok: bool = False
+
+
+def default_transcode_workers() -> int:
+	return max(1, os.cpu_count() or 1)
+
+
+class TranscodeScheduler:
+	"""
+	Queue of ffmpeg jobs, separate from the download stage. Each job is a
+	callable that starts its ffmpeg processes through run_process; at most
+	max_workers jobs run at once, so encoders get the CPU cores while download
+	threads go back to the network. submit() blocks once max_queued jobs are
+	waiting, which holds downloads back when encoding falls behind. cancel()
+	kills the ffmpeg processes that are running; queued jobs are dropped and
+	their on_cancel callback runs in place of the job.
+	"""
+
+	def __init__(self, max_workers: int | None = None, max_queued: int | None = None):
+		self.max_workers = max(1, int(max_workers or default_transcode_workers()))
+		self.max_queued = max(1, int(max_queued or self.max_workers * 2))
+		self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="csvmusic-transcode")
+		self._lock = threading.Lock()
+		self._room = threading.Condition(self._lock)
+		self._local = threading.local()
+		self._futures: List[Future] = []
+		self._procs: set[subprocess.Popen] = set()
+		self._metrics: List[TranscodeMetrics] = []
+		self._queued = 0
+		self._dropped = 0
+		self.max_queue_depth = 0
+		self.submit_wait_s = 0.0
+		self.cancelled = False
+
+	def submit(self, fn: Callable[[], T], *, label: str = "", on_cancel: Callable[[], None] | None = None) -> "Future[T]":
+		metrics = TranscodeMetrics(label=label)
+		waited_from = time.monotonic()
+		with self._room:
+			while self._queued >= self.max_queued and not self.cancelled:
+				self._room.wait()
+			if self.cancelled:
+				raise TranscodeCancelled("transcode scheduler was cancelled")
+			submitted = time.monotonic()
+			self.submit_wait_s += submitted - waited_from
+			self._queued += 1
+			self.max_queue_depth = max(self.max_queue_depth, self._queued)
+
+		def job():
+			started = time.monotonic()
+			with self._room:
+				self._queued -= 1
+				self._room.notify()
+				dropped = self.cancelled
+				if dropped:
+					self._dropped += 1
+			if dropped:
+				# Run the drop callback on the pool so the future only completes once the caller has been told.
+				if on_cancel is not None:
+					on_cancel()
+				return None
+			metrics.queued_s = started - submitted
+			self._local.metrics = metrics
+			try:
+				result = fn()
+				metrics.ok = True
+				return result
+			finally:
+				self._local.metrics = None
+				metrics.wall_s = time.monotonic() - started
+				with self._lock:
+					self._metrics.append(metrics)
+
+		future = self._pool.submit(job)
+		with self._lock:
+			self._futures.append(future)
+		return future
+
+	def run_process(self, cmd: List[str]) -> subprocess.CompletedProcess[str]:
+		"""Run one ffmpeg command for the current job; same shape as subprocess.run with captured text."""
+		with self._lock:
+			if self.cancelled:
+				raise TranscodeCancelled("transcode scheduler was cancelled")
+			proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **subprocess_kwargs())
+			self._procs.add(proc)
+		try:
+			stderr = proc.stderr.read()
+			proc.stderr.close()
+			cpu_s = _reap(proc)
+		finally:
+			with self._lock:
+				self._procs.discard(proc)
+		metrics: TranscodeMetrics | None = getattr(self._local, "metrics", None)
+		if metrics is not None:
+			metrics.processes += 1
+			metrics.cpu_s = None if cpu_s is None or metrics.cpu_s is None else metrics.cpu_s + cpu_s
+		if self.cancelled:
+			raise TranscodeCancelled("transcode cancelled")
+		return subprocess.CompletedProcess(cmd, proc.returncode, "", stderr.decode("utf-8", errors="replace"))
+
+	def cancel(self) -> None:
+		with self._room:
+			self.cancelled = True
+			self._room.notify_all()
+			queued = self._queued
+			procs = list(self._procs)
+		for proc in procs:
+			try:
+				proc.kill()
+			except Exception:
+				pass
+		log(f"transcode: cancelled queued={queued} running={len(procs)}")
+
+	def pending(self) -> List[Future]:
+		with self._lock:
+			self._futures = [future for future in self._futures if not future.done()]
+			return list(self._futures)
+
+	def metrics(self) -> List[TranscodeMetrics]:
+		with self._lock:
+			return list(self._metrics)
+
+	def stats(self) -> Dict:
+		metrics = self.metrics()
+		cpu = [m.cpu_s for m in metrics if m.cpu_s is not None]
+		return {
+			"workers": self.max_workers,
+			"jobs": len(metrics),
+			"failed": sum(1 for m in metrics if not m.ok),
+			"max_queue_depth": self.max_queue_depth,
+			"dropped": self._dropped,
+			"submit_wait_s": self.submit_wait_s,
+			"queued_s": sum(m.queued_s for m in metrics),
+			"wall_s": sum(m.wall_s for m in metrics),
+			"cpu_s": sum(cpu) if cpu else None,
+		}
+
+	def shutdown(self, wait: bool = True) -> None:
+		# Queued jobs are left to run so a cancelled scheduler still calls each on_cancel.
+		self._pool.shutdown(wait=wait)
+
+
+def _reap(proc: subprocess.Popen) -> float | None:
+	"""Wait for proc and return its user+system CPU seconds where the OS reports them."""
+	if hasattr(os, "wait4"):
+		try:
+			_, status, usage = os.wait4(proc.pid, 0)
+		except ChildProcessError:
+			proc.wait()
+			return None
+		proc.returncode = os.waitstatus_to_exitcode(status)
+		return usage.ru_utime + usage.ru_stime
+	proc.wait()
+	return None
@@ -4,11 +4,15 @@ from dataclasses import dataclass
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
-from yt_dlp import YoutubeDL
-
 from csvmusic.core.import_warnings import incomplete_import_warning
 
 
+def _youtube_dl(options: dict):
+	# yt_dlp takes a noticeable share of app startup; only URL imports need it.
+	from yt_dlp import YoutubeDL
+	return YoutubeDL(options)
+
+
 class WebPlaylistImportError(Exception):
 	pass
 
@@ -33,7 +37,7 @@ def fetch_web_playlist(value: str, platform: str) -> WebPlaylistSource:
 		"ignoreerrors": True,
 	}
 	try:
-		with YoutubeDL(options) as ydl:
+		with _youtube_dl(options) as ydl:
 			info = ydl.extract_info(url, download=False)
 	except Exception as exc:
 		raise WebPlaylistImportError(f"Could not load {platform} playlist. Is it public?") from exc
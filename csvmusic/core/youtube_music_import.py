@@ -4,9 +4,8 @@ from dataclasses import dataclass
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
-from ytmusicapi import YTMusic
-
 from csvmusic.core.import_warnings import incomplete_import_warning
+from csvmusic.core.ytmusic_pool import default_ytmusic_pool
 
 
 class YouTubeMusicImportError(Exception):
@@ -26,7 +25,7 @@ class YouTubeMusicSource:
 def fetch_youtube_music_source(value: str, *, limit: int | None = None) -> YouTubeMusicSource:
 	playlist_id = parse_youtube_playlist_id(value)
 	try:
-		playlist = YTMusic().get_playlist(playlist_id, limit=limit)
+		playlist = default_ytmusic_pool().get_playlist(playlist_id, limit=limit)
 	except Exception as exc:
 		raise YouTubeMusicImportError("Could not load YouTube Music playlist. Is it public?") from exc
 	if not isinstance(playlist, dict):
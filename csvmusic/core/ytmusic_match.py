@@ -1,8 +1,17 @@
 # tabs only
-from typing import Dict, List, Optional, Tuple, Set, Literal
-import re, time, unicodedata
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, Tuple, Set, Literal
+import asyncio, re, time, unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from ytmusicapi import YTMusic
 
+from csvmusic.core.log import log
+from csvmusic.core.match_cache import MatchCache
+from csvmusic.core.rate_limit import TokenBucket
+from csvmusic.core.search_cache import SearchCache, SEARCH_CACHE_FILE
+from csvmusic.core.settings import cache_dir
+from csvmusic.core.ytmusic_pool import YTMusicPool, default_ytmusic_pool
+
 CONFIDENCE_MIN = 0.6
 SEARCH_LIMIT = 12
 ALT_SEARCH_LIMIT = 24
@@ -10,17 +19,31 @@ RATE_LIMIT_S = 0.35
 DURATION_TOLERANCE_RATIO = 0.10
 SEARCH_RETRY_COUNT = 2
 SEARCH_RETRY_SLEEP_S = 0.9
+# find_best stops searching once a candidate scores this high.
+EARLY_EXIT_SCORE = 0.9
+# Shared budget for parallel matching; a single track issues up to 12 searches.
+SEARCH_RATE_PER_S = 4.0
+SEARCH_BURST = 4
+MATCH_CACHE_DURATION_BUCKET_S = 5
+# Concurrent searches the async backend keeps open (one pooled client each).
+ASYNC_SEARCH_IN_FLIGHT = 8
 
 _PENALTY_TERMS = {"live","remix","cover","sped","slowed","nightcore","8d","reverb","extended","mashup","edit","karaoke","instrumental","demo","tribute","soundalike"}
 _CAST_PENALTY_TERMS = {"cast","original cast","tribute band","musical","orchestra"}
 
+_WS_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+", flags=re.UNICODE)
+
 def _norm_text(s: str) -> str:
 	text = unicodedata.normalize("NFKC", (s or "").casefold())
-	return re.sub(r"\s+", " ", text).strip()
+	return _WS_RE.sub(" ", text).strip()
+
+def _norm_toks(text: str) -> set:
+	# \w is alphanumerics plus "_", so a token has an alnum char unless it is all underscores.
+	return {tok for tok in _WORD_RE.findall(text) if tok.strip("_")}
 
 def _toks(s: str) -> set:
-	text = _norm_text(s)
-	return {tok for tok in re.findall(r"\w+", text, flags=re.UNICODE) if any(ch.isalnum() for ch in tok)}
+	return _norm_toks(_norm_text(s))
 
 def _candidate_artist_text(cand: Dict) -> str:
 	if cand.get("artists"):
@@ -79,64 +102,87 @@ def _track_duration_s(track: Dict) -> int:
 	except Exception:
 		return 0
 
-def _duration_within_tolerance(track: Dict, cand: Dict) -> bool:
-	track_s = _track_duration_s(track)
-	cand_s = _duration_s(cand.get("duration_seconds"))
-	if track_s <= 0 or cand_s <= 0:
-		return True
-	return abs(track_s - cand_s) <= max(1.0, track_s * DURATION_TOLERANCE_RATIO)
-
-def _score(track: Dict, cand: Dict) -> float:
-	# Score title and artist separately so "tribute to ARTIST" in the title
-	# does not masquerade as an actual artist match.
-	track_title_tokens = _toks(track.get("title",""))
-	track_artist_tokens = _toks(track.get("artists",""))
-	cand_title = cand.get("title") or ""
-	cand_art = _candidate_artist_text(cand)
-	cand_title_tokens = _toks(cand_title)
-	cand_artist_tokens = _toks(cand_art)
-	title_overlap = _overlap_ratio(track_title_tokens, cand_title_tokens)
-	artist_overlap = _overlap_ratio(track_artist_tokens, cand_artist_tokens)
-
-	# duration (CSV may not have; cand might)
-	sp_s = _track_duration_s(track)
-	yt_s = _duration_s(cand.get("duration_seconds"))
+# One pass rejects the common clean title; only hits pay for the per-term count.
+_ANY_PENALTY_RE = re.compile("|".join(re.escape(t) for t in sorted(_PENALTY_TERMS | _CAST_PENALTY_TERMS | {"tribute", "remaster"})))
+
+def _duration_score(sp_s: int, yt_s: int) -> float:
 	if sp_s > 0 and yt_s > 0:
 		delta = abs(sp_s - yt_s)
 		if delta <= 6:
-			d_score = 1.0
-		elif delta <= 12:
-			d_score = 0.9
-		elif delta <= 20:
-			d_score = 0.78
-		elif delta <= 30:
-			d_score = 0.62
-		else:
-			d_score = 0.45
-	else:
-		d_score = 0.7  # neutral baseline when no duration available
-
-	# channel boost
-	channel = _norm_text(cand.get("author") or "")
-	ch_boost = 0.15 if ("topic" in channel or "official" in channel) else 0.0
-
-	# penalties
-	titleblob = _norm_text(cand_title + " " + cand_art)
-	p_pen = 0.0
-	for t in _PENALTY_TERMS:
-		if t in titleblob:
-			p_pen += 0.10
-	if artist_overlap == 0.0:
-		for t in _CAST_PENALTY_TERMS:
-			if t in titleblob:
-				p_pen += 0.18
-	if "tribute" in titleblob and artist_overlap < 0.5:
-		p_pen += 0.25
-	if "remaster" in titleblob:
-		p_pen *= 0.6
-
-	total = max(0.0, d_score * 0.35 + title_overlap * 0.35 + artist_overlap * 0.25 + ch_boost - p_pen)
-	return min(total, 0.99)
+			return 1.0
+		if delta <= 12:
+			return 0.9
+		if delta <= 20:
+			return 0.78
+		if delta <= 30:
+			return 0.62
+		return 0.45
+	return 0.7
+
+
+class CandidateScorer:
+	"""
+	Scores candidates for one track. Title and artist are scored separately so
+	"tribute to ARTIST" in a title does not masquerade as an artist match.
+	Track features are computed once; candidate text features are memoized
+	across every search response scored for the track, and one compiled regex
+	skips the per-term penalty scan for titles that carry none of the terms.
+	"""
+
+	def __init__(self, track: Dict):
+		self.title_tokens = _toks(track.get("title", ""))
+		self.artist_tokens = _toks(track.get("artists", ""))
+		self.duration_s = _track_duration_s(track)
+		self._norm: Dict[str, str] = {}
+		self._text: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+
+	def _norm_text(self, text: str) -> str:
+		out = self._norm.get(text)
+		if out is None:
+			out = self._norm[text] = _norm_text(text)
+		return out
+
+	def _text_features(self, cand_title: str, cand_art: str) -> Tuple[float, float, float]:
+		"""(title overlap, artist overlap, penalty) for one title/artist pair."""
+		key = (cand_title, cand_art)
+		feats = self._text.get(key)
+		if feats is not None:
+			return feats
+		norm_title = self._norm_text(cand_title)
+		norm_art = self._norm_text(cand_art)
+		title_overlap = _overlap_ratio(self.title_tokens, _norm_toks(norm_title))
+		artist_overlap = _overlap_ratio(self.artist_tokens, _norm_toks(norm_art))
+		# A space never composes under NFKC, so this equals _norm_text(title + " " + artists).
+		titleblob = f"{norm_title} {norm_art}".strip()
+		p_pen = 0.0
+		if _ANY_PENALTY_RE.search(titleblob):
+			for t in _PENALTY_TERMS:
+				if t in titleblob:
+					p_pen += 0.10
+			if artist_overlap == 0.0:
+				for t in _CAST_PENALTY_TERMS:
+					if t in titleblob:
+						p_pen += 0.18
+			if "tribute" in titleblob and artist_overlap < 0.5:
+				p_pen += 0.25
+			if "remaster" in titleblob:
+				p_pen *= 0.6
+		feats = self._text[key] = (title_overlap, artist_overlap, p_pen)
+		return feats
+
+	def score(self, cand: Dict) -> float:
+		title_overlap, artist_overlap, p_pen = self._text_features(cand.get("title") or "", _candidate_artist_text(cand))
+		d_score = _duration_score(self.duration_s, _duration_s(cand.get("duration_seconds")))
+		channel = self._norm_text(cand.get("author") or "")
+		ch_boost = 0.15 if ("topic" in channel or "official" in channel) else 0.0
+		total = max(0.0, d_score * 0.35 + title_overlap * 0.35 + artist_overlap * 0.25 + ch_boost - p_pen)
+		return min(total, 0.99)
+
+	def score_many(self, cands: List[Dict]) -> List[float]:
+		return [self.score(cand) for cand in cands]
+
+def score_candidates(track: Dict, cands: List[Dict]) -> List[float]:
+	return CandidateScorer(track).score_many(cands)
 
 def _clean_title_artist(title: str, artists: str) -> str:
 	# Basic collapse of whitespace and stray separators for searching
@@ -203,6 +249,31 @@ def _query_variants(track: Dict) -> List[str]:
 SearchSource = Literal["music", "videos", "all"]
 
 
+class RateLimitedClient:
+	"""Wrap a YTMusic client so every search draws from a shared token bucket."""
+
+	def __init__(self, client: YTMusic, bucket: TokenBucket):
+		self.client = client
+		self.bucket = bucket
+
+	def search(self, *args, **kwargs):
+		self.bucket.acquire()
+		return self.client.search(*args, **kwargs)
+
+
+@contextmanager
+def _retry_client(yt):
+	"""
+	A newly built client for a retry, leased from the caller's pool and kept
+	behind the caller's rate limit: retries happen when the service throttles.
+	"""
+	bucket = yt.bucket if isinstance(yt, RateLimitedClient) else None
+	inner = yt.client if bucket is not None else yt
+	pool = inner if isinstance(inner, YTMusicPool) else default_ytmusic_pool()
+	with pool.lease(fresh=True) as fresh:
+		yield RateLimitedClient(fresh, bucket) if bucket is not None else fresh
+
+
 def _search_filter(yt: YTMusic, q: str, search_filter: str, limit: int) -> List[Dict]:
 	res = yt.search(q, filter=search_filter, limit=limit) or []
 	cands: List[Dict] = []
@@ -225,85 +296,297 @@ def _search_filter(yt: YTMusic, q: str, search_filter: str, limit: int) -> List[
 	return cands
 
 
-def _search(yt: YTMusic, q: str, limit: int = SEARCH_LIMIT, source_mode: SearchSource = "all") -> List[Dict]:
-	cands: List[Dict] = []
-	if source_mode in ("music", "all"):
-		cands.extend(_search_filter(yt, q, "songs", limit))
-	if source_mode in ("videos", "all"):
-		cands.extend(_search_filter(yt, q, "videos", limit))
-	return cands
+# Shared by every caller in the process; variants often repeat across tracks.
+SEARCH_CACHE = SearchCache()
 
 
-def _rank_candidates(yt: YTMusic, track: Dict, limit: int = SEARCH_LIMIT, source_mode: SearchSource = "all") -> List[Dict]:
-	seen_vids: Set[str] = set()
-	all_cands: List[Dict] = []
-	for q in _query_variants(track):
-		cands = _search(yt, q, limit, source_mode)
-		for cand in cands:
-			vid = cand.get("videoId")
-			if not vid or vid in seen_vids:
-				continue
-			seen_vids.add(vid)
-			all_cands.append(cand)
+def enable_search_disk_cache() -> None:
+	SEARCH_CACHE.enable_disk(cache_dir() / SEARCH_CACHE_FILE)
 
-	scored: List[Dict] = []
-	for cand in all_cands:
-		if not _duration_within_tolerance(track, cand):
+
+def _cached_search_filter(yt: YTMusic, q: str, search_filter: str, limit: int) -> List[Dict]:
+	key = (_norm_text(q), search_filter, int(limit))
+	return SEARCH_CACHE.get_or_fetch(key, lambda: _search_filter(yt, q, search_filter, limit))
+
+
+def _search_plan(track: Dict, source_mode: SearchSource = "all") -> List[Tuple[str, str]]:
+	"""(query, filter) pairs in request order: every variant as a song first, then as a video."""
+	filters: List[str] = []
+	if source_mode in ("music", "all"):
+		filters.append("songs")
+	if source_mode in ("videos", "all"):
+		filters.append("videos")
+	variants = _query_variants(track)
+	return [(q, search_filter) for search_filter in filters for q in variants]
+
+
+def _add_scored(scorer: CandidateScorer, cands: List[Dict], seen_vids: Set[str], scored: List[Dict]) -> float:
+	"""Score unseen candidates within duration tolerance into scored; return the best new score."""
+	track_s = scorer.duration_s
+	tolerance = max(1.0, track_s * DURATION_TOLERANCE_RATIO)
+	fresh: List[Dict] = []
+	for cand in cands:
+		vid = cand.get("videoId")
+		if not vid or vid in seen_vids:
 			continue
-		s = _score(track, cand)
+		seen_vids.add(vid)
+		cand_s = _duration_s(cand.get("duration_seconds"))
+		if track_s > 0 and cand_s > 0 and abs(track_s - cand_s) > tolerance:
+			continue
+		fresh.append(cand)
+	best_score = 0.0
+	for cand, score in zip(fresh, scorer.score_many(fresh)):
 		item = dict(cand)
-		item["score"] = s
+		item["score"] = score
+		best_score = max(best_score, score)
 		scored.append(item)
+	return best_score
+
 
+def _log_requests(track: Dict, requests: int, planned: int, best_score: float) -> None:
+	log(
+		f"match requests: query='{track.get('title', '')} {track.get('artists', '')}' "
+		f"requests={requests}/{planned} best={best_score:.2f} early_exit={requests < planned}"
+	)
+
+
+def _sorted_options(scored: List[Dict]) -> List[Dict]:
 	return sorted(scored, key=lambda c: (c["score"], 1 if c.get("source") == "music" else 0), reverse=True)
 
-def find_best(yt: YTMusic, track: Dict) -> Tuple[Optional[Dict], float, List[Dict]]:
-	options = _rank_candidates(yt, track)
-	if not options:
-		last_exc: Exception | None = None
-		for _ in range(SEARCH_RETRY_COUNT):
-			time.sleep(SEARCH_RETRY_SLEEP_S)
-			try:
-				fresh = YTMusic()
-				options = _rank_candidates(fresh, track)
-			except Exception as exc:
-				last_exc = exc
-				continue
-			if options:
-				break
-		if not options and last_exc is not None:
-			raise last_exc
+
+def _ranking(track: Dict, limit: int, source_mode: SearchSource, early_exit_score: float | None) -> Generator[Tuple[str, str, int], List[Dict], List[Dict]]:
+	"""
+	The search plan for one track, shared by _rank_candidates and
+	AsyncSearchClient.rank: yields each (query, filter, limit) search, is sent
+	its results, and returns the sorted options. With early_exit_score set it
+	stops once any candidate reaches it.
+	"""
+	plan = _search_plan(track, source_mode)
+	scorer = CandidateScorer(track)
+	seen_vids: Set[str] = set()
+	scored: List[Dict] = []
+	best_score = 0.0
+	requests = 0
+	for q, search_filter in plan:
+		requests += 1
+		results = yield q, search_filter, limit
+		best_score = max(best_score, _add_scored(scorer, results, seen_vids, scored))
+		if early_exit_score is not None and best_score >= early_exit_score:
+			break
+	_log_requests(track, requests, len(plan), best_score)
+	return _sorted_options(scored)
+
+def _rank_candidates(yt: YTMusic, track: Dict, limit: int = SEARCH_LIMIT, source_mode: SearchSource = "all", *, use_cache: bool = True, early_exit_score: float | None = None) -> List[Dict]:
+	"""
+	Score candidates as each search returns. With early_exit_score set, stop
+	issuing searches once any candidate reaches it; otherwise run the full plan.
+	"""
+	search = _cached_search_filter if use_cache else _search_filter
+	ranking = _ranking(track, limit, source_mode, early_exit_score)
+	try:
+		request = next(ranking)
+		while True:
+			request = ranking.send(search(yt, *request))
+	except StopIteration as done:
+		return done.value
+
+def match_cache_keys(track: Dict) -> List[str]:
+	"""Identity keys for a track, most specific first: ISRC, Spotify ID, then normalized text."""
+	keys: List[str] = []
+	isrc = str(track.get("isrc") or "").strip().upper()
+	if isrc:
+		keys.append(f"isrc:{isrc}")
+	sp_id = str(track.get("sp_id") or "").strip()
+	if sp_id:
+		keys.append(f"sp:{sp_id}")
+	title = _norm_text(track.get("title", ""))
+	artists = _norm_text(track.get("artists", ""))
+	if title or artists:
+		bucket = _track_duration_s(track) // MATCH_CACHE_DURATION_BUCKET_S
+		keys.append(f"text:{title}|{artists}|{bucket}")
+	return keys
+
+def _best_of(options: List[Dict]) -> Tuple[Optional[Dict], float, List[Dict]]:
 	if not options:
 		return None, 0.0, []
 	best = options[0]
 	return (best if best["score"] >= CONFIDENCE_MIN else None, best["score"], options)
 
+def _ranking_complete(options: List[Dict], early_exit_score: float | None) -> bool:
+	"""
+	Whether options came from the full search plan. A ranking whose best score
+	reached early_exit_score may have stopped early and holds only the first
+	searches' candidates, so it is not worth caching for callers that later
+	need the rest.
+	"""
+	if not options:
+		return False
+	return early_exit_score is None or options[0]["score"] < early_exit_score
+
+def cached_match(track: Dict, cache: MatchCache | None) -> Optional[Tuple[Optional[Dict], float, List[Dict]]]:
+	if cache is None:
+		return None
+	options = cache.get(match_cache_keys(track))
+	return _best_of(options) if options else None
+
+def _matching(track: Dict, cache: MatchCache | None, refresh: bool, early_exit_score: float | None) -> Generator[int, List[Dict], Tuple[Optional[Dict], float, List[Dict]]]:
+	"""
+	Cache lookup, retries and cache write-back for one track, shared by
+	find_best and AsyncSearchClient.find_best. Yields the attempt number (0,
+	then a retry after each empty ranking) and is sent that attempt's ranking.
+	A failed first attempt raises; failed retries raise only if none succeeds.
+	"""
+	if not refresh:
+		cached = cached_match(track, cache)
+		if cached is not None:
+			return cached
+	options = yield 0
+	last_exc: Exception | None = None
+	for attempt in range(1, SEARCH_RETRY_COUNT + 1):
+		if options:
+			break
+		try:
+			options = yield attempt
+		except Exception as exc:
+			last_exc = exc
+	if not options and last_exc is not None:
+		raise last_exc
+	if cache is not None and _ranking_complete(options, early_exit_score):
+		cache.put(match_cache_keys(track), options)
+	return _best_of(options)
+
+def find_best(yt: YTMusic, track: Dict, *, cache: MatchCache | None = None, refresh: bool = False, early_exit_score: float | None = EARLY_EXIT_SCORE) -> Tuple[Optional[Dict], float, List[Dict]]:
+	"""
+	Rank YouTube Music candidates for one track. With a cache, a stored ranking
+	is returned without any network call unless refresh is set; fresh rankings
+	from the full search plan are written back either way. Pass
+	early_exit_score=None to run every search.
+	"""
+	matching = _matching(track, cache, refresh, early_exit_score)
+	try:
+		attempt = next(matching)
+		while True:
+			try:
+				if attempt == 0:
+					options = _rank_candidates(yt, track, use_cache=not refresh, early_exit_score=early_exit_score)
+				else:
+					time.sleep(SEARCH_RETRY_SLEEP_S)
+					with _retry_client(yt) as fresh:
+						options = _rank_candidates(fresh, track, use_cache=not refresh, early_exit_score=early_exit_score)
+			except Exception as exc:
+				attempt = matching.throw(exc)
+			else:
+				attempt = matching.send(options)
+	except StopIteration as done:
+		return done.value
+
 def more_candidates(track: Dict, exclude_ids: Set[str] | None = None, limit: int = ALT_SEARCH_LIMIT, source_mode: SearchSource = "all") -> List[Dict]:
 	exclude = set(exclude_ids or [])
-	yt = YTMusic()
-	options = _rank_candidates(yt, track, limit, source_mode)
+	options = _rank_candidates(default_ytmusic_pool(), track, limit, source_mode)
 	return [opt for opt in options if opt.get("videoId") not in exclude]
 
-def batch_match(tracks: List[Dict]) -> List[Dict]:
+def batch_match(tracks: List[Dict], *, cache: MatchCache | None = None, refresh: bool = False) -> List[Dict]:
 	"""
 	Input: list of track dicts (from csv_import.tracks_from_csv)
 	Output: list of results with either 'match' or 'skipped': True
+	Cached tracks are answered without searching or pacing.
 	"""
-	yt = YTMusic()  # anonymous client; should work for public search endpoints
-	results = []
+	return list(iter_matches(tracks, cache=cache, refresh=refresh))
+
+
+def iter_matches(tracks: Iterable[Dict], *, cache: MatchCache | None = None, refresh: bool = False) -> Iterator[Dict]:
+	"""batch_match one track at a time, so a streamed CSV is matched while it is still being read."""
+	yt = default_ytmusic_pool()  # anonymous clients; should work for public search endpoints
 	for t in tracks:
-		res = {"track": t, "skipped": False, "match": None, "confidence": 0.0, "options": []}
+		cached = None if refresh else cached_match(t, cache)
 		try:
-			match, conf, options = find_best(yt, t)
-			res["confidence"] = conf
-			res["options"] = options
-			if match is None:
-				res["skipped"] = True
-			else:
-				res["match"] = match
+			found = cached if cached is not None else find_best(yt, t, cache=cache, refresh=refresh)
 		except Exception as e:
-			res["skipped"] = True
-			res["error"] = str(e)
-		results.append(res)
-		time.sleep(RATE_LIMIT_S)
-	return results
+			yield _match_result(t, error=e)
+		else:
+			yield _match_result(t, found)
+		if cached is None:
+			time.sleep(RATE_LIMIT_S)
+
+
+def _match_result(track: Dict, found: Tuple[Optional[Dict], float, List[Dict]] | None = None, *, error: Exception | None = None) -> Dict:
+	"""One batch_match entry: the match, or skipped for low confidence or a search error."""
+	match, conf, options = found or (None, 0.0, [])
+	res = {"track": track, "skipped": match is None, "match": match, "confidence": conf, "options": options}
+	if error is not None:
+		res["error"] = str(error)
+	return res
+
+
+class AsyncSearchClient:
+	"""
+	Keep many tracks' searches in flight under one shared rate limit.
+	ytmusicapi has no async transport, so each search leases a pooled client
+	(its own keep-alive requests session) on a bounded executor while the
+	event loop schedules the rest. Results have the _search_filter shape.
+	"""
+
+	def __init__(self, *, max_in_flight: int = ASYNC_SEARCH_IN_FLIGHT, bucket: TokenBucket | None = None, pool: YTMusicPool | None = None, cache: MatchCache | None = None, use_search_cache: bool = True):
+		self.max_in_flight = max(1, int(max_in_flight))
+		self.bucket = bucket or TokenBucket(SEARCH_RATE_PER_S, SEARCH_BURST)
+		self.pool = pool or default_ytmusic_pool()
+		self.cache = cache
+		self.use_search_cache = use_search_cache
+		self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="ytm-async")
+
+	async def search(self, q: str, search_filter: str, limit: int = SEARCH_LIMIT) -> List[Dict]:
+		wait = self.bucket.reserve()
+		if wait > 0:
+			await asyncio.sleep(wait)
+		search = _cached_search_filter if self.use_search_cache else _search_filter
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(self._executor, search, self.pool, q, search_filter, limit)
+
+	async def rank(self, track: Dict, limit: int = SEARCH_LIMIT, source_mode: SearchSource = "all", *, early_exit_score: float | None = None) -> List[Dict]:
+		"""Async counterpart of _rank_candidates: same plan, order and early exit."""
+		ranking = _ranking(track, limit, source_mode, early_exit_score)
+		try:
+			request = next(ranking)
+			while True:
+				request = ranking.send(await self.search(*request))
+		except StopIteration as done:
+			return done.value
+
+	async def find_best(self, track: Dict, *, refresh: bool = False, early_exit_score: float | None = EARLY_EXIT_SCORE) -> Tuple[Optional[Dict], float, List[Dict]]:
+		"""Async counterpart of find_best: same cache use and retries."""
+		matching = _matching(track, self.cache, refresh, early_exit_score)
+		try:
+			attempt = next(matching)
+			while True:
+				if attempt:
+					await asyncio.sleep(SEARCH_RETRY_SLEEP_S)
+				try:
+					options = await self.rank(track, early_exit_score=early_exit_score)
+				except Exception as exc:
+					attempt = matching.throw(exc)
+				else:
+					attempt = matching.send(options)
+		except StopIteration as done:
+			return done.value
+
+	async def match_many(self, tracks: List[Dict], *, refresh: bool = False) -> List[Dict]:
+		"""batch_match result shape, computed with every track's searches interleaved."""
+		async def one(t: Dict) -> Dict:
+			try:
+				found = await self.find_best(t, refresh=refresh)
+			except Exception as e:
+				return _match_result(t, error=e)
+			return _match_result(t, found)
+		return list(await asyncio.gather(*[one(t) for t in tracks]))
+
+	def close(self) -> None:
+		self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def batch_match_async(tracks: List[Dict], *, cache: MatchCache | None = None, refresh: bool = False, max_in_flight: int = ASYNC_SEARCH_IN_FLIGHT, bucket: TokenBucket | None = None, pool: YTMusicPool | None = None) -> List[Dict]:
+	"""Drop-in for batch_match that runs the searches through AsyncSearchClient."""
+	client = AsyncSearchClient(max_in_flight=max_in_flight, bucket=bucket, pool=pool, cache=cache, use_search_cache=not refresh)
+	try:
+		return asyncio.run(client.match_many(tracks, refresh=refresh))
+	finally:
+		client.close()
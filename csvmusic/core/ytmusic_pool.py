@@ -0,0 +1,131 @@
+# tabs only
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+from ytmusicapi import YTMusic
+
+from csvmusic.core.log import log
+
+# Idle clients kept warm; matches the widest search pool the UI allows.
+POOL_MAX_IDLE = 8
+# Consecutive errors after which a client is dropped and rebuilt on next lease.
+POOL_MAX_FAILURES = 3
+
+
+class YTMusicPool:
+	"""
+	Process-wide pool of anonymous YTMusic clients. Each client owns a
+	keep-alive requests session, so reusing it skips header/context setup and
+	the TLS handshake. A client that keeps raising is retired.
+	"""
+
+	def __init__(self, factory: Callable[[], YTMusic] | None = None, *, max_idle: int = POOL_MAX_IDLE, max_failures: int = POOL_MAX_FAILURES):
+		self._factory = factory
+		self.max_idle = max(1, int(max_idle))
+		self.max_failures = max(1, int(max_failures))
+		self._idle: List[object] = []
+		self._failures: Dict[int, int] = {}
+		self._lock = threading.Lock()
+		self.created = 0
+		self.reused = 0
+		self.retired = 0
+
+	def _build(self):
+		client = (self._factory or YTMusic)()
+		with self._lock:
+			self.created += 1
+		return client
+
+	def _checkout(self, fresh: bool):
+		if not fresh:
+			with self._lock:
+				if self._idle:
+					self.reused += 1
+					return self._idle.pop()
+		return self._build()
+
+	def _checkin(self, client, failed: bool) -> None:
+		key = id(client)
+		with self._lock:
+			if failed:
+				count = self._failures.get(key, 0) + 1
+				if count >= self.max_failures:
+					self._failures.pop(key, None)
+					self.retired += 1
+					retire = True
+				else:
+					self._failures[key] = count
+					retire = False
+			else:
+				self._failures.pop(key, None)
+				retire = False
+			if not retire:
+				self._idle.append(client)
+				if len(self._idle) <= self.max_idle:
+					return
+				client = self._idle.pop(0)
+				self._failures.pop(id(client), None)
+		if retire:
+			log(f"ytmusic pool: retiring client after {self.max_failures} consecutive errors")
+		_close(client)
+
+	@contextmanager
+	def lease(self, *, fresh: bool = False) -> Iterator[YTMusic]:
+		"""Borrow a client; fresh builds a new one instead of reusing an idle client."""
+		client = self._checkout(fresh)
+		try:
+			yield client
+		except BaseException:
+			self._checkin(client, failed=True)
+			raise
+		else:
+			self._checkin(client, failed=False)
+
+	def search(self, *args, **kwargs):
+		with self.lease() as client:
+			return client.search(*args, **kwargs)
+
+	def get_playlist(self, *args, **kwargs):
+		with self.lease() as client:
+			return client.get_playlist(*args, **kwargs)
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {"created": self.created, "reused": self.reused, "retired": self.retired, "idle": len(self._idle)}
+
+	def clear(self) -> None:
+		with self._lock:
+			idle, self._idle = self._idle, []
+			self._failures.clear()
+		for client in idle:
+			_close(client)
+
+
+def _close(client) -> None:
+	session = getattr(client, "_session", None)
+	try:
+		if session is not None:
+			session.close()
+	except Exception:
+		pass
+
+
+_DEFAULT_POOL: YTMusicPool | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_ytmusic_pool() -> YTMusicPool:
+	global _DEFAULT_POOL
+	with _DEFAULT_LOCK:
+		if _DEFAULT_POOL is None:
+			_DEFAULT_POOL = YTMusicPool()
+		return _DEFAULT_POOL
+
+
+def set_default_ytmusic_pool(pool: YTMusicPool | None) -> YTMusicPool | None:
+	"""Install the process-wide pool (None rebuilds lazily); returns the previous one."""
+	global _DEFAULT_POOL
+	with _DEFAULT_LOCK:
+		previous, _DEFAULT_POOL = _DEFAULT_POOL, pool
+		return previous
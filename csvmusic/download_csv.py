@@ -1,10 +1,14 @@
 # tabs only
-import sys, pathlib, time, argparse, traceback
+import itertools, sys, pathlib, time, argparse, traceback
 from typing import Optional
-from csvmusic.core.csv_import import load_csv, tracks_from_csv
-from csvmusic.core.ytmusic_match import batch_match
+from csvmusic.core.csv_import import iter_csv_tracks
+from csvmusic.core.cover_art import track_cover_bytes
+from csvmusic.core.library_store import LIBRARY_DIR, LibraryStore
+from csvmusic.core.match_cache import default_match_cache
+from csvmusic.core.track_output import retag_playlist
+from csvmusic.core.ytmusic_match import enable_search_disk_cache, iter_matches, SEARCH_CACHE
 from csvmusic.core.downloader import (
-	download_m4a, download_mp3, tag_file, yt_thumbnail_bytes, write_m3u, sanitize_name
+	download_m4a, download_mp3, tag_file, write_m3u, sanitize_name
 )
 
 def main(argv: list[str]) -> int:
@@ -18,6 +22,9 @@ def main(argv: list[str]) -> int:
 	parser.add_argument("--format", choices=["m4a","mp3"], default="m4a", help="Output format")
 	parser.add_argument("--cbr320", action="store_true", help="MP3 320 kbps CBR (default is V0)")
 	parser.add_argument("--no-m3u", action="store_true", help="Do not write an .m3u8 file")
+	parser.add_argument("--refresh-matches", action="store_true", help="Ignore cached matches and search again")
+	parser.add_argument("--library", action="store_true", help="Keep one copy of each song under the output folder and link it into playlist folders")
+	parser.add_argument("--retag-only", action="store_true", help="Rewrite tags on files already in the output folder; no search or download")
 	parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
 	args = parser.parse_args(argv[1:])
 
@@ -32,66 +39,78 @@ def main(argv: list[str]) -> int:
 		print(f"[cfg] playlist={args.playlist!r}")
 		print(f"[cfg] format={fmt} cbr320={args.cbr320} m3u={write_m3u_flag}")
 
-	# Load + select
-	df = load_csv(csv_path)
-	tracks = tracks_from_csv(df, args.playlist)
-	if args.verbose:
-		print(f"[csv] detected playlists: {len(set(df['Playlist name'])) if 'Playlist name' in df.columns else 0}")
-	if not tracks:
+	# Stream the CSV: each track is matched and downloaded while later rows are still being read.
+	tracks = iter_csv_tracks(csv_path, args.playlist)
+	first = next(tracks, None)
+	if first is None:
 		print("No tracks selected.")
 		return 1
-	print(f"Tracks selected: {len(tracks)}")
+	tracks = itertools.chain([first], tracks)
+	playlist_name = args.playlist or first["playlist"] or "Playlist"
 
-	# Match (YT Music only)
-	if args.verbose:
-		print("[match] starting YT Music matching…")
-	results = batch_match(tracks)
-	ok = [r for r in results if not r.get("skipped")]
-	sk = [r for r in results if r.get("skipped")]
-	print(f"Matched: {len(ok)} | Skipped: {len(sk)}")
-	if args.verbose:
-		for r in results[:10]:
-			t = r["track"]
-			if r.get("skipped"):
-				print(f"  [SKIP] {t['artists']} — {t['title']}")
-			else:
-				m = r["match"]; conf = r["confidence"]
-				print(f"  [OK {conf:.2f}] {t['artists']} — {t['title']} -> {m['title']} (id={m['videoId']})")
+	if args.retag_only:
+		selected = [dict(t, playlist=playlist_name) for t in tracks]
+		print(f"Tracks selected: {len(selected)}")
+		report = retag_playlist(selected, out_root, fmt)
+		print(f"Retagged: {report.tagged} | Missing: {report.missing} | Failed: {report.failed}")
+		return 1 if report.failed else 0
 
 	# Prepare output folders
-	playlist_name = args.playlist or (tracks[0]["playlist"] if tracks else "Playlist")
-	if not playlist_name:
-		playlist_name = "Playlist"
 	safe_playlist = sanitize_name(playlist_name) or "Playlist"
 	dest_dir = out_root / safe_playlist
 	dest_dir.mkdir(parents=True, exist_ok=True)
 
+	library = LibraryStore(out_root / LIBRARY_DIR) if args.library else None
+	# Same encoder setting as the GUI's legacy 320 kbps CBR, so both share library entries.
+	cbr_bitrate = 320 if args.cbr320 else None
 	done_tracks = []
-	for r in results:
+	matched = skipped = 0
+
+	# Match (YT Music only)
+	if args.verbose:
+		print("[match] starting YT Music matching…")
+	enable_search_disk_cache()
+	for r in iter_matches(tracks, cache=default_match_cache(), refresh=args.refresh_matches):
 		t = r["track"]
 		title = t["title"]; artists = t["artists"]
 		base = f"{artists} - {title}"
 		if r.get("skipped"):
+			skipped += 1
 			print(f"[SKIP] {artists} — {title}")
 			continue
+		matched += 1
+		if args.verbose:
+			m = r["match"]; conf = r["confidence"]
+			print(f"  [OK {conf:.2f}] {artists} — {title} -> {m['title']} (id={m['videoId']})")
 		vid = r["match"]["videoId"]
 		try:
 			if args.verbose:
 				print(f"[dl] {artists} — {title} (id={vid}) → {fmt}")
-			if fmt == "m4a":
-				fp = download_m4a(vid, dest_dir, base)
-			else:
-				fp = download_mp3(vid, dest_dir, base, cbr_320=args.cbr320)
-			cover = yt_thumbnail_bytes(vid)  # best-effort cover
-			tag_file(fp, t, cover)
+			canonical = library.path_for(vid, fmt, cbr_bitrate_kbps=cbr_bitrate) if library else None
+			fp = dest_dir / f"{sanitize_name(base)}.{fmt}"
+			cover = track_cover_bytes(t, vid)  # best-effort cover
+			if canonical is None or library.link_into(canonical, fp, lambda path: tag_file(path, t, cover)) is None:
+				if fmt == "m4a":
+					fp = download_m4a(vid, dest_dir, base)
+				else:
+					fp = download_mp3(vid, dest_dir, base, cbr_bitrate_kbps=cbr_bitrate)
+				# Tagged before it joins the library, so the stored file is never re-tagged.
+				tag_file(fp, t, cover)
+				if canonical is not None:
+					library.adopt(fp, canonical)
 			print(f"[OK] {artists} — {title}  ->  {fp.name}")
-			done_tracks.append(t)
+			done_tracks.append(dict(t, library_path=str(canonical)) if canonical else t)
 		except Exception as e:
 			if args.verbose:
 				traceback.print_exc()
 			print(f"[FAIL] {artists} — {title}: {str(e)[:140]}")
 		time.sleep(0.05)
 
+	print(f"Tracks selected: {matched + skipped} | Matched: {matched} | Skipped: {skipped}")
+	if args.verbose:
+		stats = SEARCH_CACHE.stats()
+		print(f"[match] search cache: hits={stats['hits']} disk_hits={stats['disk_hits']} misses={stats['misses']} coalesced={stats['coalesced']}")
+
 	# M3U
 	if write_m3u_flag and done_tracks:
 		ext = "m4a" if fmt == "m4a" else "mp3"
@@ -1,23 +1,32 @@
 # tabs only
 import sys
-from csvmusic.core.csv_import import load_csv, tracks_from_csv
-from csvmusic.core.ytmusic_match import batch_match
+from csvmusic.core.csv_import import iter_csv_tracks
+from csvmusic.core.match_cache import default_match_cache
+from csvmusic.core.ytmusic_match import batch_match_async, enable_search_disk_cache, iter_matches, SEARCH_CACHE
 
 def main(argv):
 	if len(argv) < 2:
-		print("Usage: python -m csvmusic.match_csv <csv_path> [--playlist \"Playlist Name\"]")
+		print("Usage: python -m csvmusic.match_csv <csv_path> [--playlist \"Playlist Name\"] [--refresh] [--async]")
 		return 2
 	csv = argv[1]
 	pl = None
 	if len(argv) >= 4 and argv[2] == "--playlist":
 		pl = argv[3]
-	df = load_csv(csv)
-	tracks = tracks_from_csv(df, pl)
-	print(f"Tracks to match: {len(tracks)}")
-	results = batch_match(tracks)
+	refresh = "--refresh" in argv[2:]
+	use_async = "--async" in argv[2:]
+	tracks = iter_csv_tracks(csv, pl)
+	enable_search_disk_cache()
+	if use_async:
+		results = batch_match_async(list(tracks), cache=default_match_cache(), refresh=refresh)
+	else:
+		# Searches start while the rest of the CSV is still being read.
+		results = list(iter_matches(tracks, cache=default_match_cache(), refresh=refresh))
+	print(f"Tracks matched: {len(results)}")
 	done = sum(1 for r in results if not r["skipped"])
 	skipped = len(results) - done
 	print(f"Matched: {done}  |  Skipped: {skipped}")
+	stats = SEARCH_CACHE.stats()
+	print(f"Search cache: {stats['hits']} hits, {stats['disk_hits']} disk hits, {stats['misses']} misses, {stats['coalesced']} coalesced")
 	for r in results[:10]:
 		t = r["track"]
 		if r["skipped"]:
@@ -14,15 +14,16 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QSignalBlocker, QUrl, Signal, QRect, QSize, QTimer
 from PySide6.QtGui import QColor, QFont, QIcon, QPixmap, QFontDatabase, QGuiApplication, QDesktopServices, QPainter, QPen
 
-from csvmusic.core.csv_import import load_csv, tracks_from_csv
+from csvmusic.core.csv_import import iter_csv_tracks
 from csvmusic.core.settings import load_settings, save_settings
 from csvmusic.core.update_check import UpdateInfo, should_check_for_updates, update_check_timestamp
-from csvmusic.core.downloader import sanitize_name, youtube_batch_mitigation
+from csvmusic.core.downloader import sanitize_name, youtube_batch_mitigation, NORMALIZE_MODE_REPLAYGAIN, NORMALIZE_MODE_STATIC
 from csvmusic.core.preflight import run_preflight_checks
 from csvmusic.core.output_folder import OutputFolderError, validate_output_folder
+from csvmusic.core.dir_index import file_exists
 from csvmusic.core.track_output import expected_track_path, plan_track_outputs
 from csvmusic.core.paths import app_icon_path, resource_base
-from csvmusic.ui.workers import PipelineWorker, SingleDownloadWorker, CookiesCheckWorker, AlternativesFetchWorker, MusicURLImportWorker, UpdateCheckWorker
+from csvmusic.ui.workers import PipelineWorker, SingleDownloadWorker, CookiesCheckWorker, AlternativesFetchWorker, MusicURLImportWorker, StartupProbeWorker, UpdateCheckWorker
 from csvmusic.version import APP_VERSION
 from csvmusic.core.browsers import list_profiles
 from csvmusic.core.youtube_url import YouTubeVideoUrlError, parse_youtube_video_id
@@ -302,6 +303,8 @@ class MainWindow(QMainWindow):
 		self._allow_path_persist = False
 		self.cookie_check_worker: CookiesCheckWorker | None = None
 		self.update_check_worker: UpdateCheckWorker | None = None
+		self.startup_probe_worker: StartupProbeWorker | None = None
+		self._background_started = False
 		icon_p = app_icon_path()
 		if icon_p:
 			self.setWindowIcon(QIcon(str(icon_p)))
@@ -734,13 +737,20 @@ class MainWindow(QMainWindow):
 		eq_layout.addWidget(self.cb_eq_enabled)
 		self.cb_eq_normalize = QCheckBox("Match volume between tracks")
 		self.cb_eq_normalize.setFont(QFont(retro_font_family, default_pt + 1, QFont.Bold))
+		self.cb_eq_normalize.toggled.connect(lambda _=None: self._sync_replaygain_enabled())
 		self.cb_eq_normalize.toggled.connect(lambda _=None: self._persist_settings())
 		eq_layout.addWidget(self.cb_eq_normalize)
+		# A way of matching volume, so it only applies while normalizing is on.
+		self.cb_eq_replaygain = QCheckBox("Level with ReplayGain tags (faster, player applies it)")
+		self.cb_eq_replaygain.setFont(QFont(retro_font_family, default_pt))
+		self.cb_eq_replaygain.toggled.connect(lambda _=None: self._persist_settings())
+		eq_layout.addWidget(self.cb_eq_replaygain)
 		self.slider_volume, self.lbl_volume_value, self.lbl_volume = self._make_eq_slider(eq_layout, "Output Gain", retro_font_family, default_pt)
 		self.slider_bass, self.lbl_bass_value, self.lbl_bass = self._make_eq_slider(eq_layout, "Bass", retro_font_family, default_pt)
 		self.slider_treble, self.lbl_treble_value, self.lbl_treble = self._make_eq_slider(eq_layout, "Treble", retro_font_family, default_pt)
 		self._equalizer_child_controls = [
 			self.cb_eq_normalize,
+			self.cb_eq_replaygain,
 			self.lbl_volume,
 			self.slider_volume,
 			self.lbl_volume_value,
@@ -901,6 +911,17 @@ class MainWindow(QMainWindow):
 		force_note.setWordWrap(True)
 		force_note.setFont(QFont(retro_font_family, default_pt))
 		audio_layout.addWidget(force_note)
+		self.cb_refresh_matches = QCheckBox("Search again instead of using saved matches")
+		self.cb_refresh_matches.setFont(QFont(retro_font_family, default_pt + 1, QFont.Bold))
+		audio_layout.addWidget(self.cb_refresh_matches)
+		self.cb_library_store = QCheckBox("Share songs between playlists")
+		self.cb_library_store.setFont(QFont(retro_font_family, default_pt + 1, QFont.Bold))
+		self.cb_library_store.toggled.connect(lambda _=None: self._persist_settings())
+		audio_layout.addWidget(self.cb_library_store)
+		library_note = QLabel("A song that is in several playlists is downloaded once and linked into each playlist folder. Playlist files point at the shared copy.")
+		library_note.setWordWrap(True)
+		library_note.setFont(QFont(retro_font_family, default_pt))
+		audio_layout.addWidget(library_note)
 		settings_left.addWidget(audio_section)
 		legacy_section = QFrame()
 		legacy_section.setFrameShape(QFrame.StyledPanel)
@@ -1184,8 +1205,29 @@ class MainWindow(QMainWindow):
 		vl.addWidget(self.resolve_box)
 
 		self._load_last_session()
+
+	def showEvent(self, event):
+		super().showEvent(event)
+		if not self._background_started:
+			self._background_started = True
+			# Queued behind the first paint, so probing never delays the window.
+			QTimer.singleShot(0, self._start_background_tasks)
+
+	def _start_background_tasks(self) -> None:
+		"""Startup work that does not need to block the window: tool probes now, the update check shortly after."""
+		worker = StartupProbeWorker(self)
+		# sig_done is emitted from inside run(); only delete the thread once it has returned.
+		worker.finished.connect(self._on_startup_probes_finished)
+		self.startup_probe_worker = worker
+		worker.start()
 		QTimer.singleShot(1500, self._start_update_check)
 
+	def _on_startup_probes_finished(self) -> None:
+		worker = self.startup_probe_worker
+		self.startup_probe_worker = None
+		if worker is not None:
+			worker.deleteLater()
+
 	def _start_update_check(self) -> None:
 		if self.update_check_worker is not None and self.update_check_worker.isRunning():
 			return
@@ -1368,17 +1410,26 @@ class MainWindow(QMainWindow):
 		self.cb_eq_enabled.setText("Equalizer ON" if enabled else "Equalizer OFF")
 		for widget in getattr(self, "_equalizer_child_controls", []):
 			widget.setEnabled(enabled)
+		self._sync_replaygain_enabled()
+
+	def _sync_replaygain_enabled(self) -> None:
+		if hasattr(self, "cb_eq_replaygain"):
+			self.cb_eq_replaygain.setEnabled(self.cb_eq_enabled.isChecked() and self.cb_eq_normalize.isChecked())
 
 	def _audio_processing_options(self) -> dict:
 		if not self.cb_eq_enabled.isChecked():
 			return {}
-		return {
+		options = {
 			"enabled": True,
 			"normalize": self.cb_eq_normalize.isChecked(),
 			"volume_gain": self.slider_volume.value(),
 			"bass_gain": self.slider_bass.value(),
 			"treble_gain": self.slider_treble.value(),
 		}
+		# Static leveling is the default mode, so only ReplayGain is spelled out.
+		if options["normalize"] and self.cb_eq_replaygain.isChecked():
+			options["normalize_mode"] = NORMALIZE_MODE_REPLAYGAIN
+		return options
 
 	def _mp3_quality_value(self) -> int:
 		return max(0, min(10, int(self.slider_mp3_quality.value())))
@@ -1680,8 +1731,8 @@ class MainWindow(QMainWindow):
 		if csv_path is None and self.source_tracks is not None:
 			return list(self.source_tracks)
 		target_csv = csv_path or self.ed_csv.text().strip()
-		df = load_csv(target_csv)
-		return tracks_from_csv(df, None)  # use entire CSV
+		# Whole CSV, read in chunks so the DataFrame for a large export is never built at once.
+		return list(iter_csv_tracks(target_csv))
 
 	def _set_row_highlight(self, row_idx: int, color: QColor | None) -> None:
 		if not (0 <= row_idx < self.table.rowCount()):
@@ -1764,7 +1815,7 @@ class MainWindow(QMainWindow):
 			primary_row = duplicate_rows.get(i)
 			if primary_row is not None:
 				primary_path = self._expected_track_path(tracks[primary_row], out_root, fmt)
-				is_existing = primary_path.exists()
+				is_existing = file_exists(primary_path)
 				self.track_results[i] = {
 					"track": track,
 					"options": [],
@@ -1959,11 +2010,13 @@ class MainWindow(QMainWindow):
 			"cookies_test_ok": self._cookies_test_ok,
 			"eq_enabled": self.cb_eq_enabled.isChecked(),
 			"eq_normalize": self.cb_eq_normalize.isChecked(),
+			"eq_normalize_mode": NORMALIZE_MODE_REPLAYGAIN if self.cb_eq_replaygain.isChecked() else NORMALIZE_MODE_STATIC,
 			"eq_volume_gain": self.slider_volume.value(),
 			"eq_bass_gain": self.slider_bass.value(),
 			"eq_treble_gain": self.slider_treble.value(),
 			"mp3_quality": self._mp3_quality_value(),
 			"force_download_mode": self.cb_force_download.isChecked(),
+			"library_store_enabled": self.cb_library_store.isChecked(),
 			"opus_output_enabled": self.cb_opus_output.isChecked(),
 			"legacy_ipod_mode": self.cb_legacy_ipod_mode.isChecked(),
 			"legacy_mp3_mode": self.combo_legacy_mp3_mode.currentData(),
@@ -2021,6 +2074,9 @@ class MainWindow(QMainWindow):
 		block_force = QSignalBlocker(self.cb_force_download)
 		self.cb_force_download.setChecked(bool(cfg.get("force_download_mode", False)))
 		del block_force
+		block_library = QSignalBlocker(self.cb_library_store)
+		self.cb_library_store.setChecked(bool(cfg.get("library_store_enabled", False)))
+		del block_library
 		block_opus = QSignalBlocker(self.cb_opus_output)
 		self.cb_opus_output.setChecked(bool(cfg.get("opus_output_enabled", False)))
 		del block_opus
@@ -2084,6 +2140,10 @@ class MainWindow(QMainWindow):
 		block_norm = QSignalBlocker(self.cb_eq_normalize)
 		self.cb_eq_normalize.setChecked(bool(cfg.get("eq_normalize", False)))
 		del block_norm
+		block_replaygain = QSignalBlocker(self.cb_eq_replaygain)
+		self.cb_eq_replaygain.setChecked(cfg.get("eq_normalize_mode") == NORMALIZE_MODE_REPLAYGAIN)
+		del block_replaygain
+		self._sync_replaygain_enabled()
 		volume_gain = int(cfg.get("eq_volume_gain", 0) or 0)
 		bass_gain = int(cfg.get("eq_bass_gain", 0) or 0)
 		treble_gain = int(cfg.get("eq_treble_gain", 0) or 0)
@@ -2221,6 +2281,8 @@ class MainWindow(QMainWindow):
 			force_download=bool(self.cb_force_download.isChecked()),
 			tracks_override=active_tracks,
 			row_indices=queued_rows,
+			refresh_matches=bool(self.cb_refresh_matches.isChecked()),
+			library_store=bool(self.cb_library_store.isChecked()),
 			parent=self,
 		)
 		self.worker.sig_log.connect(self.lbl_log.setText)
@@ -2962,6 +3024,10 @@ class MainWindow(QMainWindow):
 		self._shutdown_thread(self.cookie_check_worker, wait_ms=500)
 		self.cookie_check_worker = None
 
+		# Stop startup probes if a tool version check is still running
+		self._shutdown_thread(self.startup_probe_worker, wait_ms=500)
+		self.startup_probe_worker = None
+
 		# Stop update check worker if startup is still waiting on the network
 		self._shutdown_thread(self.update_check_worker, wait_ms=500)
 		self.update_check_worker = None
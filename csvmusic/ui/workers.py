@@ -2,27 +2,41 @@
 from PySide6.QtCore import QObject, Signal, QThread
 import pathlib, traceback, time, random
 import subprocess
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
 import json
 import sqlite3
 import re, unicodedata
-from typing import List, Dict
-
-from ytmusicapi import YTMusic
+from typing import List, Dict, Tuple
 
 from csvmusic.core.csv_import import load_csv, tracks_from_csv
 from csvmusic.core.url_import import fetch_music_url
 from csvmusic.core.log import log
-from csvmusic.core.ytmusic_match import find_best, more_candidates, RATE_LIMIT_S, CONFIDENCE_MIN
+from csvmusic.core.config import AppConfig
+from csvmusic.core.cover_art import track_cover_bytes
+from csvmusic.core.journal import PipelineJournal, open_journal
+from csvmusic.core.library_store import LIBRARY_DIR, LibraryStore
+from csvmusic.core.match_cache import default_match_cache
+from csvmusic.core.rate_limit import TokenBucket
+from csvmusic.core.startup import run_startup_probes
+from csvmusic.core.transcode import TranscodeCancelled, TranscodeScheduler
+from csvmusic.core.ytmusic_pool import default_ytmusic_pool
+from csvmusic.core.ytmusic_match import (
+	find_best, more_candidates, RateLimitedClient, SEARCH_CACHE,
+	RATE_LIMIT_S, CONFIDENCE_MIN, SEARCH_RATE_PER_S, SEARCH_BURST
+)
 from csvmusic.core.downloader import (
-	download_m4a, download_mp3, download_opus, tag_file, yt_thumbnail_bytes, write_m3u, sanitize_name,
+	download_m4a, download_mp3, download_opus, fetch_m4a, fetch_mp3, PendingEncode, tag_file, write_m3u, sanitize_name,
 	youtube_batch_mitigation, build_ytdlp_mitigation_args, detect_youtube_risk,
-	YOUTUBE_MITIGATION_NONE, YOUTUBE_MITIGATION_AGGRESSIVE, YouTubeMitigationProfile
+	YOUTUBE_MITIGATION_NONE, YOUTUBE_MITIGATION_AGGRESSIVE, YouTubeMitigationProfile, CLIENT_SELECTOR
 )
 from csvmusic.core.paths import ytdlp_path as _resolve_ytdlp, INTERNAL_YTDLP
 from csvmusic.core.subprocess_env import subprocess_kwargs
 from csvmusic.core.update_check import UpdateInfo, fetch_available_update
 
 _FORCE_FALLBACK_MIN_SCORE = 0.45
+_EVENT_POLL_S = 0.1
 
 
 class UpdateCheckWorker(QThread):
@@ -40,6 +54,15 @@ class UpdateCheckWorker(QThread):
 			log(f"update check unavailable: {exc}")
 		self.sig_done.emit(update)
 
+class StartupProbeWorker(QThread):
+	# Emits {probe name: seconds}
+	sig_done = Signal(dict)
+
+	def run(self):
+		timings = run_startup_probes()
+		log("startup probes: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+		self.sig_done.emit(timings)
+
 class MusicURLImportWorker(QThread):
 	sig_done = Signal(bool, dict, str)
 
@@ -129,6 +152,49 @@ def _run_yt_dlp_command(cmd: list[str], *, timeout: int) -> subprocess.Completed
 		**subprocess_kwargs()
 	)
 
+class PipelineStageStats:
+	"""Queue depth and stall time between the match and download stages."""
+
+	def __init__(self, queue_capacity: int, download_workers: int):
+		self.queue_capacity = queue_capacity
+		self.download_workers = download_workers
+		self.max_queue_depth = 0
+		self.match_stall_s = 0.0	# matcher blocked on a full download queue
+		self.download_stall_s = 0.0	# downloaders idle waiting for a match
+		self.queued_jobs = 0
+		self.finished_jobs = 0
+		self._lock = threading.Lock()
+
+	def record_enqueue(self, stall_s: float, depth: int) -> None:
+		with self._lock:
+			self.match_stall_s += stall_s
+			self.queued_jobs += 1
+			self.max_queue_depth = max(self.max_queue_depth, depth)
+
+	def record_dequeue(self, stall_s: float) -> None:
+		with self._lock:
+			self.download_stall_s += stall_s
+
+	def record_finished(self) -> None:
+		with self._lock:
+			self.finished_jobs += 1
+
+	def snapshot(self, queue_depth: int) -> Dict:
+		with self._lock:
+			# Downloader idle time is summed across workers; compare per-worker wall time.
+			per_worker_idle = self.download_stall_s / max(1, self.download_workers)
+			return {
+				"queue_depth": queue_depth,
+				"queue_capacity": self.queue_capacity,
+				"max_queue_depth": self.max_queue_depth,
+				"match_stall_s": self.match_stall_s,
+				"download_stall_s": self.download_stall_s,
+				"queued_jobs": self.queued_jobs,
+				"finished_jobs": self.finished_jobs,
+				"bottleneck": "download" if self.match_stall_s > per_worker_idle else "match",
+			}
+
+
 class PipelineWorker(QThread):
 	sig_log = Signal(str)                       # log strings
 	sig_warning = Signal(str)                   # warning dialog text
@@ -138,6 +204,7 @@ class PipelineWorker(QThread):
 	sig_progress = Signal(int, int)             # processed, total
 	sig_done = Signal(str, list, list, list)    # final message, matched, skipped, failed
 	sig_track_result = Signal(int, dict)        # per-track summary
+	sig_stage_stats = Signal(dict)              # match/download queue depth and stall times
 
 	def __init__(self, csv_path: str, out_dir: str, playlist: str | None,
 	             fmt: str,
@@ -153,6 +220,8 @@ class PipelineWorker(QThread):
 	             force_download: bool = False,
 	             tracks_override: List[Dict] | None = None,
 	             row_indices: List[int] | None = None,
+	             refresh_matches: bool = False,
+	             library_store: bool = False,
 	             parent: QObject | None = None):
 		super().__init__(parent)
 		self.csv_path = csv_path
@@ -172,11 +241,49 @@ class PipelineWorker(QThread):
 		self.force_download = bool(force_download)
 		self.tracks_override = tracks_override
 		self.row_indices = row_indices or []
+		self.refresh_matches = bool(refresh_matches)
+		self._library = LibraryStore(self.out_dir / LIBRARY_DIR) if library_store else None
+		self._match_cache = None
+		self._journal: PipelineJournal | None = None
 		self._stop = False
 		self._mitigation = YOUTUBE_MITIGATION_NONE
+		self._mitigation_lock = threading.Lock()
+		self._results_lock = threading.Lock()
+		self._done_tracks: List[Tuple[int, Dict]] = []
+		self._failed_tracks: List[Tuple[int, Dict]] = []
+		self._processed = 0
+		self._total = 0
+		self.stage_stats: PipelineStageStats | None = None
+		self._events: "queue.Queue[tuple]" = queue.Queue()
+		self._pipeline_thread: int | None = None
+		self._transcoder: TranscodeScheduler | None = None
 
 	def stop(self):
 		self._stop = True
+		if self._transcoder is not None:
+			self._transcoder.cancel()
+
+	def _emit(self, signal, *args) -> None:
+		# Qt only delivers signals from plain Python threads through an event loop, so
+		# download threads hand theirs to the pipeline thread, which emits them in order.
+		if threading.get_ident() == self._pipeline_thread:
+			signal.emit(*args)
+		else:
+			self._events.put((signal, args))
+
+	def _drain_events(self) -> None:
+		while True:
+			try:
+				signal, args = self._events.get_nowait()
+			except queue.Empty:
+				return
+			signal.emit(*args)
+
+	def _await_match(self, future: Future) -> Tuple[Dict | None, float, List[Dict]]:
+		while not future.done():
+			self._drain_events()
+			wait_futures([future], timeout=_EVENT_POLL_S)
+		return future.result()
 
 	def _download_with_profile(self, vid: str, dest_dir: pathlib.Path, base: str, profile: YouTubeMitigationProfile):
 		extra_args: list[str] = []
@@ -185,6 +292,11 @@ class PipelineWorker(QThread):
 		elif self.cookies_browser:
 			extra_args += ["--cookies-from-browser", self.cookies_browser]
 		extra_args += build_ytdlp_mitigation_args(profile)
+		if self._transcoder is not None and self.fmt in ("m4a", "mp3"):
+			# Leave the ffmpeg step to the transcode pool so this thread can start the next download.
+			if self.fmt == "m4a":
+				return fetch_m4a(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=extra_args or None, audio_processing=self.audio_processing)
+			return fetch_mp3(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=extra_args or None, audio_processing=self.audio_processing, mp3_quality=self.mp3_quality, cbr_bitrate_kbps=_legacy_cbr_bitrate(self.legacy_options))
 		if self.fmt == "m4a":
 			return download_m4a(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=extra_args or None, audio_processing=self.audio_processing)
 		if self.fmt == "opus":
@@ -192,15 +304,16 @@ class PipelineWorker(QThread):
 		return download_mp3(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=extra_args or None, audio_processing=self.audio_processing, mp3_quality=self.mp3_quality, cbr_bitrate_kbps=_legacy_cbr_bitrate(self.legacy_options))
 
 	def _apply_mitigation(self, profile: YouTubeMitigationProfile, reason: str | None = None) -> None:
-		if profile.label == self._mitigation.label:
-			return
-		self._mitigation = profile
+		with self._mitigation_lock:
+			if profile.label == self._mitigation.label:
+				return
+			self._mitigation = profile
 		if profile.warning:
 			msg = profile.warning
 			if reason:
 				msg = f"{msg}\n\nDetected: {reason}"
-			self.sig_log.emit(f"[warn] {msg}")
-			self.sig_warning.emit(msg)
+			self._emit(self.sig_log, f"[warn] {msg}")
+			self._emit(self.sig_warning, msg)
 
 	def _track_pause_s(self) -> float:
 		if self._mitigation.track_sleep_s <= 0:
@@ -208,6 +321,45 @@ class PipelineWorker(QThread):
 		jitter = min(1.0, self._mitigation.track_sleep_s * 0.2)
 		return max(RATE_LIMIT_S, random.uniform(self._mitigation.track_sleep_s - jitter, self._mitigation.track_sleep_s + jitter))
 
+	def _match_track(self, yt: RateLimitedClient, track: Dict) -> Tuple[Dict | None, float, List[Dict]]:
+		match, confidence, options = find_best(yt, track, cache=self._match_cache, refresh=self.refresh_matches)
+		if options and self._journal is not None:
+			self._journal.record_match(track, match, confidence, options)
+		return match, confidence, options
+
+	def _resumed_match(self, track: Dict) -> Future | None:
+		"""A finished future holding the journaled search result, so restarts skip the search."""
+		if self.refresh_matches or self._journal is None:
+			return None
+		resumed = self._journal.match_for(track)
+		if resumed is None:
+			return None
+		future: Future = Future()
+		future.set_result(resumed)
+		return future
+
+	def _resume_download(self, row_idx: int, track: Dict, payload: Dict) -> Tuple[pathlib.Path, bytes | None, Dict] | None:
+		"""Reuse a file an earlier run already downloaded, tagging it first if that run stopped short."""
+		if self._journal is None:
+			return None
+		done = self._journal.download_for(track)
+		if done is None:
+			return None
+		vid = done["video_id"]
+		fp = done["file_path"]
+		candidates = [payload.get("match")] + list(payload.get("options") or [])
+		candidate = next((c for c in candidates if c and c.get("videoId") == vid), None)
+		# A different format or a fresh match that no longer offers this video means a new download.
+		if candidate is None or fp.suffix.lower() != f".{self.fmt}":
+			return None
+		cover = None
+		if not done["tagged"]:
+			self._emit(self.sig_row_status, row_idx, "Tagging…")
+			cover = track_cover_bytes(track, vid)
+			tag_file(fp, track, cover if self.embed_art else None, cover_size=_legacy_cover_size(self.legacy_options, embed_art=self.embed_art))
+			self._journal.record_tagged(track, vid, fp)
+		return fp, cover, candidate
+
 	def _is_official_candidate(self, cand: Dict) -> bool:
 		source = str(cand.get("source") or "").lower()
 		author = str(cand.get("author") or "").lower()
@@ -279,7 +431,227 @@ class PipelineWorker(QThread):
 			return f"Safe mode: {base[0].lower()}{base[1:]}"
 		return base
 
+	def _library_path(self, vid: str) -> pathlib.Path:
+		return self._library.path_for(vid, self.fmt, mp3_quality=self.mp3_quality, cbr_bitrate_kbps=_legacy_cbr_bitrate(self.legacy_options), audio_processing=self.audio_processing)
+
+	def _link_from_library(self, row_idx: int, track: Dict, vid: str, dest_dir: pathlib.Path, base: str) -> Tuple[pathlib.Path, bytes | None] | None:
+		if self._library is None:
+			return None
+		dest = dest_dir / f"{sanitize_name(base)}.{self.fmt}"
+		covers: List[bytes | None] = []
+		try:
+			# Tags go on this playlist's own copy before it replaces dest.
+			if self._library.link_into(self._library_path(vid), dest, lambda path: covers.append(self._write_tags(row_idx, track, vid, path))) is None:
+				return None
+		except OSError as exc:
+			log(f"library link failed: video_id={vid} dest='{dest}' error={exc}")
+			return None
+		if self._journal is not None:
+			self._journal.record_download(track, vid, dest)
+			self._journal.record_tagged(track, vid, dest)
+		return dest, covers[0]
+
+	def _store_in_library(self, vid: str, fp: pathlib.Path) -> None:
+		if self._library is None:
+			return
+		try:
+			self._library.adopt(fp, self._library_path(vid))
+		except OSError as exc:
+			log(f"library store failed: video_id={vid} path='{fp}' error={exc}")
+
+	def _attempt_candidates(self, row_idx: int, track: Dict, candidates: List[Dict], dest_dir: pathlib.Path, base: str, *, show_attempts: bool, safe_mode: bool = False) -> Tuple[pathlib.Path, bytes | None, Dict]:
+		last_err = None
+		for attempt_idx, candidate in enumerate(candidates, start=1):
+			vid = candidate["videoId"]
+			linked = self._link_from_library(row_idx, track, vid, dest_dir, base)
+			if linked is not None:
+				return linked[0], linked[1], candidate
+			if show_attempts:
+				self._emit(
+					self.sig_row_status,
+					row_idx,
+					self._attempt_status_text(candidate, attempt_idx, len(candidates), safe_mode=safe_mode)
+				)
+			try:
+				fetched = self._download_with_profile(vid, dest_dir, base, self._mitigation)
+				if isinstance(fetched, PendingEncode):
+					return fetched, None, candidate
+				cover = self._tag_downloaded(row_idx, track, vid, fetched)
+				self._store_in_library(vid, fetched)
+				return fetched, cover, candidate
+			except Exception as candidate_exc:
+				last_err = str(candidate_exc)
+		raise RuntimeError(last_err or "Download failed.")
+
+	def _tag_downloaded(self, row_idx: int, track: Dict, vid: str, fp: pathlib.Path) -> bytes | None:
+		if self._journal is not None:
+			self._journal.record_download(track, vid, fp)
+		cover = self._write_tags(row_idx, track, vid, fp)
+		if self._journal is not None:
+			self._journal.record_tagged(track, vid, fp)
+		return cover
+
+	def _write_tags(self, row_idx: int, track: Dict, vid: str, fp: pathlib.Path, replaygain: Tuple[float, float] | None = None) -> bytes | None:
+		self._emit(self.sig_row_status, row_idx, "Tagging…")
+		cover = track_cover_bytes(track, vid)
+		tag_file(fp, track, cover if self.embed_art else None, cover_size=_legacy_cover_size(self.legacy_options, embed_art=self.embed_art), replaygain=replaygain)
+		return cover
+
+	def _finish_row(self, row_idx: int, payload: Dict) -> None:
+		with self._results_lock:
+			self._processed += 1
+			processed = self._processed
+		self._emit(self.sig_progress, processed, self._total)
+		self._emit(self.sig_track_result, row_idx, payload)
+
+	def _download_job(self, job: Dict, dest_dir: pathlib.Path) -> None:
+		row_idx = job["row_idx"]
+		t = job["track"]
+		payload = job["payload"]
+		title = t["title"]
+		artists = t["artists"]
+		low_confidence = payload.get("forced_match") or payload["confidence"] < CONFIDENCE_MIN
+		if low_confidence:
+			self._emit(self.sig_row_status, row_idx, f"Downloading low-confidence match ({self.fmt})…")
+		else:
+			self._emit(self.sig_row_status, row_idx, f"Downloading ({self.fmt})…")
+		candidate_sequence = self._ordered_force_candidates(t, payload["match"], payload["options"])
+		fallback_attempts_enabled = self.force_download and len(candidate_sequence) > 1
+		base = f"{artists} - {title}"
+		error_msg = None
+		fp = None
+		cover = None
+		try:
+			resumed = self._resume_download(row_idx, t, payload)
+			if resumed is not None:
+				fp, cover, payload["match"] = resumed
+			else:
+				fp, cover, payload["match"] = self._attempt_candidates(row_idx, t, candidate_sequence, dest_dir, base, show_attempts=fallback_attempts_enabled)
+		except Exception as e:
+			err = str(e)
+			risk_reason = detect_youtube_risk(err)
+			if risk_reason and self._mitigation.label != YOUTUBE_MITIGATION_AGGRESSIVE.label:
+				self._apply_mitigation(YOUTUBE_MITIGATION_AGGRESSIVE, risk_reason)
+				self._emit(self.sig_row_status, row_idx, "Retrying with YouTube safe mode…")
+				try:
+					fp, cover, payload["match"] = self._attempt_candidates(row_idx, t, candidate_sequence, dest_dir, base, show_attempts=fallback_attempts_enabled, safe_mode=True)
+				except Exception as retry_exc:
+					err = str(retry_exc)
+			if fp is None:
+				error_msg = err
+		if isinstance(fp, PendingEncode):
+			self._emit(self.sig_row_status, row_idx, f"Waiting to encode ({self.fmt})…")
+			try:
+				self._transcoder.submit(
+					lambda: self._encode_job(job, fp, low_confidence),
+					label=base,
+					on_cancel=lambda: self._drop_encode(job, fp, low_confidence),
+				)
+			except TranscodeCancelled:
+				self._drop_encode(job, fp, low_confidence)
+			return
+		self._complete_job(job, fp, cover, error_msg, low_confidence)
+
+	def _encode_job(self, job: Dict, pending: PendingEncode, low_confidence: bool) -> None:
+		row_idx = job["row_idx"]
+		payload = job["payload"]
+		fp = None
+		cover = None
+		error_msg = None
+		vid = payload["match"]["videoId"]
+		try:
+			self._emit(self.sig_row_status, row_idx, f"Encoding ({self.fmt})…")
+			# Tag the staged output so the final path only ever holds a finished, tagged file.
+			staged = pending.run(self._transcoder.run_process, stage=True)
+			try:
+				cover = self._write_tags(row_idx, job["track"], vid, staged, pending.replaygain)
+			except BaseException:
+				pending.discard()
+				raise
+			fp = pending.commit(staged)
+			if self._journal is not None:
+				self._journal.record_download(job["track"], vid, fp)
+				self._journal.record_tagged(job["track"], vid, fp)
+			self._store_in_library(vid, fp)
+		except TranscodeCancelled:
+			error_msg = "Stopped before encoding finished."
+		except Exception as exc:
+			error_msg = str(exc) or "Encoding failed."
+		self._complete_job(job, fp, cover, error_msg, low_confidence)
+
+	def _drop_encode(self, job: Dict, pending: PendingEncode, low_confidence: bool) -> None:
+		pending.discard()
+		self._complete_job(job, None, None, "Stopped before encoding finished.", low_confidence)
+
+	def _complete_job(self, job: Dict, fp: pathlib.Path | None, cover: bytes | None, error_msg: str | None, low_confidence: bool) -> None:
+		job["completed"] = True
+		idx = job["idx"]
+		row_idx = job["row_idx"]
+		t = job["track"]
+		payload = job["payload"]
+		if fp is None:
+			err = error_msg or "Download failed."
+			log(f"download failure: playlist='{payload['playlist_name']}' track='{t['artists']} — {t['title']}' fmt={self.fmt} error={err}")
+			self._emit(self.sig_row_status, row_idx, f"Fail: {err[:120]}")
+			with self._results_lock:
+				self._failed_tracks.append((idx, {"track": t, "error": err}))
+		else:
+			if low_confidence:
+				self._emit(self.sig_row_status, row_idx, f"Low confidence → {fp.name}")
+			else:
+				self._emit(self.sig_row_status, row_idx, f"Done → {fp.name}")
+			done = t
+			if self._library is not None and payload.get("match"):
+				done = dict(t, library_path=str(self._library_path(payload["match"]["videoId"])))
+			with self._results_lock:
+				self._done_tracks.append((idx, done))
+			payload["downloaded"] = True
+			payload["file_path"] = str(fp)
+			payload["cover_bytes"] = cover
+		payload["error"] = None if fp is not None else error_msg
+		self._finish_row(row_idx, payload)
+
+	def _download_loop(self, jobs: "queue.Queue[Dict | None]", dest_dir: pathlib.Path) -> None:
+		while True:
+			waited_from = time.monotonic()
+			job = jobs.get()
+			self.stage_stats.record_dequeue(time.monotonic() - waited_from)
+			if job is None:
+				return
+			if self._stop:
+				self._complete_job(job, None, None, "Stopped before downloading.", False)
+				continue
+			try:
+				self._download_job(job, dest_dir)
+			except Exception as exc:
+				log(f"download worker failure: {traceback.format_exc()}")
+				if not job.get("completed"):
+					self._complete_job(job, None, None, str(exc) or "Download failed.", False)
+			self.stage_stats.record_finished()
+			self._emit(self.sig_stage_stats, self.stage_stats.snapshot(jobs.qsize()))
+			if not self._stop:
+				time.sleep(self._track_pause_s())
+
+	def _enqueue_download(self, jobs: "queue.Queue[Dict | None]", job: Dict) -> None:
+		waited_from = time.monotonic()
+		while True:
+			try:
+				jobs.put(job, timeout=_EVENT_POLL_S)
+				break
+			except queue.Full:
+				self._drain_events()
+		self.stage_stats.record_enqueue(time.monotonic() - waited_from, jobs.qsize())
+
+	def _enqueue_sentinel(self, jobs: "queue.Queue[Dict | None]") -> None:
+		while True:
+			try:
+				jobs.put(None, timeout=_EVENT_POLL_S)
+				return
+			except queue.Full:
+				self._drain_events()
+
 	def run(self):
+		self._pipeline_thread = threading.get_ident()
 		try:
 			self.sig_log.emit("[csv] loading…")
 			if self.tracks_override is not None:
@@ -291,6 +663,7 @@ class PipelineWorker(QThread):
 				self.sig_done.emit("No tracks selected.", [], [], [])
 				return
 			total = len(tracks)
+			self._total = total
 			self.sig_total.emit(total)
 			self._mitigation = youtube_batch_mitigation(total, using_cookies=bool(self.cookies_file or self.cookies_browser))
 			if self._mitigation.warning:
@@ -299,199 +672,189 @@ class PipelineWorker(QThread):
 			matched = 0
 			skipped_count = 0
 			self.sig_match_stats.emit(matched, skipped_count)
-			try:
-				yt = YTMusic()
-			except Exception as exc:
-				raise RuntimeError(f"Failed to initialize YTMusic client: {exc}")
+			config = AppConfig()
+			search_workers = max(1, int(config.search_concurrency))
+			# Paced batches keep a single downloader so the randomized waits still apply per request.
+			download_workers = 1 if self._mitigation.active else max(1, int(config.download_concurrency))
+			limiter = TokenBucket(SEARCH_RATE_PER_S, SEARCH_BURST)
+			self._match_cache = default_match_cache()
+			# The pool hands each search thread its own keep-alive client.
+			yt = RateLimitedClient(default_ytmusic_pool(), limiter)
+			# Searches run ahead of the download stage; results are consumed in row order.
+			search_pool = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="csvmusic-search")
+			pending_matches: Dict[int, Future] = {}
+			next_submit = 0
+			lookahead = search_workers * 2
+
+			def _submit_matches(upto: int) -> None:
+				nonlocal next_submit
+				while next_submit < min(total, upto):
+					resumed = self._resumed_match(tracks[next_submit])
+					pending_matches[next_submit] = resumed or search_pool.submit(self._match_track, yt, tracks[next_submit])
+					next_submit += 1
+
 			playlist_name = self.playlist or (tracks[0]["playlist"] if tracks else "Playlist")
 			if not playlist_name:
 				playlist_name = "Playlist"
 			safe_playlist = sanitize_name(playlist_name) or "Playlist"
 			dest_dir = self.out_dir / safe_playlist
 			dest_dir.mkdir(parents=True, exist_ok=True)
-			done_tracks: List[Dict] = []
-			failed_tracks: List[Dict] = []
+			self._journal = open_journal(dest_dir)
+			self._results_lock = threading.Lock()
+			self._done_tracks = []
+			self._failed_tracks = []
+			self._processed = 0
 			skipped_tracks: List[Dict] = []
+			jobs: "queue.Queue[Dict | None]" = queue.Queue(maxsize=download_workers * 2)
+			self.stage_stats = PipelineStageStats(jobs.maxsize, download_workers)
+			# Opus is a stream copy; only m4a/mp3 have encodes worth moving off the download threads.
+			self._transcoder = TranscodeScheduler() if self.fmt in ("m4a", "mp3") else None
+			downloaders = [
+				threading.Thread(target=self._download_loop, args=(jobs, dest_dir), name=f"csvmusic-download-{n}", daemon=True)
+				for n in range(download_workers)
+			]
+			for thread in downloaders:
+				thread.start()
 			consecutive_search_errors = 0
 			consecutive_empty_searches = 0
 			search_abort_reason: str | None = None
-			processed = 0
-			for idx, track in enumerate(tracks):
-				row_idx = self.row_indices[idx] if idx < len(self.row_indices) else idx
-				if self._stop:
-					break
-				t = track
-				title = t["title"]
-				artists = t["artists"]
-				search_error = None
-				options: List[Dict] = []
-				match = None
-				confidence = 0.0
-				try:
-					match, confidence, options = find_best(yt, t)
-				except Exception as exc:
-					search_error = str(exc)
-				if search_error:
-					consecutive_search_errors += 1
-					consecutive_empty_searches = 0
-				elif not options:
-					consecutive_empty_searches += 1
-					consecutive_search_errors = 0
-				else:
-					consecutive_search_errors = 0
-					consecutive_empty_searches = 0
-				payload = {
-					"track": t,
-					"options": options,
-					"match": match,
-					"confidence": confidence,
-					"skipped": False,
-					"error": None,
-					"playlist_name": playlist_name,
-					"file_path": None,
-					"downloaded": False,
-					"cover_bytes": None,
-					"forced_match": False
-				}
-
-				if match is None and self.force_download and options:
-					forced_candidates = self._force_download_candidates(t, options)
-					match = forced_candidates[0] if forced_candidates else options[0]
-					confidence = float(match.get("score", confidence or 0.0) or 0.0)
-					payload["match"] = match
-					payload["confidence"] = confidence
-					payload["forced_match"] = True
-
-				if match is None:
+			try:
+				for idx, track in enumerate(tracks):
+					row_idx = self.row_indices[idx] if idx < len(self.row_indices) else idx
+					if self._stop:
+						break
+					_submit_matches(idx + 1 + lookahead)
+					t = track
+					search_error = None
+					options: List[Dict] = []
+					match = None
+					confidence = 0.0
+					try:
+						match, confidence, options = self._await_match(pending_matches.pop(idx))
+					except Exception as exc:
+						search_error = str(exc)
 					if search_error:
-						log(f"match skip: query='{t['title']} {t['artists']}' error={search_error}")
-						status = f"Search failed: {search_error[:100]}"
+						consecutive_search_errors += 1
+						consecutive_empty_searches = 0
 					elif not options:
-						status = "Skipped (no search results)"
+						consecutive_empty_searches += 1
+						consecutive_search_errors = 0
 					else:
-						log(f"match skip: query='{t['title']} {t['artists']}' no candidate >= threshold (confidence={confidence:.2f})")
-						status = "Skipped (low confidence)"
-					payload["skipped"] = True
-					payload["error"] = search_error
-					reason = search_error or ("No search results" if not options else "No confident match")
-					skipped_tracks.append({"track": t, "reason": reason, "options": options})
-					self.sig_row_status.emit(row_idx, status)
-					processed += 1
-					self.sig_progress.emit(processed, total)
-					self.sig_track_result.emit(row_idx, payload)
-					skipped_count += 1
-					self.sig_match_stats.emit(matched, skipped_count)
-					if consecutive_search_errors >= 3:
-						search_abort_reason = f"YouTube Music search failed repeatedly: {search_error}"
-						self.sig_warning.emit(search_abort_reason)
-						break
-					if consecutive_empty_searches >= 5:
-						search_abort_reason = (
-							"YouTube Music returned no results for five tracks in a row. "
-							"Check the network connection or try again later."
-						)
-						self.sig_warning.emit(search_abort_reason)
-						break
-					if not self._stop and idx < total - 1:
-						time.sleep(self._track_pause_s())
-					continue
-
-				payload["match"] = match
-				matched += 1
-				self.sig_match_stats.emit(matched, skipped_count)
-				vid = match["videoId"]
-				low_confidence = payload.get("forced_match") or confidence < CONFIDENCE_MIN
-				if low_confidence:
-					self.sig_row_status.emit(row_idx, f"Downloading low-confidence match ({self.fmt})…")
-				else:
-					self.sig_row_status.emit(row_idx, f"Downloading ({self.fmt})…")
-				error_msg = None
-				candidate_sequence = self._ordered_force_candidates(t, match, options)
-				fallback_attempts_enabled = self.force_download and len(candidate_sequence) > 1
+						consecutive_search_errors = 0
+						consecutive_empty_searches = 0
+					payload = {
+						"track": t,
+						"options": options,
+						"match": match,
+						"confidence": confidence,
+						"skipped": False,
+						"error": None,
+						"playlist_name": playlist_name,
+						"file_path": None,
+						"downloaded": False,
+						"cover_bytes": None,
+						"forced_match": False
+					}
 
-				try:
-					base = f"{artists} - {title}"
-					last_err = None
-					fp = None
-					cover = None
-					for attempt_idx, candidate in enumerate(candidate_sequence, start=1):
-						vid = candidate["videoId"]
-						if fallback_attempts_enabled:
-							self.sig_row_status.emit(
-								row_idx,
-								self._attempt_status_text(candidate, attempt_idx, len(candidate_sequence))
+					if match is None and self.force_download and options:
+						forced_candidates = self._force_download_candidates(t, options)
+						match = forced_candidates[0] if forced_candidates else options[0]
+						confidence = float(match.get("score", confidence or 0.0) or 0.0)
+						payload["match"] = match
+						payload["confidence"] = confidence
+						payload["forced_match"] = True
+
+					if match is None:
+						if search_error:
+							log(f"match skip: query='{t['title']} {t['artists']}' error={search_error}")
+							status = f"Search failed: {search_error[:100]}"
+						elif not options:
+							status = "Skipped (no search results)"
+						else:
+							log(f"match skip: query='{t['title']} {t['artists']}' no candidate >= threshold (confidence={confidence:.2f})")
+							status = "Skipped (low confidence)"
+						payload["skipped"] = True
+						payload["error"] = search_error
+						reason = search_error or ("No search results" if not options else "No confident match")
+						skipped_tracks.append({"track": t, "reason": reason, "options": options})
+						self.sig_row_status.emit(row_idx, status)
+						self._finish_row(row_idx, payload)
+						skipped_count += 1
+						self.sig_match_stats.emit(matched, skipped_count)
+						if consecutive_search_errors >= 3:
+							search_abort_reason = f"YouTube Music search failed repeatedly: {search_error}"
+							self.sig_warning.emit(search_abort_reason)
+							break
+						if consecutive_empty_searches >= 5:
+							search_abort_reason = (
+								"YouTube Music returned no results for five tracks in a row. "
+								"Check the network connection or try again later."
 							)
-						try:
-							fp = self._download_with_profile(vid, dest_dir, base, self._mitigation)
-							self.sig_row_status.emit(row_idx, "Tagging…")
-							cover = yt_thumbnail_bytes(vid)
-							tag_file(fp, t, cover if self.embed_art else None, cover_size=_legacy_cover_size(self.legacy_options, embed_art=self.embed_art))
-							payload["match"] = candidate
+							self.sig_warning.emit(search_abort_reason)
 							break
-						except Exception as candidate_exc:
-							last_err = str(candidate_exc)
-					if fp is None:
-						raise RuntimeError(last_err or "Download failed.")
-					if low_confidence:
-						self.sig_row_status.emit(row_idx, f"Low confidence → {fp.name}")
-					else:
-						self.sig_row_status.emit(row_idx, f"Done → {fp.name}")
-					done_tracks.append(t)
-				except Exception as e:
-					err = str(e)
-					risk_reason = detect_youtube_risk(err)
-					retried = False
-					if risk_reason and self._mitigation.label != YOUTUBE_MITIGATION_AGGRESSIVE.label:
-						self._apply_mitigation(YOUTUBE_MITIGATION_AGGRESSIVE, risk_reason)
-						try:
-							self.sig_row_status.emit(row_idx, "Retrying with YouTube safe mode…")
-							last_retry_err = None
-							fp = None
-							cover = None
-							for attempt_idx, candidate in enumerate(candidate_sequence, start=1):
-								vid = candidate["videoId"]
-								if fallback_attempts_enabled:
-									self.sig_row_status.emit(
-										row_idx,
-										self._attempt_status_text(candidate, attempt_idx, len(candidate_sequence), safe_mode=True)
-									)
-								try:
-									fp = self._download_with_profile(vid, dest_dir, base, self._mitigation)
-									self.sig_row_status.emit(row_idx, "Tagging…")
-									cover = yt_thumbnail_bytes(vid)
-									tag_file(fp, t, cover if self.embed_art else None, cover_size=_legacy_cover_size(self.legacy_options, embed_art=self.embed_art))
-									payload["match"] = candidate
-									break
-								except Exception as retry_candidate_exc:
-									last_retry_err = str(retry_candidate_exc)
-							if fp is None:
-								raise RuntimeError(last_retry_err or "Download failed.")
-							if low_confidence:
-								self.sig_row_status.emit(row_idx, f"Low confidence → {fp.name}")
-							else:
-								self.sig_row_status.emit(row_idx, f"Done → {fp.name}")
-							done_tracks.append(t)
-							retried = True
-						except Exception as retry_exc:
-							err = str(retry_exc)
-					if not retried:
-						log(f"download failure: playlist='{playlist_name}' track='{artists} — {title}' fmt={self.fmt} error={err}")
-						self.sig_row_status.emit(row_idx, f"Fail: {err[:120]}")
-						failed_tracks.append({"track": t, "error": err})
-						error_msg = err
-				finally:
-					processed += 1
-					self.sig_progress.emit(processed, total)
-
-				payload["error"] = error_msg
-				if error_msg is None:
-					payload["downloaded"] = True
-					payload["file_path"] = str(fp)
-					payload["cover_bytes"] = cover
-				self.sig_track_result.emit(row_idx, payload)
-				if not self._stop and idx < total - 1:
-					time.sleep(self._track_pause_s())
-				time.sleep(0.02)
+						continue
+
+					matched += 1
+					self.sig_match_stats.emit(matched, skipped_count)
+					self.sig_row_status.emit(row_idx, "Matched, waiting to download…")
+					self._enqueue_download(jobs, {"idx": idx, "row_idx": row_idx, "track": t, "payload": payload})
+			finally:
+				search_pool.shutdown(wait=False, cancel_futures=True)
+				for _ in downloaders:
+					self._enqueue_sentinel(jobs)
+				for thread in downloaders:
+					while thread.is_alive():
+						self._drain_events()
+						thread.join(_EVENT_POLL_S)
+				if self._transcoder is not None:
+					while True:
+						pending = self._transcoder.pending()
+						if not pending:
+							break
+						self._drain_events()
+						wait_futures(pending, timeout=_EVENT_POLL_S)
+					self._transcoder.shutdown()
+				self._drain_events()
+				self._journal.close()
+			stats = self.stage_stats.snapshot(jobs.qsize())
+			self.sig_stage_stats.emit(stats)
+			log(
+				f"pipeline stages: playlist='{playlist_name}' download_workers={download_workers} "
+				f"max_queue_depth={stats['max_queue_depth']}/{stats['queue_capacity']} "
+				f"match_stall_s={stats['match_stall_s']:.1f} download_stall_s={stats['download_stall_s']:.1f} "
+				f"bottleneck={stats['bottleneck']}"
+			)
+			search_stats = SEARCH_CACHE.stats()
+			if self._match_cache is not None:
+				self._match_cache.flush()
+			match_cache_stats = f"hits={self._match_cache.hits} misses={self._match_cache.misses}" if self._match_cache is not None else "disabled"
+			log(
+				f"match caches: playlist='{playlist_name}' matches[{match_cache_stats}] "
+				f"searches[hits={search_stats['hits']} disk_hits={search_stats['disk_hits']} "
+				f"misses={search_stats['misses']} coalesced={search_stats['coalesced']}]"
+			)
+			client_stats = " ".join(
+				f"{client}[ok={st['successes']}/{st['attempts']} streak={st['failure_streak']}]"
+				for client, st in CLIENT_SELECTOR.stats().items()
+			)
+			log(f"player clients: playlist='{playlist_name}' {client_stats}")
+			if self._library is not None:
+				library_stats = self._library.stats()
+				log(
+					f"library store: playlist='{playlist_name}' reused={library_stats['hits']} stored={library_stats['stored']} "
+					f"hardlinks={library_stats['hardlink']} reflinks={library_stats['reflink']} copies={library_stats['copy']}"
+				)
+			if self._transcoder is not None:
+				encode_stats = self._transcoder.stats()
+				cpu_text = f"{encode_stats['cpu_s']:.1f}" if encode_stats["cpu_s"] is not None else "n/a"
+				log(
+					f"transcode: playlist='{playlist_name}' workers={encode_stats['workers']} jobs={encode_stats['jobs']} "
+					f"failed={encode_stats['failed']} dropped={encode_stats['dropped']} max_queue_depth={encode_stats['max_queue_depth']} "
+					f"cpu_s={cpu_text} wall_s={encode_stats['wall_s']:.1f} queued_s={encode_stats['queued_s']:.1f} "
+					f"submit_wait_s={encode_stats['submit_wait_s']:.1f}"
+				)
+			done_tracks = [t for _, t in sorted(self._done_tracks, key=lambda item: item[0])]
+			failed_tracks = [entry for _, entry in sorted(self._failed_tracks, key=lambda item: item[0])]
 			if done_tracks:
 				ext = self.fmt if self.fmt in ("m4a", "mp3", "opus") else "mp3"
 				if self.write_m3u8:
@@ -558,15 +921,25 @@ class SingleDownloadWorker(QThread):
 				cookies_args = ["--cookies-from-browser", self.cookies_browser]
 			else:
 				cookies_args = None
+			pending = None
 			if self.fmt == "m4a":
-				fp = download_m4a(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=cookies_args, audio_processing=self.audio_processing)
+				pending = fetch_m4a(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=cookies_args, audio_processing=self.audio_processing)
 			elif self.fmt == "opus":
 				fp = download_opus(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=cookies_args)
 			else:
-				fp = download_mp3(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=cookies_args, audio_processing=self.audio_processing, mp3_quality=self.mp3_quality, cbr_bitrate_kbps=_legacy_cbr_bitrate(self.legacy_options))
+				pending = fetch_mp3(vid, dest_dir, base, yt_dlp_bin=self.yt_dlp_path, ffmpeg_bin=self.ffmpeg_path_override, extra_yt_dlp_args=cookies_args, audio_processing=self.audio_processing, mp3_quality=self.mp3_quality, cbr_bitrate_kbps=_legacy_cbr_bitrate(self.legacy_options))
+			if pending is not None:
+				fp = pending.run(stage=True)
 			self.sig_status.emit(self.row_idx, "Tagging…")
-			cover = yt_thumbnail_bytes(vid)
-			tag_file(fp, self.track, cover if self.embed_art else None, cover_size=_legacy_cover_size(self.legacy_options, embed_art=self.embed_art))
+			cover = track_cover_bytes(self.track, vid)
+			try:
+				tag_file(fp, self.track, cover if self.embed_art else None, cover_size=_legacy_cover_size(self.legacy_options, embed_art=self.embed_art), replaygain=pending.replaygain if pending is not None else None)
+			except BaseException:
+				if pending is not None:
+					pending.discard()
+				raise
+			if pending is not None:
+				fp = pending.commit(fp)
 			self.sig_status.emit(self.row_idx, f"Done → {fp.name}")
 			payload = {
 				"track": self.track,
@@ -0,0 +1,168 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from csvmusic.core import cover_art
+from csvmusic.core.cover_art import CoverArtService, ProcessedCoverCache
+
+
+IMAGE = b"\xff\xd8" + b"x" * 4000
+AVAILABLE = {"/vi/vid1/sddefault.jpg", "/vi/vid1/hqdefault.jpg", "/art/album.jpg"}
+
+
+class CoverHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def _respond(self, with_body):
+		self.server.hits.append((self.command, self.path))
+		if self.path in AVAILABLE:
+			self.send_response(200)
+			self.send_header("Content-Length", str(len(IMAGE)))
+			self.end_headers()
+			if with_body:
+				self.wfile.write(IMAGE)
+		else:
+			self.send_response(404)
+			self.send_header("Content-Length", "0")
+			self.end_headers()
+
+	def do_HEAD(self):
+		self._respond(False)
+
+	def do_GET(self):
+		self._respond(True)
+
+	def log_message(self, *_args):
+		pass
+
+
+@pytest.fixture
+def cover_server():
+	server = ThreadingHTTPServer(("127.0.0.1", 0), CoverHandler)
+	server.daemon_threads = True
+	server.hits = []
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+def _service(server, cache):
+	return CoverArtService(
+		cache,
+		thumbnail_url=f"http://127.0.0.1:{server.server_address[1]}/vi/{{vid}}/{{quality}}.jpg",
+		processed=ProcessedCoverCache(None, process=lambda data, *, size: data),
+	)
+
+
+def test_thumbnail_probes_ladder_and_downloads_only_best_quality(cover_server, tmp_path):
+	service = _service(cover_server, tmp_path)
+
+	assert service.thumbnail("vid1")
+
+	gets = [path for method, path in cover_server.hits if method == "GET"]
+	heads = [path for method, path in cover_server.hits if method == "HEAD"]
+	assert gets == ["/vi/vid1/sddefault.jpg"]
+	assert len(heads) == 5
+
+
+def test_repeat_and_rerun_lookups_hit_the_cache(cover_server, tmp_path):
+	first = _service(cover_server, tmp_path)
+	cover = first.thumbnail("vid1")
+	first.thumbnail("vid1")
+	requests_after_first_run = len(cover_server.hits)
+
+	rerun = _service(cover_server, tmp_path)
+
+	assert rerun.thumbnail("vid1") == cover
+	assert len(cover_server.hits) == requests_after_first_run == 6
+	assert rerun.hits == 1
+
+
+def test_importer_cover_url_is_preferred(cover_server, tmp_path):
+	service = _service(cover_server, tmp_path)
+	url = f"http://127.0.0.1:{cover_server.server_address[1]}/art/album.jpg"
+
+	assert service.cover_for({"cover_url": url}, "vid1") == IMAGE
+	assert cover_server.hits == [("GET", "/art/album.jpg")]
+
+
+def test_missing_thumbnail_is_not_refetched_right_away(cover_server, tmp_path):
+	service = _service(cover_server, tmp_path)
+
+	assert service.thumbnail("missing") is None
+	hits = len(cover_server.hits)
+	assert all(method == "HEAD" for method, _path in cover_server.hits)
+	assert service.thumbnail("missing") is None
+	assert len(cover_server.hits) == hits
+	assert not list(tmp_path.iterdir())
+
+
+def test_failed_cover_fetch_is_retried_after_the_miss_expires(monkeypatch, cover_server, tmp_path):
+	service = _service(cover_server, tmp_path)
+	responses = [None, IMAGE]
+	now = [1000.0]
+	monkeypatch.setattr(service, "_get", lambda _url: responses.pop(0))
+	monkeypatch.setattr(cover_art, "time", SimpleNamespace(monotonic=lambda: now[0]))
+
+	assert service.url_bytes("https://example.invalid/art.jpg") is None
+	assert service.url_bytes("https://example.invalid/art.jpg") is None
+	assert responses == [IMAGE]
+
+	now[0] += cover_art._MISS_TTL_S + 1
+	assert service.url_bytes("https://example.invalid/art.jpg") == IMAGE
+
+
+def _counting_square(calls):
+	def square(data, *, size):
+		calls.append((data, size))
+		time.sleep(0.02)
+		return b"sq%d:" % size + data[:8]
+	return square
+
+
+def test_each_image_is_squared_once_per_size_even_when_racing(tmp_path):
+	calls = []
+	cache = ProcessedCoverCache(tmp_path, process=_counting_square(calls))
+	with ThreadPoolExecutor(max_workers=8) as pool:
+		results = list(pool.map(lambda _n: cache.square(IMAGE, 600), range(8)))
+
+	assert len(set(results)) == 1
+	assert calls == [(IMAGE, 600)]
+	cache.square(IMAGE, 300)
+	assert len(calls) == 2
+
+
+def test_squaring_a_squared_cover_is_a_cache_hit(tmp_path):
+	calls = []
+	cache = ProcessedCoverCache(tmp_path, process=_counting_square(calls))
+	squared = cache.square(IMAGE, 600)
+
+	assert cache.square(squared, 600) == squared
+	assert len(calls) == 1
+
+
+def test_processed_covers_spill_to_disk_beyond_memory_budget(tmp_path):
+	calls = []
+	cache = ProcessedCoverCache(tmp_path, process=_counting_square(calls), max_memory_bytes=0)
+	first = cache.square(IMAGE, 600)
+
+	rerun = ProcessedCoverCache(tmp_path, process=_counting_square(calls))
+
+	assert rerun.square(IMAGE, 600) == first
+	assert len(calls) == 1
+
+
+def test_processed_spill_keeps_only_the_newest_covers(tmp_path):
+	cache = ProcessedCoverCache(tmp_path, process=_counting_square([]), max_files=2)
+	for n in range(4):
+		cache.square(IMAGE + bytes([n]), 600)
+		time.sleep(0.01)
+
+	cache.prune()
+
+	assert len(list(tmp_path.glob("sq-*.jpg"))) == 2
@@ -1,6 +1,10 @@
+import subprocess, sys
+
 import pandas as pd
+import pytest
 
-from csvmusic.core.csv_import import load_csv, tracks_from_csv
+from benchmarks.bench_csv_import import tracks_from_rows
+from csvmusic.core.csv_import import iter_csv_tracks, load_csv, tracks_from_csv
 
 
 def test_csv_without_spotify_id_imports(tmp_path):
@@ -75,3 +79,156 @@ def test_blank_playlist_names_fall_back_to_csv_filename(tmp_path):
 	track = tracks_from_csv(load_csv(path))[0]
 
 	assert track["playlist"] == "My Playlist"
+
+
+def test_vectorized_tracks_match_row_by_row_conversion(tmp_path):
+	from benchmarks.bench_csv_import import write_synthetic_csv
+
+	df = load_csv(write_synthetic_csv(tmp_path / "library.csv", 3000))
+
+	tracks = tracks_from_csv(df)
+
+	assert tracks == tracks_from_rows(df)
+	assert len(tracks) == 3000 - 31
+	assert {type(track["duration_ms"]) for track in tracks} == {int}
+
+
+def test_vectorized_tracks_match_on_raw_frames():
+	df = pd.DataFrame({
+		"Track name": ["One", "", None, "  Two  "],
+		"Artist name": ["A", "B", "C", "D"],
+		"Playlist name": ["P", "P", "P", "Q"],
+		"ISRC": ["US1", None, "nan", ""],
+		"Spotify - id": ["spotify:track:abc", "nan", "spotify:track:", None],
+		"Release date": ["1972-01-01", "0999", "abcd", None],
+		"Duration (ms)": [1000, None, 3.7, "x"],
+		"Track number": [0, 2, 1, 5],
+	})
+
+	assert tracks_from_csv(df) == tracks_from_rows(df)
+	assert tracks_from_csv(df, "Q") == tracks_from_rows(df, "Q")
+	assert tracks_from_csv(df[df["Playlist name"] == "none"]) == []
+
+
+def test_semicolon_export_with_bom_is_sniffed(tmp_path):
+	path = tmp_path / "export.csv"
+	path.write_bytes(
+		"﻿Track name;Artist name;Playlist name;Duration (ms);Notes\n"
+		"1999;Prince;Party;219000;keep, this\n".encode("utf-8")
+	)
+
+	df = load_csv(path)
+	track = tracks_from_csv(df)[0]
+
+	assert "Notes" not in df.columns
+	assert track["title"] == "1999"
+	assert track["artists"] == "Prince"
+	assert track["duration_ms"] == 219000
+
+
+def test_cp1252_export_is_decoded(tmp_path):
+	path = tmp_path / "export.csv"
+	path.write_bytes("Track name,Artist name,Playlist name\nCafé,Beyoncé,Mix\n".encode("cp1252"))
+
+	track = tracks_from_csv(load_csv(path))[0]
+
+	assert track["title"] == "Café"
+	assert track["artists"] == "Beyoncé"
+
+
+def test_streamed_tracks_match_whole_file_conversion(tmp_path):
+	from benchmarks.bench_csv_import import write_synthetic_csv
+
+	path = write_synthetic_csv(tmp_path / "library.csv", 1200)
+
+	assert list(iter_csv_tracks(path, chunksize=97)) == tracks_from_csv(load_csv(path))
+
+
+def test_first_track_is_yielded_before_the_last_chunk_is_read(monkeypatch, tmp_path):
+	path = tmp_path / "long.csv"
+	pd.DataFrame([{"Track name": f"Song {n}", "Artist name": "A", "Playlist name": "Long"} for n in range(10)]).to_csv(path, index=False)
+	read_csv = pd.read_csv
+	chunks_read = []
+
+	def counting(*args, **kwargs):
+		reader = read_csv(*args, **kwargs)
+
+		class Counting:
+			def __enter__(self):
+				return self
+
+			def __exit__(self, *_exc):
+				reader.close()
+
+			def __iter__(self):
+				for chunk in reader:
+					chunks_read.append(len(chunk))
+					yield chunk
+
+		return Counting()
+
+	monkeypatch.setattr(pd, "read_csv", counting)
+	stream = iter_csv_tracks(path, chunksize=4)
+
+	assert next(stream)["title"] == "Song 0"
+	assert chunks_read == [4]
+	assert len(list(stream)) == 9
+	assert chunks_read == [4, 4, 2]
+
+
+def test_second_playlist_is_rejected_when_its_chunk_is_reached(tmp_path):
+	path = tmp_path / "two.csv"
+	rows = [{"Track name": f"Song {n}", "Artist name": "A", "Playlist name": "One"} for n in range(10)]
+	rows.append({"Track name": "Late", "Artist name": "B", "Playlist name": "Two"})
+	pd.DataFrame(rows).to_csv(path, index=False)
+
+	stream = iter_csv_tracks(path, chunksize=4)
+
+	assert [next(stream)["title"] for _ in range(8)] == [f"Song {n}" for n in range(8)]
+	with pytest.raises(ValueError, match="multiple playlists"):
+		next(stream)
+
+
+def test_python_engine_covers_files_the_c_parser_rejects_late(monkeypatch, tmp_path):
+	path = tmp_path / "mix.csv"
+	pd.DataFrame([{"Track name": f"Song {n}", "Artist name": "A", "Playlist name": "Mix"} for n in range(10)]).to_csv(path, index=False)
+	read_csv = pd.read_csv
+
+	def c_engine_fails_on_third_chunk(*args, engine=None, **kwargs):
+		reader = read_csv(*args, engine=engine, **kwargs)
+		if engine != "c":
+			return reader
+
+		class Failing:
+			def __enter__(self):
+				return self
+
+			def __exit__(self, *_exc):
+				reader.close()
+
+			def __iter__(self):
+				for index, chunk in enumerate(reader):
+					if index == 2:
+						raise pd.errors.ParserError("Error tokenizing data")
+					yield chunk
+
+		return Failing()
+
+	monkeypatch.setattr(pd, "read_csv", c_engine_fails_on_third_chunk)
+
+	assert [track["title"] for track in iter_csv_tracks(path, chunksize=4)] == [f"Song {n}" for n in range(10)]
+
+
+def test_pandas_is_imported_only_when_a_csv_is_read(tmp_path):
+	path = tmp_path / "playlist.csv"
+	path.write_text("Track name,Artist name,Playlist name\nSong,Artist,Mix\n", encoding="utf-8")
+	script = (
+		"import sys\n"
+		"from csvmusic.core.csv_import import iter_csv_tracks\n"
+		f"stream = iter_csv_tracks({str(path)!r})\n"
+		"assert 'pandas' not in sys.modules\n"
+		"assert [t['title'] for t in stream] == ['Song']\n"
+		"assert 'pandas' in sys.modules\n"
+	)
+	result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+	assert result.returncode == 0, result.stderr
@@ -0,0 +1,62 @@
+import os
+import unicodedata
+
+from csvmusic.core import dir_index, downloader
+from csvmusic.core.dir_index import DirectoryIndex, directory_index
+
+
+def test_matching_ignores_unicode_normalization(tmp_path):
+	nfd = unicodedata.normalize("NFD", "Beyoncé - Halo")
+	(tmp_path / f"{nfd}.webm").write_bytes(b"a")
+	(tmp_path / "Beyoncé - Halo (Live).m4a").write_bytes(b"b")
+
+	index = DirectoryIndex(tmp_path)
+
+	assert [p.name for p in index.matching("Beyoncé - Halo")] == [f"{nfd}.webm"]
+	assert index.contains("Beyoncé - Halo.webm")
+	assert index.find("Beyoncé - Halo.webm") == tmp_path / f"{nfd}.webm"
+
+
+def test_lookups_ignore_case_like_windows_and_macos(tmp_path):
+	(tmp_path / "AC／DC - Thunderstruck.M4A").write_bytes(b"a")
+	(tmp_path / "ﬁre - Straße.mp3").write_bytes(b"b")
+
+	index = DirectoryIndex(tmp_path)
+
+	assert index.find("ac／dc - thunderstruck.m4a") == tmp_path / "AC／DC - Thunderstruck.M4A"
+	assert index.contains("FIRE - STRASSE.MP3")
+	assert [p.name for p in index.matching("AC／DC - THUNDERSTRUCK")] == ["AC／DC - Thunderstruck.M4A"]
+
+
+def test_lookups_reuse_one_scan_until_folder_changes(monkeypatch, tmp_path):
+	monkeypatch.setattr(dir_index, "_RACY_WINDOW_S", 0.0)
+	for number in range(5000):
+		(tmp_path / f"Artist - Song {number}.m4a").write_bytes(b"")
+	past = os.stat(tmp_path).st_mtime_ns - 10**9
+	os.utime(tmp_path, ns=(past, past))
+	index = DirectoryIndex(tmp_path)
+
+	assert all(index.contains(f"Artist - Song {number}.m4a") for number in range(5000))
+	assert index.scans == 1
+
+	(tmp_path / "Artist - New.m4a").write_bytes(b"")
+	os.utime(tmp_path, ns=(past + 1, past + 1))
+
+	assert index.contains("Artist - New.m4a")
+	assert index.scans == 2
+	assert len(index) == 5001
+
+
+def test_cleanup_and_replace_keep_shared_index_current(tmp_path):
+	index = directory_index(tmp_path)
+	(tmp_path / "Song.webm").write_bytes(b"a")
+	(tmp_path / "Song.part").write_bytes(b"b")
+
+	downloader._cleanup_outputs(tmp_path, "Song")
+	assert not index.contains("Song.webm")
+
+	(tmp_path / "Song.tmp").write_bytes(b"c")
+	downloader._replace_file(tmp_path / "Song.tmp", tmp_path / "Song.mp3")
+
+	assert index.contains("Song.mp3")
+	assert not index.contains("Song.tmp")
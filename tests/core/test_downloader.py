@@ -1,6 +1,12 @@
-from csvmusic.core import downloader
+from csvmusic.core import downloader, tagging
+from csvmusic.core.loudness_cache import LoudnessCache
+from csvmusic.core.transcode import TranscodeCancelled
+import pathlib
+import sys
 import unicodedata
 
+import pytest
+
 
 def test_youtube_client_fallbacks_use_current_client_names():
 	assert downloader.YOUTUBE_CLIENTS[0] == "web_embedded"
@@ -97,41 +103,29 @@ def test_sanitize_name_shortens_long_windows_filenames_deterministically():
 	assert first == downloader.sanitize_name("Orchestra - " + "A" * 300)
 
 
-def test_tag_file_writes_mp3_track_and_disc_numbers(monkeypatch, tmp_path):
-	tags = {}
-
-	class FakeEasyID3(dict):
-		def save(self, *_args, **_kwargs):
-			pass
-
-	class FakeID3:
-		def __init__(self, _path):
-			pass
-
-	def fake_easy_id3(_path=None):
-		return tags_object
-
-	tags_object = FakeEasyID3()
-	monkeypatch.setattr(downloader, "EasyID3", fake_easy_id3)
-	monkeypatch.setattr(downloader, "ID3", FakeID3)
+def test_tag_file_writes_mp3_track_and_disc_numbers(tmp_path):
+	path = tmp_path / "track.mp3"
+	path.write_bytes(b"\xff\xfb" + b"\x00" * 4096)
 
 	downloader.tag_file(
-		tmp_path / "track.mp3",
+		path,
 		{"title": "Song", "artists": "Artist", "album": "Album", "track_no": 7, "disc_no": 2},
 		None,
 	)
 
-	assert tags_object["tracknumber"] == "7"
-	assert tags_object["discnumber"] == "2"
+	tags = tagging.ID3(path)
+	assert str(tags["TIT2"]) == "Song"
+	assert str(tags["TRCK"]) == "7"
+	assert str(tags["TPOS"]) == "2"
 
 
 def test_tag_file_writes_m4a_track_and_disc_numbers(monkeypatch, tmp_path):
 	class FakeMP4(dict):
-		def save(self):
+		def save(self, **_kwargs):
 			pass
 
 	tags = FakeMP4()
-	monkeypatch.setattr(downloader, "MP4", lambda _path: tags)
+	monkeypatch.setattr(tagging, "MP4", lambda _path: tags)
 
 	downloader.tag_file(
 		tmp_path / "track.m4a",
@@ -145,11 +139,11 @@ def test_tag_file_writes_m4a_track_and_disc_numbers(monkeypatch, tmp_path):
 
 def test_tag_file_writes_opus_metadata(monkeypatch, tmp_path):
 	class FakeOpus(dict):
-		def save(self):
+		def save(self, **_kwargs):
 			pass
 
 	tags = FakeOpus()
-	monkeypatch.setattr(downloader, "OggOpus", lambda _path: tags)
+	monkeypatch.setattr(tagging, "OggOpus", lambda _path: tags)
 
 	downloader.tag_file(
 		tmp_path / "track.opus",
@@ -162,3 +156,325 @@ def test_tag_file_writes_opus_metadata(monkeypatch, tmp_path):
 	assert tags["date"] == ["2026"]
 	assert tags["tracknumber"] == ["7"]
 	assert tags["discnumber"] == ["2"]
+
+
+class _FakeYoutubeDL:
+	built = []
+
+	def __init__(self, params):
+		self.params = dict(params)
+		self.urls = []
+		self.closed = False
+		_FakeYoutubeDL.built.append(self)
+
+	def extract_info(self, url, download=True):
+		import yt_dlp
+
+		self.urls.append(url)
+		client = ((self.params.get("extractor_args") or {}).get("youtube") or {}).get("player_client")
+		if client == ["web_embedded"]:
+			self.params["logger"].error("ERROR: [youtube] abc: Requested format is not available")
+			raise yt_dlp.utils.DownloadError("Requested format is not available")
+		path = self.params["outtmpl"]["default"].replace("%(ext)s", "opus")
+		with open(path, "wb") as fh:
+			fh.write(b"audio")
+		return {"id": url}
+
+	def close(self):
+		self.closed = True
+
+
+def test_ytdlp_engine_reuses_youtubedl_per_command_line(tmp_path, monkeypatch):
+	monkeypatch.setattr(downloader, "log", lambda *_args, **_kwargs: None)
+	_FakeYoutubeDL.built = []
+	engine = downloader.YtdlpEngine(ydl_factory=_FakeYoutubeDL)
+	args = ["-f", "bestaudio", "--extractor-args", "youtube:player_client=ios"]
+
+	first = engine.run(args + ["-o", str(tmp_path / "one.%(ext)s"), "https://youtu.be/one"])
+	retry = engine.run(args + ["-o", str(tmp_path / "one.%(ext)s"), "https://youtu.be/one"])
+	second = engine.run(args + ["-o", str(tmp_path / "two.%(ext)s"), "https://youtu.be/two"])
+	failed = engine.run(["-f", "bestaudio", "--extractor-args", "youtube:player_client=web_embedded", "-o", str(tmp_path / "x.%(ext)s"), "https://youtu.be/x"])
+
+	assert first[0] == retry[0] == second[0] == 0
+	assert (tmp_path / "one.opus").exists() and (tmp_path / "two.opus").exists()
+	assert len(_FakeYoutubeDL.built) == 3
+	assert _FakeYoutubeDL.built[0].urls == ["https://youtu.be/one", "https://youtu.be/one"]
+	assert _FakeYoutubeDL.built[1].params["outtmpl"]["default"] == str(tmp_path / "two.%(ext)s")
+	assert failed[0] == 1
+	assert "Requested format is not available" in failed[2]
+	assert engine.stats()["calls"] == 4
+
+	engine.close()
+	assert all(ydl.closed for ydl in _FakeYoutubeDL.built)
+
+
+def test_ytdlp_engine_closes_the_least_recently_used_idle_youtubedl(tmp_path, monkeypatch):
+	monkeypatch.setattr(downloader, "log", lambda *_args, **_kwargs: None)
+	_FakeYoutubeDL.built = []
+	engine = downloader.YtdlpEngine(ydl_factory=_FakeYoutubeDL, max_idle=2)
+
+	for name in ("one", "two", "three"):
+		engine.run(["-f", "bestaudio", "-o", str(tmp_path / f"{name}.%(ext)s"), f"https://youtu.be/{name}"])
+
+	assert [ydl.closed for ydl in _FakeYoutubeDL.built] == [True, False, False]
+	engine.close()
+
+
+def test_internal_download_keeps_client_fallback_order_through_engine(tmp_path, monkeypatch):
+	monkeypatch.setattr(downloader, "log", lambda *_args, **_kwargs: None)
+	_FakeYoutubeDL.built = []
+	engine = downloader.YtdlpEngine(ydl_factory=_FakeYoutubeDL)
+	monkeypatch.setattr(downloader, "ytdlp_engine", lambda: engine)
+	monkeypatch.setattr(downloader, "CLIENT_SELECTOR", downloader.ClientSelector(downloader.YOUTUBE_CLIENTS))
+
+	path = downloader.download_opus("abc", tmp_path, "Artist - Song", yt_dlp_bin=downloader.INTERNAL_YTDLP)
+
+	assert path == tmp_path / "Artist - Song.opus"
+	clients = [((ydl.params.get("extractor_args") or {}).get("youtube") or {}).get("player_client") for ydl in _FakeYoutubeDL.built]
+	assert clients == [["web_embedded"], None]
+	assert _FakeYoutubeDL.built[1].urls == [downloader.YTM_URL.format(vid="abc")]
+
+
+def test_client_selector_demotes_failing_client_and_reprobes_it():
+	selector = downloader.ClientSelector(["web_embedded", None, "ios"], demote_after=2, reprobe_every=5)
+	assert selector.order() == ["web_embedded", None, "ios"]
+
+	for _ in range(2):
+		selector.record("web_embedded", False, 1.0)
+	selector.record(None, True, 2.0)
+
+	assert selector.order()[:2] == [None, "ios"]
+	assert selector.order()[-1] == "web_embedded"
+	orders = [selector.order() for _ in range(5)]
+	assert sum(1 for order in orders if order[0] == "web_embedded") == 1
+
+	selector.record("web_embedded", True, 0.5)
+	assert selector.stats()["web_embedded"]["failure_streak"] == 0
+	assert selector.order() == [None, "ios", "web_embedded"]
+
+
+def test_client_selector_prefers_faster_client_at_equal_success():
+	selector = downloader.ClientSelector(["web_embedded", None])
+	for _ in range(3):
+		selector.record("web_embedded", True, 4.0)
+		selector.record(None, True, 1.0)
+
+	assert selector.order() == [None, "web_embedded"]
+
+
+def test_downloads_skip_session_wide_broken_client(tmp_path, monkeypatch):
+	monkeypatch.setattr(downloader, "log", lambda *_args, **_kwargs: None)
+	monkeypatch.setattr(downloader, "CLIENT_SELECTOR", downloader.ClientSelector(downloader.YOUTUBE_CLIENTS))
+	clients = []
+
+	def fake_detail(cmd):
+		client = next((tok.split("=", 1)[1] for tok in cmd if tok.startswith("youtube:player_client=")), None)
+		clients.append(client)
+		if client == "web_embedded":
+			return 1, "Requested format is not available"
+		out = pathlib.Path(cmd[cmd.index("-o") + 1].replace("%(ext)s", "opus"))
+		out.write_bytes(b"audio")
+		return 0, ""
+
+	monkeypatch.setattr(downloader, "_run_ytdlp_detail", fake_detail)
+	for index in range(4):
+		downloader.download_opus(f"v{index}", tmp_path, f"Artist - Song {index}", yt_dlp_bin="yt-dlp")
+
+	# Only the first track pays for the broken client; later tracks go straight to the default.
+	assert clients == ["web_embedded", None, None, None, None]
+
+
+_EBUR128_STDERR = """
+[Parsed_ebur128_0 @ 0x1] Summary:
+
+  Integrated loudness:
+    I:         -10.0 LUFS
+    Threshold: -20.1 LUFS
+
+  True peak:
+    Peak:        -0.5 dBFS
+"""
+
+
+class _FakeProc:
+	def __init__(self, stderr=""):
+		self.returncode = 0
+		self.stderr = stderr
+		self.stdout = ""
+
+
+def _fake_ffmpeg(calls, stderr):
+	def run(cmd):
+		calls.append(cmd)
+		for arg in cmd:
+			if arg.endswith((".m4a", ".mp3")):
+				pathlib.Path(arg).write_bytes(b"audio")
+		return _FakeProc(stderr)
+	return run
+
+
+def test_ebur128_summary_is_parsed():
+	assert downloader._extract_ebur128_summary(_EBUR128_STDERR) == {"input_i": -10.0, "input_tp": -0.5}
+	assert downloader._extract_ebur128_summary("no meter output") is None
+
+
+def test_static_normalize_measures_each_video_once(tmp_path, monkeypatch):
+	cache = LoudnessCache(tmp_path / "loudness.sqlite3")
+	monkeypatch.setattr(downloader, "default_loudness_cache", lambda: cache)
+	calls = []
+	loudnorm = '{"input_i" : "-10.00", "input_tp" : "-0.50"}'
+	monkeypatch.setattr(downloader, "_run_capture", _fake_ffmpeg(calls, loudnorm))
+	processing = {"normalize": True}
+	src = tmp_path / "src.webm"
+	src.write_bytes(b"audio")
+
+	first = downloader._audio_filter_chain(processing, src=src, ffmpeg_bin="ffmpeg", video_id="vid1")
+	second = downloader._audio_filter_chain(processing, src=src, ffmpeg_bin="ffmpeg", video_id="vid1")
+
+	assert first == second
+	assert "volume=-6.00dB" in first
+	assert sum(1 for cmd in calls if "null" in cmd) == 1
+
+
+def test_replaygain_m4a_copies_stream_and_meters_in_same_run(tmp_path, monkeypatch):
+	cache = LoudnessCache(tmp_path / "loudness.sqlite3")
+	monkeypatch.setattr(downloader, "default_loudness_cache", lambda: cache)
+	calls = []
+	monkeypatch.setattr(downloader, "_run_capture", _fake_ffmpeg(calls, _EBUR128_STDERR))
+	processing = {"normalize": True, "normalize_mode": downloader.NORMALIZE_MODE_REPLAYGAIN}
+	gains = []
+
+	for name in ("a", "b"):
+		src = tmp_path / f"{name}.webm"
+		src.write_bytes(b"audio")
+		pending = downloader._m4a_encode(src, tmp_path / f"{name}.m4a", "ffmpeg", "vid1", processing)
+		pending.run()
+		gains.append((pending.replaygain[0], round(pending.replaygain[1], 4)))
+
+	assert len(calls) == 2
+	assert "copy" in calls[0] and downloader._EBUR128_FILTER in calls[0]
+	assert downloader._EBUR128_FILTER not in calls[1]
+	assert gains == [(-8.0, 0.9441), (-8.0, 0.9441)]
+
+
+def test_tag_file_writes_replaygain_in_the_same_save(monkeypatch, tmp_path):
+	path = tmp_path / "track.mp3"
+	path.write_bytes(b"\xff\xfb\x90\x00" * 64)
+	saves = []
+	original_save = tagging.ID3.save
+	monkeypatch.setattr(tagging.ID3, "save", lambda self, *args, **kwargs: (saves.append(path), original_save(self, *args, **kwargs)))
+
+	downloader.tag_file(path, {"title": "Song", "artists": "Artist", "album": "Album"}, None, replaygain=(-6.5, 0.98))
+
+	assert len(saves) == 1
+	tags = tagging.ID3(path)
+	assert str(tags["TIT2"]) == "Song"
+	assert str(tags["TXXX:REPLAYGAIN_TRACK_GAIN"]) == "-6.50 dB"
+	assert str(tags["TXXX:REPLAYGAIN_TRACK_PEAK"]) == "0.980000"
+
+
+def test_stream_pipeline_feeds_producer_stdout_to_consumer_stdin(tmp_path):
+	out = tmp_path / "out.bin"
+	producer = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'x' * 200000); sys.stderr.write('fetched')"]
+	consumer = [sys.executable, "-c", f"import sys; open({str(out)!r}, 'wb').write(sys.stdin.buffer.read())"]
+
+	ytdlp_rc, ytdlp_err, ffmpeg_rc, _ = downloader._run_stream_pipeline(producer, consumer)
+
+	assert (ytdlp_rc, ffmpeg_rc) == (0, 0)
+	assert "fetched" in ytdlp_err
+	assert out.read_bytes() == b"x" * 200000
+
+
+def _mp3_download_fakes(monkeypatch, *, stream_ok):
+	monkeypatch.setattr(downloader, "log", lambda *_args, **_kwargs: None)
+	monkeypatch.setattr(downloader, "CLIENT_SELECTOR", downloader.ClientSelector(downloader.YOUTUBE_CLIENTS))
+	monkeypatch.setattr(downloader, "ytdlp_js_runtime_args", lambda _bin: [])
+	calls = []
+
+	def fake_stream(ytdlp_cmd, ffmpeg_cmd):
+		calls.append("stream")
+		assert ytdlp_cmd[ytdlp_cmd.index("-o") + 1] == "-"
+		assert "pipe:0" in ffmpeg_cmd
+		if stream_ok:
+			pathlib.Path(ffmpeg_cmd[-1]).write_bytes(b"mp3")
+			return 0, "", 0, ""
+		return 0, "", 1, "Invalid data found when processing input"
+
+	def fake_detail(cmd):
+		calls.append("ytdlp")
+		pathlib.Path(cmd[cmd.index("-o") + 1]).write_bytes(b"audio")
+		return 0, ""
+
+	def fake_capture(cmd):
+		calls.append("ffmpeg")
+		pathlib.Path(cmd[-1]).write_bytes(b"mp3")
+		return _FakeProc()
+
+	monkeypatch.setattr(downloader, "_run_stream_pipeline", fake_stream)
+	monkeypatch.setattr(downloader, "_run_ytdlp_detail", fake_detail)
+	monkeypatch.setattr(downloader, "_run_capture", fake_capture)
+	return calls
+
+
+def test_mp3_download_streams_without_temp_file(tmp_path, monkeypatch):
+	calls = _mp3_download_fakes(monkeypatch, stream_ok=True)
+
+	dst = downloader.download_mp3("vid1", tmp_path, "Artist - Song", yt_dlp_bin="yt-dlp", ffmpeg_bin="ffmpeg")
+
+	assert calls == ["stream"]
+	assert sorted(p.name for p in tmp_path.iterdir()) == [dst.name]
+
+
+def test_mp3_download_falls_back_to_temp_file_when_pipe_fails(tmp_path, monkeypatch):
+	calls = _mp3_download_fakes(monkeypatch, stream_ok=False)
+
+	dst = downloader.download_mp3("vid1", tmp_path, "Artist - Song", yt_dlp_bin="yt-dlp", ffmpeg_bin="ffmpeg")
+
+	assert calls == ["stream", "ytdlp", "ffmpeg"]
+	assert sorted(p.name for p in tmp_path.iterdir()) == [dst.name]
+
+
+def test_internal_engine_and_static_leveling_keep_temp_file_mode():
+	assert not downloader._can_stream_encode(downloader.INTERNAL_YTDLP, None, "vid1")
+	assert downloader._can_stream_encode("yt-dlp", {"normalize": True, "normalize_mode": downloader.NORMALIZE_MODE_REPLAYGAIN}, "vid1")
+
+
+def test_m4a_download_stays_off_the_final_path_until_committed(tmp_path, monkeypatch):
+	monkeypatch.setattr(downloader, "log", lambda *_args, **_kwargs: None)
+	monkeypatch.setattr(downloader, "CLIENT_SELECTOR", downloader.ClientSelector(downloader.YOUTUBE_CLIENTS))
+	monkeypatch.setattr(downloader, "ytdlp_js_runtime_args", lambda _bin: [])
+
+	def fake_detail(cmd):
+		pathlib.Path(cmd[cmd.index("-o") + 1].replace("%(ext)s", "m4a")).write_bytes(b"audio")
+		return 0, ""
+
+	def fake_capture(cmd):
+		pathlib.Path(cmd[-1]).write_bytes(b"aac")
+		return _FakeProc()
+
+	monkeypatch.setattr(downloader, "_run_ytdlp_detail", fake_detail)
+	monkeypatch.setattr(downloader, "_run_capture", fake_capture)
+
+	pending = downloader.fetch_m4a("vid1", tmp_path, "Artist - Song", yt_dlp_bin="yt-dlp", ffmpeg_bin="ffmpeg")
+	assert not pending.dst.exists()
+	staged = pending.run(stage=True)
+
+	assert staged != pending.dst and not pending.dst.exists()
+	assert pending.commit(staged) == pending.dst
+	assert sorted(p.name for p in tmp_path.iterdir()) == ["Artist - Song.m4a"]
+
+
+def test_cancelled_encode_removes_download_and_partial_output(tmp_path):
+	src = tmp_path / "Song.tmp.webm"
+	src.write_bytes(b"audio")
+	out = tmp_path / "Song.normalized.m4a"
+
+	def cancelled_runner(cmd):
+		out.write_bytes(b"partial")
+		raise TranscodeCancelled("transcode cancelled")
+
+	pending = downloader.PendingEncode(video_id="vid1", src=src, dst=tmp_path / "Song.m4a", out=out, commands=[lambda _runner: (["ffmpeg"], False)])
+	with pytest.raises(TranscodeCancelled):
+		pending.run(cancelled_runner)
+
+	assert list(tmp_path.iterdir()) == []
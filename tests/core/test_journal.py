@@ -0,0 +1,73 @@
+import json
+
+from csvmusic.core import journal as journal_mod
+from csvmusic.core.journal import JOURNAL_FILE, PipelineJournal, open_journal, untagged_files
+
+
+def _track(title="Song", **extra):
+	return {"title": title, "artists": "Artist", "duration_ms": 180000, **extra}
+
+
+def _option(vid):
+	return {"videoId": vid, "title": "Song", "author": "Artist", "source": "music", "score": 0.9}
+
+
+def test_journal_replays_latest_state_after_reopen(tmp_path):
+	journal = open_journal(tmp_path)
+	track = _track()
+	journal.record_match(track, _option("a"), 0.9, [_option("a"), _option("b")])
+	audio = tmp_path / "Artist - Song.mp3"
+	audio.write_bytes(b"audio")
+	journal.record_download(track, "a", audio)
+	journal.close()
+
+	reopened = open_journal(tmp_path)
+
+	match, confidence, options = reopened.match_for(track)
+	assert match["videoId"] == "a"
+	assert confidence == 0.9
+	assert [o["videoId"] for o in options] == ["a", "b"]
+	assert reopened.download_for(track) == {"video_id": "a", "file_path": audio.resolve(), "tagged": False}
+	assert untagged_files(tmp_path) == {str(audio.resolve()).casefold()}
+
+
+def test_journal_finds_entry_through_any_identity_key(tmp_path):
+	journal = open_journal(tmp_path)
+	journal.record_match(_track(isrc="USABC1234567"), _option("a"), 0.9, [_option("a")])
+
+	# A re-export that lost the ISRC still resolves through the text key.
+	assert journal.match_for(_track())[0]["videoId"] == "a"
+	assert journal.match_for(_track("Other Song")) is None
+
+
+def test_journal_skips_torn_last_line_and_missing_files(tmp_path):
+	journal = open_journal(tmp_path)
+	track = _track()
+	journal.record_download(track, "a", tmp_path / "gone.mp3")
+	journal.close()
+	with (tmp_path / JOURNAL_FILE).open("a", encoding="utf-8") as fh:
+		fh.write('{"v": 1, "keys": ["text:so')
+
+	reopened = open_journal(tmp_path)
+
+	assert reopened.download_for(track) is None
+	assert reopened.match_for(track) is None
+
+
+def test_journal_compacts_superseded_lines(tmp_path, monkeypatch):
+	monkeypatch.setattr(journal_mod, "_COMPACT_SLACK", 3)
+	journal = open_journal(tmp_path)
+	track = _track()
+	audio = tmp_path / "Artist - Song.mp3"
+	audio.write_bytes(b"audio")
+	for _ in range(5):
+		journal.record_download(track, "a", audio)
+	journal.record_tagged(track, "a", audio)
+	journal.close()
+
+	reopened = PipelineJournal(tmp_path / JOURNAL_FILE)
+
+	lines = (tmp_path / JOURNAL_FILE).read_text(encoding="utf-8").splitlines()
+	assert len(lines) == 1
+	assert json.loads(lines[0])["tagged"] is True
+	assert reopened.download_for(track)["tagged"] is True
@@ -0,0 +1,109 @@
+import os
+
+from csvmusic.core import library_store
+from csvmusic.core.downloader import write_m3u
+from csvmusic.core.library_store import LibraryStore
+
+
+def _untouched(_path):
+	pass
+
+
+def test_canonical_path_depends_on_every_setting(tmp_path):
+	store = LibraryStore(tmp_path / "lib")
+	base = store.canonical_path("abc123", "mp3", quality={"mp3_quality": 0}, processing={"normalize": True})
+
+	assert base == store.canonical_path("abc123", "mp3", quality={"mp3_quality": 0}, processing={"normalize": True, "bass_gain": 0})
+	assert base != store.canonical_path("abc123", "mp3", quality={"mp3_quality": 2}, processing={"normalize": True})
+	assert base != store.canonical_path("abc123", "mp3", quality={"mp3_quality": 0})
+	assert base != store.canonical_path("abc123", "m4a", quality={"mp3_quality": 0}, processing={"normalize": True})
+	assert base.suffix == ".mp3"
+
+
+def test_path_for_keys_only_settings_that_change_the_file(tmp_path):
+	store = LibraryStore(tmp_path / "lib")
+	processing = {"normalize": True}
+
+	assert store.path_for("abc123", "mp3", cbr_bitrate_kbps=320) == store.canonical_path("abc123", "mp3", quality={"cbr_bitrate_kbps": 320})
+	assert store.path_for("abc123", "mp3", audio_processing=processing) != store.path_for("abc123", "mp3")
+	assert store.path_for("abc123", "m4a", mp3_quality=4, audio_processing=processing) == store.path_for("abc123", "m4a", audio_processing=processing)
+	assert store.path_for("abc123", "opus", audio_processing=processing) == store.path_for("abc123", "opus")
+
+
+def test_adopt_then_link_shares_one_file(tmp_path):
+	store = LibraryStore(tmp_path / "lib")
+	canonical = store.canonical_path("abc123", "m4a")
+	first = tmp_path / "Road Trip" / "Artist - Song.m4a"
+	first.parent.mkdir()
+	first.write_bytes(b"audio")
+
+	assert store.link_into(canonical, tmp_path / "Gym" / "Artist - Song.m4a", _untouched) is None
+	assert store.adopt(first, canonical) == library_store.LINK_HARDLINK
+	assert store.link_into(canonical, tmp_path / "Gym" / "Artist - Song.m4a", _untouched) == library_store.LINK_HARDLINK
+
+	assert os.path.samefile(first, canonical)
+	assert os.path.samefile(tmp_path / "Gym" / "Artist - Song.m4a", canonical)
+	assert store.stats()["hits"] == 1
+	assert store.stats()["stored"] == 1
+
+
+def test_playlist_with_other_tags_gets_its_own_copy(tmp_path):
+	store = LibraryStore(tmp_path / "lib")
+	canonical = store.canonical_path("abc123", "m4a")
+	first = tmp_path / "Road Trip" / "Artist - Song.m4a"
+	first.parent.mkdir()
+	first.write_bytes(b"audio|track 3")
+	store.adopt(first, canonical)
+
+	def retag(path):
+		path.write_bytes(b"audio|track 7")
+
+	gym = tmp_path / "Gym" / "Artist - Song.m4a"
+	assert store.link_into(canonical, gym, retag) in (library_store.LINK_REFLINK, library_store.LINK_COPY)
+
+	assert gym.read_bytes() == b"audio|track 7"
+	assert first.read_bytes() == canonical.read_bytes() == b"audio|track 3"
+	assert not gym.with_name(gym.name + ".link").exists()
+
+
+def test_adopt_keeps_a_differently_tagged_download(tmp_path):
+	store = LibraryStore(tmp_path / "lib")
+	canonical = store.canonical_path("abc123", "m4a")
+	canonical.parent.mkdir(parents=True)
+	canonical.write_bytes(b"audio|track 3")
+	src = tmp_path / "Song.m4a"
+	src.write_bytes(b"audio|track 7")
+
+	assert store.adopt(src, canonical) == library_store.LINK_COPY
+	assert src.read_bytes() == b"audio|track 7"
+	assert canonical.read_bytes() == b"audio|track 3"
+
+
+def test_link_falls_back_to_copy(monkeypatch, tmp_path):
+	def no_links(*_args):
+		raise OSError("links not supported")
+
+	monkeypatch.setattr(library_store.os, "link", no_links)
+	monkeypatch.setattr(library_store, "_reflink", lambda _src, _dest: False)
+	store = LibraryStore(tmp_path / "lib")
+	canonical = store.canonical_path("abc123", "mp3")
+	src = tmp_path / "Song.mp3"
+	src.write_bytes(b"audio")
+
+	assert store.adopt(src, canonical) == library_store.LINK_COPY
+	assert src.read_bytes() == canonical.read_bytes() == b"audio"
+	assert not os.path.samefile(src, canonical)
+
+
+def test_m3u_points_at_canonical_file(tmp_path):
+	canonical = tmp_path / library_store.LIBRARY_DIR / "ab" / "abc123-0123456789ab.m4a"
+	tracks = [
+		{"title": "Song", "artists": "Artist", "album": "Album", "library_path": str(canonical)},
+		{"title": "Other", "artists": "Artist", "album": "Album"},
+	]
+
+	m3u = write_m3u(tmp_path, "Road Trip", tracks, "m4a")
+
+	lines = m3u.read_text(encoding="utf-8").splitlines()
+	assert f"../{library_store.LIBRARY_DIR}/ab/abc123-0123456789ab.m4a" in lines
+	assert "Artist - Other.m4a" in lines
@@ -0,0 +1,17 @@
+from csvmusic.core.loudness_cache import LoudnessCache
+
+
+def test_cache_round_trips_measurements(tmp_path):
+	cache = LoudnessCache(tmp_path / "loudness.sqlite3")
+
+	cache.put("abc123|flat", -11.5, -0.4)
+
+	assert cache.get("abc123|flat") == {"input_i": -11.5, "input_tp": -0.4}
+	assert cache.get("abc123|bass=g=3:f=110:w=0.6") is None
+	assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_persists_across_instances(tmp_path):
+	LoudnessCache(tmp_path / "loudness.sqlite3").put("abc123|flat", -9.0, 0.0)
+
+	assert len(LoudnessCache(tmp_path / "loudness.sqlite3")) == 1
@@ -0,0 +1,29 @@
+from benchmarks import bench_matching
+from csvmusic.core import ytmusic_match, ytmusic_pool
+
+
+def test_recorded_benchmark_holds_match_quality_and_call_budget(monkeypatch):
+	monkeypatch.setattr(ytmusic_match, "log", lambda *_args, **_kwargs: None)
+	tracks, expected = bench_matching.load_ground_truth()
+	client = bench_matching.RecordedYTMusic(bench_matching.load_responses())
+
+	report = bench_matching.run_benchmark(client, tracks, expected)
+
+	assert report["tracks"] == len(expected)
+	assert report["unrecorded_queries"] == 0
+	assert report["precision"] >= 0.85
+	assert report["recall"] >= 0.9
+	assert report["calls_per_track"] <= 2.0
+
+
+def test_benchmark_restores_pacing_and_default_pool(monkeypatch):
+	monkeypatch.setattr(ytmusic_match, "log", lambda *_args, **_kwargs: None)
+	before = ytmusic_pool.set_default_ytmusic_pool(None)
+	ytmusic_pool.set_default_ytmusic_pool(before)
+	tracks, expected = bench_matching.load_ground_truth()
+
+	bench_matching.run_benchmark(bench_matching.RecordedYTMusic({}), tracks[:2], expected[:2], mode="batch")
+
+	assert ytmusic_match.RATE_LIMIT_S > 0
+	assert ytmusic_match.SEARCH_RETRY_SLEEP_S > 0
+	assert ytmusic_pool.set_default_ytmusic_pool(before) is before
@@ -0,0 +1,84 @@
+import sqlite3
+
+from csvmusic.core import match_cache
+from csvmusic.core.match_cache import MatchCache
+
+
+def test_cache_returns_options_for_any_matching_key(tmp_path):
+	cache = MatchCache(tmp_path / "cache.sqlite3")
+	options = [{"videoId": "abc123", "score": 0.9}]
+
+	cache.put(["isrc:USRC1", "text:song|artist|36"], options)
+
+	assert cache.get(["sp:missing", "text:song|artist|36"]) == options
+	assert cache.hits == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+	cache = MatchCache(tmp_path / "cache.sqlite3", ttl_s=-1)
+	cache.put(["isrc:USRC1"], [{"videoId": "abc123", "score": 0.9}])
+
+	assert cache.get(["isrc:USRC1"]) is None
+	assert len(cache) == 0
+
+
+def test_eviction_drops_least_recently_used_keys(tmp_path):
+	cache = MatchCache(tmp_path / "cache.sqlite3", max_entries=2)
+	for key in ("a", "b", "c"):
+		cache.put([key], [{"videoId": key, "score": 0.9}])
+	cache.get(["a"])
+
+	cache.evict()
+
+	assert cache.get(["a"]) is not None
+	assert cache.get(["b"]) is None
+	assert len(cache) == 2
+
+
+def _last_used(path, key):
+	with sqlite3.connect(str(path)) as conn:
+		return conn.execute("SELECT last_used FROM matches WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_queue_last_used_refreshes_until_close(tmp_path):
+	path = tmp_path / "cache.sqlite3"
+	cache = MatchCache(path)
+	cache.put(["a"], [{"videoId": "a", "score": 0.9}])
+	with sqlite3.connect(str(path)) as conn:
+		conn.execute("UPDATE matches SET last_used = 0")
+	commits = []
+	real_conn = cache._conn
+
+	class CountingConnection:
+		def __getattr__(self, name):
+			return getattr(real_conn, name)
+
+		def commit(self):
+			commits.append(1)
+			real_conn.commit()
+
+	cache._conn = CountingConnection()
+
+	for _ in range(5):
+		assert cache.get(["a"]) is not None
+
+	assert commits == []
+	assert _last_used(path, "a") == 0
+	cache.close()
+	assert _last_used(path, "a") > 0
+
+
+def test_full_touch_batch_is_written_without_close(monkeypatch, tmp_path):
+	monkeypatch.setattr(match_cache, "_TOUCH_BATCH", 2)
+	path = tmp_path / "cache.sqlite3"
+	cache = MatchCache(path)
+	cache.put(["a"], [{"videoId": "a", "score": 0.9}])
+	cache.put(["b"], [{"videoId": "b", "score": 0.9}])
+	with sqlite3.connect(str(path)) as conn:
+		conn.execute("UPDATE matches SET last_used = 0")
+
+	cache.get(["a"])
+	cache.get(["b"])
+
+	assert _last_used(path, "a") > 0
+	assert _last_used(path, "b") > 0
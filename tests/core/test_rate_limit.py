@@ -0,0 +1,34 @@
+from csvmusic.core.rate_limit import TokenBucket
+
+
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_paces_requests():
+	clock = FakeClock()
+	bucket = TokenBucket(2.0, burst=2, clock=clock, sleep=clock.sleep)
+
+	waits = [bucket.acquire() for _ in range(4)]
+
+	assert waits[:2] == [0.0, 0.0]
+	assert waits[2] == 0.5
+	assert clock.now == 1.0
+
+
+def test_token_bucket_refills_while_idle():
+	clock = FakeClock()
+	bucket = TokenBucket(1.0, burst=1, clock=clock, sleep=clock.sleep)
+	bucket.acquire()
+
+	clock.now += 5.0
+
+	assert bucket.reserve() == 0.0
+	assert bucket.reserve() == 1.0
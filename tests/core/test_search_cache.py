@@ -0,0 +1,70 @@
+import threading
+
+from csvmusic.core.search_cache import SearchCache
+
+
+def test_repeated_keys_are_served_from_memory():
+	cache = SearchCache()
+	calls = []
+
+	def fetch():
+		calls.append(1)
+		return [{"videoId": "abc123"}]
+
+	first = cache.get_or_fetch(("song", "songs", 12), fetch)
+	second = cache.get_or_fetch(("song", "songs", 12), fetch)
+
+	assert first == second == [{"videoId": "abc123"}]
+	assert len(calls) == 1
+	assert cache.stats()["hits"] == 1
+
+
+def test_lru_drops_oldest_key():
+	cache = SearchCache(max_entries=1)
+	cache.get_or_fetch("a", lambda: [{"videoId": "a"}])
+	cache.get_or_fetch("b", lambda: [{"videoId": "b"}])
+
+	cache.get_or_fetch("a", lambda: [{"videoId": "a2"}])
+
+	assert cache.stats()["misses"] == 3
+
+
+def test_empty_results_are_not_cached():
+	cache = SearchCache()
+	cache.get_or_fetch("a", lambda: [])
+
+	assert cache.get_or_fetch("a", lambda: [{"videoId": "a"}]) == [{"videoId": "a"}]
+
+
+def test_concurrent_identical_requests_share_one_fetch():
+	cache = SearchCache()
+	release = threading.Event()
+	calls = []
+
+	def fetch():
+		calls.append(1)
+		release.wait(2)
+		return [{"videoId": "abc123"}]
+
+	results = []
+	threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("q", fetch))) for _ in range(4)]
+	for thread in threads:
+		thread.start()
+	while cache.stats()["coalesced"] < 3:
+		pass
+	release.set()
+	for thread in threads:
+		thread.join()
+
+	assert len(calls) == 1
+	assert results == [[{"videoId": "abc123"}]] * 4
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+	path = tmp_path / "search.sqlite3"
+	SearchCache(disk_path=path).get_or_fetch(("song", "songs", 12), lambda: [{"videoId": "abc123"}])
+
+	reopened = SearchCache(disk_path=path)
+
+	assert reopened.get_or_fetch(("song", "songs", 12), lambda: []) == [{"videoId": "abc123"}]
+	assert reopened.stats()["disk_hits"] == 1
@@ -0,0 +1,30 @@
+from csvmusic.core import startup
+from csvmusic.core.startup import run_startup_probes
+
+
+def test_failing_probe_is_logged_and_the_rest_still_run(monkeypatch):
+	logged = []
+	ran = []
+	monkeypatch.setattr(startup, "log", logged.append)
+
+	def broken():
+		raise RuntimeError("no ffmpeg")
+
+	timings = run_startup_probes([("ffmpeg", broken), ("js runtimes", lambda: ran.append("js"))])
+
+	assert ran == ["js"]
+	assert list(timings) == ["ffmpeg", "js runtimes"]
+	assert all(seconds >= 0 for seconds in timings.values())
+	assert logged == ["startup probe 'ffmpeg' failed: no ffmpeg"]
+
+
+def test_js_runtime_probe_warms_the_runtime_caches(monkeypatch):
+	calls = []
+	monkeypatch.setattr(startup, "log", lambda _msg: None)
+	monkeypatch.setattr(startup, "ytdlp_path", lambda: "yt-dlp")
+	monkeypatch.setattr(startup, "ytdlp_supports_js_runtimes", lambda yt_bin: calls.append(yt_bin) or True)
+	monkeypatch.setattr(startup, "detect_js_runtimes", lambda: calls.append("detect") or ())
+
+	startup.probe_js_runtimes()
+
+	assert calls == ["yt-dlp", "detect"]
@@ -0,0 +1,41 @@
+from mutagen.id3 import ID3
+
+from csvmusic.core import tagging
+
+
+def _mp3(path):
+	path.write_bytes(b"\xff\xfb" + b"\x00" * 4096)
+	return path
+
+
+def test_write_tags_saves_mp3_once_with_cover(monkeypatch, tmp_path):
+	path = _mp3(tmp_path / "track.mp3")
+	saves = []
+	original_save = ID3.save
+
+	def counting_save(self, *args, **kwargs):
+		saves.append(kwargs.get("v2_version"))
+		return original_save(self, *args, **kwargs)
+
+	monkeypatch.setattr(ID3, "save", counting_save)
+
+	tagging.write_tags(path, {"title": "Song", "artists": "Artist", "album": "Album", "year": 2024}, b"jpeg-bytes")
+
+	assert saves == [3]
+	tags = ID3(path)
+	assert str(tags["TPE1"]) == "Artist"
+	assert str(tags["TDRC"]) == "2024"
+	assert tags.getall("APIC")[0].data == b"jpeg-bytes"
+
+
+def test_retag_reuses_reserved_padding(tmp_path):
+	path = _mp3(tmp_path / "track.mp3")
+	tagging.write_tags(path, {"title": "Song", "artists": "Artist", "album": "Album"}, b"c" * 2000)
+	size = path.stat().st_size
+
+	tagging.write_tags(path, {"title": "Song (Remastered)", "artists": "Artist", "album": "Album", "track_no": 3}, b"d" * 2500)
+
+	assert path.stat().st_size == size
+	tags = ID3(path)
+	assert str(tags["TIT2"]) == "Song (Remastered)"
+	assert len(tags.getall("APIC")) == 1
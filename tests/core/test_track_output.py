@@ -47,3 +47,55 @@ def test_output_plan_treats_sanitized_filename_collisions_as_shared_files(tmp_pa
 
 	assert plan.queued_rows == (0,)
 	assert plan.duplicate_rows == {1: 0}
+
+
+def test_output_plan_requeues_file_a_stopped_run_never_tagged(tmp_path: pathlib.Path) -> None:
+	from csvmusic.core.journal import open_journal
+
+	tracks = [_track("Tagged"), _track("Untagged")]
+	for track in tracks:
+		path = expected_track_path(track, tmp_path, "mp3")
+		path.parent.mkdir(parents=True, exist_ok=True)
+		path.write_bytes(b"audio")
+	journal = open_journal(expected_track_path(tracks[0], tmp_path, "mp3").parent)
+	journal.record_tagged(tracks[0], "a", expected_track_path(tracks[0], tmp_path, "mp3"))
+	journal.record_download(tracks[1], "b", expected_track_path(tracks[1], tmp_path, "mp3"))
+	journal.close()
+
+	plan = plan_track_outputs(tracks, tmp_path, "mp3")
+
+	assert plan.existing_rows == (0,)
+	assert plan.queued_rows == (1,)
+
+
+def test_retag_playlist_tags_existing_files_and_counts_missing(tmp_path: pathlib.Path, monkeypatch) -> None:
+	from csvmusic.core import track_output
+	from csvmusic.core.journal import open_journal
+
+	tracks = [_track("One"), _track("Two"), _track("Three")]
+	for track in tracks[:2]:
+		path = expected_track_path(track, tmp_path, "mp3")
+		path.parent.mkdir(parents=True, exist_ok=True)
+		path.write_bytes(b"audio")
+	journal = open_journal(tmp_path / "Playlist")
+	journal.record_download(tracks[0], "vid-one", expected_track_path(tracks[0], tmp_path, "mp3"))
+	journal.close()
+
+	tagged = []
+
+	def fake_tag_file(path, meta, cover, **_kwargs):
+		if meta["title"] == "Two":
+			raise ValueError("broken file")
+		tagged.append((path.name, cover))
+
+	monkeypatch.setattr(track_output, "tag_file", fake_tag_file)
+	covers = []
+
+	report = track_output.retag_playlist(tracks, tmp_path, "mp3", cover_for=lambda track, vid: covers.append(vid) or b"cover")
+
+	assert (report.tagged, report.missing, report.failed) == (1, 1, 1)
+	assert tagged == [("Artist - One.mp3", b"cover")]
+	assert covers == ["vid-one", None]
+	journal = open_journal(tmp_path / "Playlist")
+	assert journal.download_for(tracks[0])["tagged"] is True
+	journal.close()
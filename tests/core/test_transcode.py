@@ -0,0 +1,105 @@
+import sys, threading, time
+
+import pytest
+
+from csvmusic.core.transcode import TranscodeCancelled, TranscodeScheduler
+
+
+def _python(code):
+	return [sys.executable, "-c", code]
+
+
+def test_jobs_report_cpu_and_wall_time():
+	scheduler = TranscodeScheduler(max_workers=2)
+	future = scheduler.submit(lambda: scheduler.run_process(_python("import sys; sum(range(3_000_000)); sys.stderr.write('done')")), label="busy")
+
+	proc = future.result(timeout=30)
+	scheduler.shutdown()
+
+	assert proc.returncode == 0
+	assert proc.stderr == "done"
+	(metrics,) = scheduler.metrics()
+	assert metrics.label == "busy" and metrics.ok and metrics.processes == 1
+	assert metrics.wall_s > 0
+	if metrics.cpu_s is not None:
+		assert metrics.cpu_s > 0
+	assert scheduler.stats()["jobs"] == 1
+
+
+def test_jobs_run_in_parallel_up_to_worker_count():
+	scheduler = TranscodeScheduler(max_workers=3)
+	started = time.monotonic()
+	futures = [scheduler.submit(lambda: scheduler.run_process(_python("import time; time.sleep(0.4)"))) for _ in range(3)]
+	for future in futures:
+		future.result(timeout=30)
+	scheduler.shutdown()
+
+	assert time.monotonic() - started < 1.1
+
+
+def test_cancel_kills_running_process_and_drops_queued_jobs():
+	scheduler = TranscodeScheduler(max_workers=1)
+	ran = []
+	dropped = []
+	running = scheduler.submit(lambda: scheduler.run_process(_python("import time; time.sleep(30)")))
+	queued = scheduler.submit(lambda: ran.append("queued"), on_cancel=lambda: dropped.append("queued"))
+	deadline = time.monotonic() + 10
+	while not scheduler._procs and time.monotonic() < deadline:
+		time.sleep(0.01)
+
+	started = time.monotonic()
+	scheduler.cancel()
+
+	with pytest.raises(TranscodeCancelled):
+		running.result(timeout=10)
+	assert queued.result(timeout=10) is None
+	assert ran == [] and dropped == ["queued"]
+	assert time.monotonic() - started < 5
+	with pytest.raises(TranscodeCancelled):
+		scheduler.submit(lambda: None)
+	scheduler.shutdown()
+	assert scheduler.stats()["dropped"] == 1
+
+
+def test_submit_blocks_once_the_queue_is_full():
+	scheduler = TranscodeScheduler(max_workers=1, max_queued=1)
+	release = threading.Event()
+	scheduler.submit(release.wait)
+	deadline = time.monotonic() + 10
+	while scheduler._queued and time.monotonic() < deadline:
+		time.sleep(0.01)
+	scheduler.submit(lambda: None)
+	submitted = threading.Event()
+	blocked = threading.Thread(target=lambda: (scheduler.submit(lambda: None), submitted.set()))
+	blocked.start()
+
+	assert not submitted.wait(0.2)
+	release.set()
+	assert submitted.wait(10)
+	blocked.join(10)
+	scheduler.shutdown()
+	assert scheduler.max_queue_depth == 1
+
+
+def test_cancel_releases_a_blocked_submit():
+	scheduler = TranscodeScheduler(max_workers=1, max_queued=1)
+	release = threading.Event()
+	scheduler.submit(release.wait)
+	scheduler.submit(lambda: None)
+	errors = []
+
+	def submit_more():
+		try:
+			scheduler.submit(lambda: None)
+		except TranscodeCancelled as exc:
+			errors.append(exc)
+
+	blocked = threading.Thread(target=submit_more)
+	blocked.start()
+	time.sleep(0.1)
+	scheduler.cancel()
+	blocked.join(10)
+	release.set()
+	scheduler.shutdown()
+
+	assert len(errors) == 1
@@ -44,7 +44,7 @@ def test_web_playlist_warns_when_partial(monkeypatch):
 				"entries": [{"id": "a", "title": "Artist - Track"}],
 			}
 
-	monkeypatch.setattr(web_playlist_import, "YoutubeDL", _YoutubeDL)
+	monkeypatch.setattr(web_playlist_import, "_youtube_dl", _YoutubeDL)
 
 	source = fetch_web_playlist("https://www.youtube.com/playlist?list=PLabc", "YouTube")
 
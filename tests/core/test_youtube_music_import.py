@@ -1,5 +1,6 @@
 import csvmusic.core.youtube_music_import as youtube_music_import
 from csvmusic.core.youtube_music_import import fetch_youtube_music_source, parse_youtube_playlist_id, _tracks_from_playlist
+from csvmusic.core.ytmusic_pool import YTMusicPool
 
 
 def test_parse_youtube_music_playlist_id():
@@ -47,7 +48,7 @@ def test_fetch_youtube_music_playlist_requests_all_tracks(monkeypatch):
 				],
 			}
 
-	monkeypatch.setattr(youtube_music_import, "YTMusic", _YTMusic)
+	monkeypatch.setattr(youtube_music_import, "default_ytmusic_pool", lambda: YTMusicPool(_YTMusic))
 
 	source = fetch_youtube_music_source("https://music.youtube.com/playlist?list=PLabc123")
 
@@ -69,7 +70,7 @@ def test_fetch_youtube_music_warns_when_partial(monkeypatch):
 				}],
 			}
 
-	monkeypatch.setattr(youtube_music_import, "YTMusic", _YTMusic)
+	monkeypatch.setattr(youtube_music_import, "default_ytmusic_pool", lambda: YTMusicPool(_YTMusic))
 
 	source = fetch_youtube_music_source("https://music.youtube.com/playlist?list=PLabc123")
 
@@ -0,0 +1,158 @@
+import asyncio, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from csvmusic.core import ytmusic_match
+from csvmusic.core.rate_limit import TokenBucket
+from csvmusic.core.ytmusic_pool import YTMusicPool
+
+
+LATENCY_S = 0.05
+
+
+class FakeSearchServer(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self):
+		super().__init__(("127.0.0.1", 0), FakeSearchHandler)
+		self.lock = threading.Lock()
+		self.in_flight = 0
+		self.peak_in_flight = 0
+		self.requests = 0
+
+	@property
+	def url(self):
+		return f"http://127.0.0.1:{self.server_address[1]}/search"
+
+
+class FakeSearchHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self):
+		server = self.server
+		with server.lock:
+			server.in_flight += 1
+			server.requests += 1
+			server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+		try:
+			time.sleep(LATENCY_S)
+			params = parse_qs(urlparse(self.path).query)
+			query = params["q"][0]
+			search_filter = params["filter"][0]
+			body = json.dumps(_fake_results(query, search_filter)).encode("utf-8")
+			self.send_response(200)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+		finally:
+			with server.lock:
+				server.in_flight -= 1
+
+	def log_message(self, *_args):
+		pass
+
+
+def _fake_results(query, search_filter):
+	# "Song N Artist N" resolves as a song; anything else only as a weak video.
+	words = query.split()
+	if search_filter == "songs" and len(words) >= 4 and words[0] == "Song":
+		n = words[1]
+		return [{
+			"videoId": f"song{n}",
+			"title": f"Song {n}",
+			"artists": [{"name": f"Artist {n}"}],
+			"duration": "3:00",
+		}]
+	return [{"videoId": f"vid-{abs(hash((query, search_filter))) % 10000}", "title": "Unrelated", "author": "Someone", "duration": "3:00"}]
+
+
+class HttpYTMusic:
+	"""YTMusic stand-in whose search goes over a pooled keep-alive session."""
+
+	def __init__(self, url):
+		self.url = url
+		self.session = requests.Session()
+
+	def search(self, query, filter, limit):
+		resp = self.session.get(self.url, params={"q": query, "filter": filter, "limit": limit}, timeout=5)
+		resp.raise_for_status()
+		return resp.json()[:limit]
+
+
+@pytest.fixture
+def search_server():
+	server = FakeSearchServer()
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_search_cache(monkeypatch):
+	ytmusic_match.SEARCH_CACHE.clear()
+	monkeypatch.setattr(ytmusic_match, "log", lambda *_args, **_kwargs: None)
+	yield
+	ytmusic_match.SEARCH_CACHE.clear()
+
+
+def _tracks(count):
+	return [{"title": f"Song {n}", "artists": f"Artist {n}", "duration_ms": 180000} for n in range(count)]
+
+
+def _unlimited():
+	return TokenBucket(1000.0, 1000)
+
+
+def test_async_search_matches_sync_candidate_shape(search_server):
+	client = ytmusic_match.AsyncSearchClient(max_in_flight=2, bucket=_unlimited(), pool=YTMusicPool(lambda: HttpYTMusic(search_server.url)))
+	try:
+		got = asyncio.run(client.search("Song 1 Artist 1", "songs"))
+	finally:
+		client.close()
+
+	ytmusic_match.SEARCH_CACHE.clear()
+	expected = ytmusic_match._search_filter(HttpYTMusic(search_server.url), "Song 1 Artist 1", "songs", ytmusic_match.SEARCH_LIMIT)
+
+	assert got == expected
+	assert got[0]["source"] == "music"
+
+
+def test_async_batch_matches_sync_results_with_requests_in_flight(search_server):
+	tracks = _tracks(12)
+
+	started = time.perf_counter()
+	sync_results = [ytmusic_match.find_best(HttpYTMusic(search_server.url), t) for t in tracks]
+	sync_s = time.perf_counter() - started
+
+	ytmusic_match.SEARCH_CACHE.clear()
+	search_server.peak_in_flight = 0
+	started = time.perf_counter()
+	async_results = ytmusic_match.batch_match_async(tracks, max_in_flight=8, bucket=_unlimited(), pool=YTMusicPool(lambda: HttpYTMusic(search_server.url)))
+	async_s = time.perf_counter() - started
+
+	assert [r["match"]["videoId"] for r in async_results] == [m["videoId"] for m, _conf, _opts in sync_results]
+	assert [r["confidence"] for r in async_results] == [conf for _m, conf, _opts in sync_results]
+	assert search_server.peak_in_flight > 1
+	assert async_s < sync_s
+
+
+def test_async_batch_respects_shared_rate_limit(search_server):
+	tracks = _tracks(6)
+	bucket = TokenBucket(20.0, 2)
+	client = ytmusic_match.AsyncSearchClient(max_in_flight=6, bucket=bucket, pool=YTMusicPool(lambda: HttpYTMusic(search_server.url)))
+	started = time.perf_counter()
+	try:
+		results = asyncio.run(client.match_many(tracks))
+	finally:
+		client.close()
+	elapsed = time.perf_counter() - started
+
+	assert all(r["match"] for r in results)
+	# 6 searches, 2 free from the burst, then 20/s.
+	assert elapsed >= 4 / 20.0 * 0.8
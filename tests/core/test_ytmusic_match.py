@@ -1,11 +1,19 @@
+import asyncio, gzip, json, pathlib
+
+from csvmusic.core.match_cache import MatchCache
 from csvmusic.core import ytmusic_match
+from csvmusic.core.ytmusic_pool import YTMusicPool
 
 
 class FakeYTMusic:
 	def __init__(self, results):
 		self.results = results
+		self.calls = 0
+		self.filters = []
 
 	def search(self, _query, filter, limit):
+		self.calls += 1
+		self.filters.append(filter)
 		return self.results.get(filter, [])[:limit]
 
 
@@ -44,3 +52,251 @@ def test_search_filter_falls_back_to_video_artist_names_for_uploader():
 
 	assert results[0]["author"] == "Uploader One, Uploader Two"
 	assert results[0]["channel"] == "Uploader One, Uploader Two"
+
+
+def _song_results():
+	return {
+		"songs": [
+			{
+				"videoId": "abc123",
+				"title": "Same Song",
+				"artists": [{"name": "Same Artist"}],
+				"duration_seconds": 200,
+			}
+		]
+	}
+
+
+def test_find_best_reuses_cached_ranking_without_searching(tmp_path):
+	ytmusic_match.SEARCH_CACHE.clear()
+	cache = MatchCache(tmp_path / "cache.sqlite3")
+	track = {"title": "Same Song", "artists": "Same Artist", "isrc": "USRC1", "duration_ms": 200000}
+	first = FakeYTMusic(_song_results())
+	match, confidence, _options = ytmusic_match.find_best(first, track, cache=cache, early_exit_score=None)
+
+	second = FakeYTMusic({})
+	cached_match, cached_confidence, _cached = ytmusic_match.find_best(second, dict(track, isrc=None), cache=cache)
+
+	assert first.calls > 0
+	assert second.calls == 0
+	assert cached_match["videoId"] == match["videoId"]
+	assert cached_confidence == confidence
+
+
+def test_find_best_refresh_ignores_cached_ranking(tmp_path):
+	ytmusic_match.SEARCH_CACHE.clear()
+	cache = MatchCache(tmp_path / "cache.sqlite3")
+	track = {"title": "Same Song", "artists": "Same Artist", "duration_ms": 200000}
+	ytmusic_match.find_best(FakeYTMusic(_song_results()), track, cache=cache)
+	fresh = FakeYTMusic(_song_results())
+
+	ytmusic_match.find_best(fresh, track, cache=cache, refresh=True)
+
+	assert fresh.calls > 0
+
+
+def test_repeated_query_variants_reuse_search_results():
+	ytmusic_match.SEARCH_CACHE.clear()
+	results = _song_results()
+	results["videos"] = [{"videoId": "vid456", "title": "Same Song", "author": "Same Artist", "duration": "3:20"}]
+	yt = FakeYTMusic(results)
+	track = {"title": "Same Song", "artists": "Same Artist", "duration_ms": 200000}
+
+	ytmusic_match._rank_candidates(yt, track)
+	calls_after_first = yt.calls
+	ytmusic_match._rank_candidates(yt, dict(track, album="Other Album"))
+
+	assert yt.calls == calls_after_first
+	assert ytmusic_match.SEARCH_CACHE.stats()["hits"] >= 1
+
+
+def _confident_track():
+	return {
+		"title": "Same Song & More",
+		"artists": "Same Artist",
+		"isrc": "USRC1",
+		"duration_ms": 200000,
+	}
+
+
+def _confident_results():
+	return {
+		"songs": [{
+			"videoId": "abc123",
+			"title": "Same Song & More",
+			"artists": [{"name": "Same Artist"}],
+			"author": "Same Artist - Topic",
+			"duration_seconds": 200,
+		}],
+		"videos": [{"videoId": "vid456", "title": "Same Song & More (Live)", "author": "Fan", "duration": "3:20"}],
+	}
+
+
+def test_rank_candidates_stops_after_confident_song_result():
+	ytmusic_match.SEARCH_CACHE.clear()
+	yt = FakeYTMusic(_confident_results())
+
+	options = ytmusic_match._rank_candidates(yt, _confident_track(), early_exit_score=0.9)
+
+	assert yt.calls == 1
+	assert yt.filters == ["songs"]
+	assert options[0]["videoId"] == "abc123"
+
+
+def test_find_best_does_not_cache_a_ranking_that_stopped_early(tmp_path):
+	ytmusic_match.SEARCH_CACHE.clear()
+	cache = MatchCache(tmp_path / "cache.sqlite3")
+	yt = FakeYTMusic(_confident_results())
+
+	match, _confidence, options = ytmusic_match.find_best(yt, _confident_track(), cache=cache)
+
+	assert yt.calls == 1
+	assert match["videoId"] == "abc123"
+	assert [option["videoId"] for option in options] == ["abc123"]
+	assert cache.get(ytmusic_match.match_cache_keys(_confident_track())) is None
+
+
+def test_rank_candidates_runs_full_plan_without_threshold():
+	ytmusic_match.SEARCH_CACHE.clear()
+	yt = FakeYTMusic(_confident_results())
+	track = _confident_track()
+
+	ytmusic_match._rank_candidates(yt, track, use_cache=False)
+
+	plan = ytmusic_match._search_plan(track)
+	assert yt.calls == len(plan) > 2
+	assert yt.filters == [search_filter for _query, search_filter in plan]
+	assert yt.filters.index("videos") == len(plan) // 2
+
+
+def test_memoized_scores_match_fresh_scorers_on_recorded_corpus():
+	corpus_path = pathlib.Path(__file__).resolve().parents[2] / "benchmarks" / "fixtures" / "scoring_corpus.json.gz"
+	with gzip.open(corpus_path, "rt", encoding="utf-8") as fh:
+		corpus = json.load(fh)
+
+	for entry in corpus:
+		expected = [ytmusic_match.CandidateScorer(entry["track"]).score(cand) for cand in entry["candidates"]]
+		assert ytmusic_match.score_candidates(entry["track"], entry["candidates"]) == expected
+
+
+def test_score_candidates_on_penalty_edge_cases():
+	track = {"title": "Alive", "artists": "Pearl Jam", "duration_ms": 341000}
+	cands = [
+		{"title": "Alive (Live Edit Remix) - Remastered", "artists": [{"name": "Pearl Jam"}], "author": "Pearl Jam - Topic", "duration_seconds": 340},
+		{"title": "Alive", "artists": None, "author": "Original Cast Orchestra", "duration_seconds": "5:41"},
+		{"title": "Tribute to Pearl Jam: Alive", "artists": None, "author": "Tribute Band", "duration_seconds": None},
+		{"title": "", "artists": None, "author": "", "duration_seconds": 0},
+		{"title": "ＡＬＩＶＥ  (Sped Up + Slowed + Reverb)", "artists": [{"name": "Pearl Jam"}], "author": "official", "duration_seconds": 330},
+		{"title": "Alive", "artists": [{"name": "Pearl Jam"}], "author": "Pearl Jam", "duration_seconds": 341},
+	]
+	expected = [0.92, 0.06, 0.0, 0.245, 0.665, 0.85]
+
+	# Repeated candidates exercise the memoized text features.
+	scores = ytmusic_match.score_candidates(track, cands + cands)
+
+	assert [round(score, 4) for score in scores] == expected + expected
+
+
+def test_find_best_retry_stays_behind_the_callers_rate_limit(monkeypatch):
+	ytmusic_match.SEARCH_CACHE.clear()
+	monkeypatch.setattr(ytmusic_match, "SEARCH_RETRY_SLEEP_S", 0)
+	built = []
+
+	def factory():
+		# The first client finds nothing, which triggers the retry on a fresh one.
+		built.append(FakeYTMusic({} if not built else _song_results()))
+		return built[-1]
+
+	class CountingBucket:
+		acquired = 0
+
+		def acquire(self):
+			CountingBucket.acquired += 1
+
+	bucket = CountingBucket()
+	yt = ytmusic_match.RateLimitedClient(YTMusicPool(factory), bucket)
+	track = {"title": "Same Song", "artists": "Same Artist", "duration_ms": 200000}
+
+	match, _confidence, _options = ytmusic_match.find_best(yt, track)
+
+	assert match["videoId"] == "abc123"
+	assert len(built) == 2
+	assert CountingBucket.acquired == built[0].calls + built[1].calls
+
+
+def test_iter_matches_searches_each_track_as_it_arrives(monkeypatch):
+	events = []
+	monkeypatch.setattr(ytmusic_match, "default_ytmusic_pool", lambda: object())
+	monkeypatch.setattr(ytmusic_match, "RATE_LIMIT_S", 0)
+
+	def no_match(_yt, track, **_kwargs):
+		events.append(f"matched {track['title']}")
+		return None, 0.0, []
+
+	monkeypatch.setattr(ytmusic_match, "find_best", no_match)
+
+	def tracks():
+		for title in ("One", "Two"):
+			events.append(f"read {title}")
+			yield {"title": title, "artists": "Artist"}
+
+	results = ytmusic_match.iter_matches(tracks())
+	assert next(results)["skipped"] is True
+	assert events == ["read One", "matched One"]
+	assert len(list(results)) == 1
+
+
+class FlakyYTMusic(FakeYTMusic):
+	"""Empty results for the first empty_calls searches, then the real ones; or raises instead."""
+
+	def __init__(self, results, empty_calls, error=None):
+		super().__init__(results)
+		self.empty_calls = empty_calls
+		self.error = error
+
+	def search(self, query, filter, limit):
+		if self.calls < self.empty_calls:
+			self.calls += 1
+			if self.error is not None:
+				raise self.error
+			return []
+		return super().search(query, filter, limit)
+
+
+def test_sync_and_async_find_best_share_retries(monkeypatch):
+	monkeypatch.setattr(ytmusic_match, "SEARCH_RETRY_SLEEP_S", 0)
+	track = {"title": "Same Song", "artists": "Same Artist", "duration_ms": 200000}
+	plan = len(ytmusic_match._search_plan(track))
+	found = []
+	for run_async in (False, True):
+		ytmusic_match.SEARCH_CACHE.clear()
+		flaky = FlakyYTMusic(_song_results(), plan)
+		pool = YTMusicPool(lambda: flaky)
+		if run_async:
+			client = ytmusic_match.AsyncSearchClient(pool=pool, use_search_cache=False)
+			try:
+				found.append(asyncio.run(client.find_best(track)))
+			finally:
+				client.close()
+		else:
+			found.append(ytmusic_match.find_best(pool, track))
+		assert flaky.calls == plan + 1
+
+	assert found[0] == found[1]
+	assert found[0][0]["videoId"] == "abc123"
+
+
+def test_async_first_search_error_is_not_retried_like_find_best(monkeypatch):
+	monkeypatch.setattr(ytmusic_match, "SEARCH_RETRY_SLEEP_S", 0)
+	ytmusic_match.SEARCH_CACHE.clear()
+	track = {"title": "Same Song", "artists": "Same Artist", "duration_ms": 200000}
+	flaky = FlakyYTMusic(_song_results(), 1, error=RuntimeError("throttled"))
+	client = ytmusic_match.AsyncSearchClient(pool=YTMusicPool(lambda: flaky), use_search_cache=False)
+	try:
+		result = asyncio.run(client.match_many([track]))[0]
+	finally:
+		client.close()
+
+	assert result["skipped"] is True
+	assert result["error"] == "throttled"
+	assert flaky.calls == 1
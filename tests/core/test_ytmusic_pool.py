@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from csvmusic.core import ytmusic_pool
+from csvmusic.core.ytmusic_pool import YTMusicPool
+
+
+class FakeSession:
+	def __init__(self):
+		self.closed = False
+
+	def close(self):
+		self.closed = True
+
+
+class FakeClient:
+	built = 0
+
+	def __init__(self, fail=False):
+		FakeClient.built += 1
+		self.fail = fail
+		self.searches = 0
+		self._session = FakeSession()
+
+	def search(self, query, filter=None, limit=None):
+		self.searches += 1
+		if self.fail:
+			raise RuntimeError("blocked")
+		return [{"videoId": query}]
+
+
+@pytest.fixture(autouse=True)
+def _quiet(monkeypatch):
+	monkeypatch.setattr(ytmusic_pool, "log", lambda *_args, **_kwargs: None)
+
+
+def test_pool_reuses_idle_client_across_searches():
+	built = []
+	pool = YTMusicPool(lambda: built.append(FakeClient()) or built[-1])
+
+	for n in range(5):
+		assert pool.search(f"q{n}", filter="songs", limit=1) == [{"videoId": f"q{n}"}]
+
+	assert len(built) == 1
+	assert built[0].searches == 5
+	assert pool.stats()["reused"] == 4
+
+
+def test_pool_retires_client_after_repeated_failures():
+	built = []
+
+	def factory():
+		built.append(FakeClient(fail=len(built) == 0))
+		return built[-1]
+
+	pool = YTMusicPool(factory, max_failures=3)
+	for _ in range(3):
+		with pytest.raises(RuntimeError):
+			pool.search("q")
+
+	assert built[0]._session.closed
+	assert pool.stats()["retired"] == 1
+	assert pool.search("ok") == [{"videoId": "ok"}]
+	assert len(built) == 2
+
+
+def test_pool_success_resets_failure_count():
+	client = FakeClient()
+	pool = YTMusicPool(lambda: client, max_failures=2)
+
+	client.fail = True
+	with pytest.raises(RuntimeError):
+		pool.search("q")
+	client.fail = False
+	pool.search("q")
+	client.fail = True
+	with pytest.raises(RuntimeError):
+		pool.search("q")
+
+	assert pool.stats()["retired"] == 0
+
+
+def test_pool_gives_concurrent_leases_distinct_clients_and_caps_idle():
+	pool = YTMusicPool(FakeClient, max_idle=2)
+	barrier = threading.Barrier(4)
+	seen = []
+	lock = threading.Lock()
+
+	def lease():
+		with pool.lease() as client:
+			with lock:
+				seen.append(client)
+			barrier.wait(timeout=5)
+
+	threads = [threading.Thread(target=lease) for _ in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert len({id(client) for client in seen}) == 4
+	assert pool.stats()["idle"] == 2
+	assert sum(1 for client in seen if client._session.closed) == 2
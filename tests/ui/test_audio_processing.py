@@ -0,0 +1,45 @@
+from csvmusic.core.downloader import NORMALIZE_MODE_REPLAYGAIN
+from csvmusic.ui.main_window import MainWindow
+
+
+class _Control:
+	def __init__(self, checked=False, value=0):
+		self.checked = checked
+		self.number = value
+		self.enabled = True
+
+	def isChecked(self):
+		return self.checked
+
+	def value(self):
+		return self.number
+
+	def setEnabled(self, enabled):
+		self.enabled = enabled
+
+
+def _window(*, normalize, replaygain):
+	return type("Window", (), {
+		"cb_eq_enabled": _Control(True),
+		"cb_eq_normalize": _Control(normalize),
+		"cb_eq_replaygain": _Control(replaygain),
+		"slider_volume": _Control(),
+		"slider_bass": _Control(),
+		"slider_treble": _Control(),
+	})()
+
+
+def test_replaygain_mode_is_only_sent_while_normalizing():
+	assert MainWindow._audio_processing_options(_window(normalize=True, replaygain=True))["normalize_mode"] == NORMALIZE_MODE_REPLAYGAIN
+	assert "normalize_mode" not in MainWindow._audio_processing_options(_window(normalize=False, replaygain=True))
+	assert "normalize_mode" not in MainWindow._audio_processing_options(_window(normalize=True, replaygain=False))
+
+
+def test_replaygain_checkbox_follows_normalize_checkbox():
+	window = _window(normalize=False, replaygain=True)
+	MainWindow._sync_replaygain_enabled(window)
+	assert window.cb_eq_replaygain.enabled is False
+
+	window.cb_eq_normalize.checked = True
+	MainWindow._sync_replaygain_enabled(window)
+	assert window.cb_eq_replaygain.enabled is True
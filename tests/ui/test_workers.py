@@ -1,30 +1,66 @@
 import pathlib
+import sys
+import time
+
+import pytest
 
 from csvmusic.ui import workers
 
 
-def _pipeline(tmp_path: pathlib.Path, *, force_download: bool) -> workers.PipelineWorker:
-	return workers.PipelineWorker(
-		csv_path="",
-		out_dir=str(tmp_path),
-		playlist="Test Playlist",
-		fmt="mp3",
-		write_m3u8=False,
-		write_m3u_plain=False,
-		embed_art=False,
-		yt_dlp_path=None,
-		ffmpeg_path_override=None,
-		cookies_browser=None,
-		cookies_file=None,
-		force_download=force_download,
-		tracks_override=[{
+def _pipeline(tmp_path: pathlib.Path, *, force_download: bool = False, **kwargs) -> workers.PipelineWorker:
+	options = {
+		"csv_path": "",
+		"out_dir": str(tmp_path),
+		"playlist": "Test Playlist",
+		"fmt": "mp3",
+		"write_m3u8": False,
+		"write_m3u_plain": False,
+		"embed_art": False,
+		"yt_dlp_path": None,
+		"ffmpeg_path_override": None,
+		"cookies_browser": None,
+		"cookies_file": None,
+		"force_download": force_download,
+		"tracks_override": [{
 			"title": "Complicated",
 			"artists": "Avril Lavigne",
 			"playlist": "Test Playlist",
 			"duration_ms": 244000,
 		}],
-		row_indices=[0],
-	)
+		"row_indices": [0],
+	}
+	options.update(kwargs)
+	return workers.PipelineWorker(**options)
+
+
+def _songs(count: int, playlist: str = "Test Playlist") -> dict:
+	return {
+		"tracks_override": [{"title": f"Song {index}", "artists": "Artist", "playlist": playlist} for index in range(count)],
+		"row_indices": list(range(count)),
+	}
+
+
+@pytest.fixture
+def offline(monkeypatch):
+	"""No YouTube Music client, match cache, cover art, tagging or pause between tracks; tests patch find_best and downloads."""
+	monkeypatch.setattr(workers, "default_ytmusic_pool", lambda: object())
+	monkeypatch.setattr(workers, "default_match_cache", lambda: None)
+	monkeypatch.setattr(workers, "track_cover_bytes", lambda _track, _video_id: None)
+	monkeypatch.setattr(workers, "tag_file", lambda *_args, **_kwargs: None)
+	monkeypatch.setattr(workers, "_EVENT_POLL_S", 0.01)
+	monkeypatch.setattr(workers.PipelineWorker, "_track_pause_s", lambda _self: 0.0)
+	return monkeypatch
+
+
+def _confident_match(_yt, track, **_kwargs):
+	option = {"videoId": track["title"], "title": track["title"], "author": "Artist", "source": "music", "score": 0.9}
+	return option, 0.9, [option]
+
+
+def _write_download(_video_id, destination, base_name, _profile):
+	path = destination / f"{base_name}.mp3"
+	path.write_bytes(b"audio")
+	return path
 
 
 def _low_confidence_result():
@@ -38,25 +74,15 @@ def _low_confidence_result():
 	return None, 0.4, [option]
 
 
-def test_force_download_uses_best_low_confidence_candidate(monkeypatch, tmp_path):
+def test_force_download_uses_best_low_confidence_candidate(offline, tmp_path):
 	worker = _pipeline(tmp_path, force_download=True)
 	results = []
 	finished = []
 	worker.sig_track_result.connect(lambda row, payload: results.append((row, payload)))
 	worker.sig_done.connect(lambda message, done, skipped, failed: finished.append((message, done, skipped, failed)))
 
-	monkeypatch.setattr(workers, "YTMusic", lambda: object())
-	monkeypatch.setattr(workers, "find_best", lambda _yt, _track: _low_confidence_result())
-	monkeypatch.setattr(workers, "yt_thumbnail_bytes", lambda _video_id: None)
-	monkeypatch.setattr(workers, "tag_file", lambda *_args, **_kwargs: None)
-	monkeypatch.setattr(workers.time, "sleep", lambda _seconds: None)
-
-	def fake_download(_video_id, destination, base_name, _profile):
-		path = destination / f"{base_name}.mp3"
-		path.write_bytes(b"audio")
-		return path
-
-	monkeypatch.setattr(worker, "_download_with_profile", fake_download)
+	offline.setattr(workers, "find_best", lambda _yt, _track, **_kwargs: _low_confidence_result())
+	offline.setattr(worker, "_download_with_profile", _write_download)
 	worker.run()
 
 	assert len(results) == 1
@@ -68,16 +94,14 @@ def test_force_download_uses_best_low_confidence_candidate(monkeypatch, tmp_path
 	assert finished[0][3] == []
 
 
-def test_low_confidence_candidate_is_skipped_without_force(monkeypatch, tmp_path):
-	worker = _pipeline(tmp_path, force_download=False)
+def test_low_confidence_candidate_is_skipped_without_force(offline, tmp_path):
+	worker = _pipeline(tmp_path)
 	results = []
 	finished = []
 	worker.sig_track_result.connect(lambda row, payload: results.append((row, payload)))
 	worker.sig_done.connect(lambda message, done, skipped, failed: finished.append((message, done, skipped, failed)))
 
-	monkeypatch.setattr(workers, "YTMusic", lambda: object())
-	monkeypatch.setattr(workers, "find_best", lambda _yt, _track: _low_confidence_result())
-	monkeypatch.setattr(workers.time, "sleep", lambda _seconds: None)
+	offline.setattr(workers, "find_best", lambda _yt, _track, **_kwargs: _low_confidence_result())
 	worker.run()
 
 	assert len(results) == 1
@@ -86,3 +110,238 @@ def test_low_confidence_candidate_is_skipped_without_force(monkeypatch, tmp_path
 	assert finished[0][1] == []
 	assert len(finished[0][2]) == 1
 	assert finished[0][3] == []
+
+
+def test_concurrent_matches_are_emitted_in_row_order(offline, tmp_path):
+	worker = _pipeline(tmp_path, **_songs(6))
+	results = []
+	worker.sig_track_result.connect(lambda row, payload: results.append(row))
+
+	def slow_first_search(_yt, track, **_kwargs):
+		if track["title"] == "Song 0":
+			time.sleep(0.05)
+		return _low_confidence_result()
+
+	offline.setattr(workers, "find_best", slow_first_search)
+	worker.run()
+
+	assert results == [0, 1, 2, 3, 4, 5]
+
+
+def test_download_stage_drains_matches_on_parallel_workers(offline, tmp_path):
+	worker = _pipeline(tmp_path, **_songs(4))
+	results = []
+	stats = []
+	finished = []
+	worker.sig_track_result.connect(lambda row, payload: results.append((row, payload)))
+	worker.sig_stage_stats.connect(stats.append)
+	worker.sig_done.connect(lambda message, done, skipped, failed: finished.append(done))
+
+	def slow_first_download(video_id, destination, base_name, profile):
+		if video_id == "Song 0":
+			time.sleep(0.05)
+		return _write_download(video_id, destination, base_name, profile)
+
+	offline.setattr(workers, "find_best", _confident_match)
+	offline.setattr(worker, "_download_with_profile", slow_first_download)
+	worker.run()
+
+	assert sorted(row for row, _payload in results) == [0, 1, 2, 3]
+	assert all(payload["downloaded"] for _row, payload in results)
+	assert [track["title"] for track in finished[0]] == ["Song 0", "Song 1", "Song 2", "Song 3"]
+	assert stats[-1]["finished_jobs"] == 4
+	assert stats[-1]["queue_capacity"] == worker.stage_stats.queue_capacity
+
+
+def test_download_job_that_raises_still_finishes_its_row(offline, tmp_path):
+	worker = _pipeline(tmp_path)
+	results = []
+	progress = []
+	finished = []
+	worker.sig_track_result.connect(lambda row, payload: results.append((row, payload)))
+	worker.sig_progress.connect(lambda done, total: progress.append((done, total)))
+	worker.sig_done.connect(lambda message, done, skipped, failed: finished.append(failed))
+
+	def broken(*_args, **_kwargs):
+		raise RuntimeError("candidate ordering failed")
+
+	offline.setattr(workers, "find_best", _confident_match)
+	offline.setattr(worker, "_ordered_force_candidates", broken)
+	worker.run()
+
+	assert [row for row, _payload in results] == [0]
+	assert results[0][1]["error"] == "candidate ordering failed"
+	assert progress[-1] == (1, 1)
+	assert finished[0][0]["error"] == "candidate ordering failed"
+
+
+def test_restart_resumes_from_journal_without_searching_or_downloading(offline, tmp_path):
+	first = _pipeline(tmp_path)
+	option = {"videoId": "test-video", "title": "Complicated", "author": "Avril Lavigne", "source": "music", "score": 0.9}
+	tagged = []
+
+	def crash_while_tagging(*_args, **_kwargs):
+		raise RuntimeError("stopped")
+
+	offline.setattr(workers, "find_best", lambda _yt, _track, **_kwargs: (option, 0.9, [option]))
+	offline.setattr(workers, "tag_file", crash_while_tagging)
+	offline.setattr(first, "_download_with_profile", _write_download)
+	first.run()
+
+	second = _pipeline(tmp_path)
+	results = []
+	second.sig_track_result.connect(lambda row, payload: results.append(payload))
+
+	def no_search(*_args, **_kwargs):
+		raise AssertionError("journaled track was searched again")
+
+	def no_download(*_args, **_kwargs):
+		raise AssertionError("journaled file was downloaded again")
+
+	offline.setattr(workers, "find_best", no_search)
+	offline.setattr(workers, "tag_file", lambda path, *_args, **_kwargs: tagged.append(path.name))
+	offline.setattr(second, "_download_with_profile", no_download)
+	second.run()
+
+	assert tagged == ["Avril Lavigne - Complicated.mp3"]
+	assert results[0]["downloaded"] is True
+	assert results[0]["match"]["videoId"] == "test-video"
+
+
+def test_encodes_run_on_transcode_pool_after_download_returns(offline, tmp_path):
+	worker = _pipeline(tmp_path, **_songs(3))
+	results = []
+	statuses = []
+	worker.sig_track_result.connect(lambda row, payload: results.append((row, payload)))
+	worker.sig_row_status.connect(lambda row, text: statuses.append((row, text)))
+	download_threads = set()
+
+	def fake_fetch(video_id, destination, base_name, _profile):
+		download_threads.add(workers.threading.current_thread().name)
+		src = destination / f"{base_name}.tmp"
+		src.write_bytes(b"audio")
+		dst = destination / f"{base_name}.mp3"
+		copy = f"import shutil; shutil.copyfile({str(src)!r}, {str(dst)!r})"
+		return workers.PendingEncode(video_id=video_id, src=src, dst=dst, out=dst, commands=[lambda _runner: ([sys.executable, "-c", copy], False)])
+
+	offline.setattr(workers, "find_best", _confident_match)
+	offline.setattr(worker, "_download_with_profile", fake_fetch)
+	worker.run()
+
+	assert sorted(row for row, _payload in results) == [0, 1, 2]
+	assert all(payload["downloaded"] for _row, payload in results)
+	assert sorted(p.name for p in (tmp_path / "Test Playlist").glob("*.mp3")) == [f"Artist - Song {index}.mp3" for index in range(3)]
+	assert not list((tmp_path / "Test Playlist").glob("*.tmp"))
+	assert all(name.startswith("csvmusic-download") for name in download_threads)
+	assert worker._transcoder.stats()["jobs"] == 3
+	assert (0, "Encoding (mp3)…") in statuses
+
+
+def test_replaygain_from_the_encode_is_written_with_the_other_tags(offline, tmp_path):
+	worker = _pipeline(tmp_path)
+	tagged = []
+
+	def staged_fetch(video_id, destination, base_name, _profile):
+		out = destination / f"{base_name}.encoding.mp3"
+		out.write_bytes(b"audio")
+		return workers.PendingEncode(video_id=video_id, src=None, dst=destination / f"{base_name}.mp3", out=out, commands=[], replaygain=(-3.0, 0.9))
+
+	def record_tags(path, _meta, _cover, **kwargs):
+		tagged.append((path.name, kwargs["replaygain"], (path.parent / "Avril Lavigne - Complicated.mp3").exists()))
+
+	offline.setattr(workers, "find_best", _confident_match)
+	offline.setattr(workers, "tag_file", record_tags)
+	offline.setattr(worker, "_download_with_profile", staged_fetch)
+	worker.run()
+
+	assert tagged == [("Avril Lavigne - Complicated.encoding.mp3", (-3.0, 0.9), False)]
+	assert [p.name for p in (tmp_path / "Test Playlist").glob("*.mp3")] == ["Avril Lavigne - Complicated.mp3"]
+
+
+def test_stop_during_encoding_finishes_every_row_and_leaves_no_files(offline, tmp_path):
+	worker = _pipeline(tmp_path, **_songs(3))
+	results = []
+	worker.sig_track_result.connect(lambda row, payload: results.append((row, payload)))
+
+	def slow_fetch(video_id, destination, base_name, _profile):
+		src = destination / f"{base_name}.tmp"
+		src.write_bytes(b"audio")
+		out = destination / f"{base_name}.encoding.mp3"
+		encode = f"import time; open({str(out)!r}, 'wb').write(b'partial'); time.sleep(30)"
+		return workers.PendingEncode(video_id=video_id, src=src, dst=destination / f"{base_name}.mp3", out=out, commands=[lambda _runner: ([sys.executable, "-c", encode], False)])
+
+	def stop_once_encoding():
+		deadline = time.monotonic() + 10
+		while time.monotonic() < deadline:
+			transcoder = worker._transcoder
+			if transcoder is not None and transcoder._procs and transcoder._queued == 2:
+				break
+			time.sleep(0.01)
+		worker.stop()
+
+	offline.setattr(workers, "find_best", _confident_match)
+	scheduler = workers.TranscodeScheduler
+	offline.setattr(workers, "TranscodeScheduler", lambda: scheduler(max_workers=1))
+	offline.setattr(worker, "_download_with_profile", slow_fetch)
+	stopper = workers.threading.Thread(target=stop_once_encoding)
+	stopper.start()
+	worker.run()
+	stopper.join()
+
+	assert sorted(row for row, _payload in results) == [0, 1, 2]
+	assert all(payload["error"] == "Stopped before encoding finished." for _row, payload in results)
+	assert list((tmp_path / "Test Playlist").glob("Artist*")) == []
+
+
+def test_library_store_reuses_song_across_playlists(offline, tmp_path):
+	downloads = []
+
+	def confident_match(_yt, track, **_kwargs):
+		option = {"videoId": "shared-video", "title": track["title"], "author": "Artist", "source": "music", "score": 0.9}
+		return option, 0.9, [option]
+
+	def counted_download(video_id, destination, base_name, profile):
+		downloads.append(video_id)
+		return _write_download(video_id, destination, base_name, profile)
+
+	offline.setattr(workers, "find_best", confident_match)
+	for playlist in ("Road Trip", "Gym"):
+		worker = _pipeline(
+			tmp_path,
+			playlist=playlist,
+			tracks_override=[{"title": "Complicated", "artists": "Avril Lavigne", "album": "Let Go", "playlist": playlist}],
+			write_m3u8=True,
+			library_store=True,
+		)
+		offline.setattr(worker, "_download_with_profile", counted_download)
+		worker.run()
+
+	assert downloads == ["shared-video"]
+	road_trip = tmp_path / "Road Trip" / "Avril Lavigne - Complicated.mp3"
+	gym = tmp_path / "Gym" / "Avril Lavigne - Complicated.mp3"
+	assert road_trip.read_bytes() == gym.read_bytes() == b"audio"
+	assert f"../{workers.LIBRARY_DIR}/" in (tmp_path / "Gym" / "Gym.m3u8").read_text(encoding="utf-8")
+
+
+def test_library_song_keeps_each_playlists_track_number(offline, tmp_path):
+	def confident_match(_yt, track, **_kwargs):
+		option = {"videoId": "shared-video", "title": track["title"], "author": "Artist", "source": "music", "score": 0.9}
+		return option, 0.9, [option]
+
+	def tag_track_no(path, track, *_args, **_kwargs):
+		path.write_bytes(b"audio|track " + str(track["track_no"]).encode())
+
+	offline.setattr(workers, "find_best", confident_match)
+	offline.setattr(workers, "tag_file", tag_track_no)
+	for playlist, track_no in (("Road Trip", 3), ("Gym", 7)):
+		worker = _pipeline(
+			tmp_path,
+			playlist=playlist,
+			tracks_override=[{"title": "Complicated", "artists": "Avril Lavigne", "album": "Let Go", "playlist": playlist, "track_no": track_no}],
+			library_store=True,
+		)
+		offline.setattr(worker, "_download_with_profile", _write_download)
+		worker.run()
+
+	assert (tmp_path / "Road Trip" / "Avril Lavigne - Complicated.mp3").read_bytes() == b"audio|track 3"
+	assert (tmp_path / "Gym" / "Avril Lavigne - Complicated.mp3").read_bytes() == b"audio|track 7"